@@ -22,11 +22,16 @@ import dwavebinarycsp.compilers
 from dwavebinarycsp.core import *
 import dwavebinarycsp.core
 
+from dwavebinarycsp.preprocess import *
+import dwavebinarycsp.preprocess
+
 from dwavebinarycsp.reduction import *
 import dwavebinarycsp.reduction
 
 import dwavebinarycsp.exceptions
 
+import dwavebinarycsp.solvers
+
 import dwavebinarycsp.factories
 
 from dwavebinarycsp.io import *
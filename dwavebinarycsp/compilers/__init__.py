@@ -13,3 +13,4 @@
 #    limitations under the License.
 
 from dwavebinarycsp.compilers.stitcher import *
+from dwavebinarycsp.compilers.store import *
@@ -12,10 +12,14 @@
 #    See the License for the specific language governing permissions and
 #    limitations under the License.
 
-from itertools import combinations, count, product
+from array import array
+from collections import OrderedDict, namedtuple
+from concurrent.futures import ProcessPoolExecutor
+from itertools import combinations, count, product, repeat
 import operator
 
 import networkx as nx
+import numpy as np
 import penaltymodel
 import dimod
 
@@ -24,10 +28,111 @@ from dwavebinarycsp.exceptions import ImpossibleBQM
 from dwavebinarycsp.reduction import irreducible_components
 import dwavebinarycsp
 
-__all__ = ['stitch']
+__all__ = ['stitch', 'iter_stitch', 'warm_cache', 'PenaltyModelCache', 'PenaltyModelCacheInfo']
 
 
-def stitch(csp, min_classical_gap=2.0, max_graph_size=8):
+PenaltyModelCacheInfo = namedtuple('PenaltyModelCacheInfo', ['hits', 'misses', 'maxsize', 'currsize'])
+"""Statistics of a :class:`.PenaltyModelCache`, as returned by :meth:`.PenaltyModelCache.cache_info`.
+
+Attributes:
+    hits (int): Number of constraints whose penalty model was found in the cache.
+    misses (int): Number of constraints whose penalty model had to be built.
+    maxsize (int): Maximum number of penalty models kept.
+    currsize (int): Number of penalty models currently kept.
+
+"""
+
+
+class PenaltyModelCache(object):
+    """Least-recently-used cache of the penalty models built by :func:`.stitch`.
+
+    Penalty models are kept by the canonical form of their constraint, see
+    :meth:`.Constraint.canonical`, together with the minimum classical gap and the maximum graph
+    size. Constraints that are the same up to relabeling, reordering and flipping of their
+    variables therefore share a penalty model, which is relabeled onto the variables of each.
+
+    Args:
+        maxsize (int, optional, default=1024):
+            Maximum number of penalty models to keep in memory. The least recently used are
+            discarded first.
+
+        store (:obj:`.PenaltyModelStore`, optional):
+            Persistent store to consult on a miss and to save newly built penalty models to,
+            so that they can be shared between processes.
+
+    Examples:
+        This example builds a binary quadratic model for a 3x3 bit multiplication circuit,
+        which has only a few distinct shapes of constraint.
+
+        >>> csp = dwavebinarycsp.factories.multiplication_circuit(3)
+        >>> cache = dwavebinarycsp.PenaltyModelCache()
+        >>> bqm = dwavebinarycsp.stitch(csp, cache=cache)
+        >>> cache.cache_info()    # doctest: +SKIP
+        PenaltyModelCacheInfo(hits=12, misses=3, maxsize=1024, currsize=3)
+
+    """
+    def __init__(self, maxsize=1024, store=None):
+        self.maxsize = maxsize
+        self.store = store
+        self.hits = 0
+        self.misses = 0
+        self._models = OrderedDict()
+
+    def __len__(self):
+        return self._models.__len__()
+
+    def cache_info(self):
+        """Report the cache statistics.
+
+        Returns:
+            :obj:`.PenaltyModelCacheInfo`: The number of hits and misses, the maximum size and
+            the current size.
+
+        """
+        return PenaltyModelCacheInfo(self.hits, self.misses, self.maxsize, len(self._models))
+
+    def clear(self):
+        """Discard all of the penalty models kept in memory and reset the statistics."""
+        self._models.clear()
+        self.hits = self.misses = 0
+
+    def _get(self, key, default=None):
+        # models found in the store count as hits, only the ones that have to be built are misses
+        try:
+            value = self._models[key]
+        except KeyError:
+            value = default if self.store is None else self.store.get(key, default)
+            if value is default:
+                self.misses += 1
+                return default
+            self._remember(key, value)
+        else:
+            self._models.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def _put(self, key, value):
+        self._remember(key, value)
+        if self.store is not None:
+            self.store.put(key, value)
+
+    def _remember(self, key, value):
+        models = self._models
+        models[key] = value
+        models.move_to_end(key)
+        while len(models) > self.maxsize:
+            models.popitem(last=False)
+
+
+penalty_model_cache = PenaltyModelCache()
+""":obj:`.PenaltyModelCache`: Cache used by :func:`.stitch` when none is given."""
+
+# the number of quadratic terms that stitch holds in memory at a time
+_STITCH_CHUNK_SIZE = 1 << 14
+
+
+def stitch(csp, min_classical_gap=2.0, max_graph_size=8, cache=None, workers=None, executor=None,
+           aux_prefix='aux'):
     """Build a binary quadratic model with minimal energy levels at solutions to the specified constraint satisfaction
     problem.
 
@@ -44,6 +149,27 @@ def stitch(csp, min_classical_gap=2.0, max_graph_size=8):
             Maximum number of variables in the binary quadratic model that can be used to
             represent a single constraint.
 
+        cache (:obj:`.PenaltyModelCache`, optional):
+            Cache of penalty models to consult and fill. Defaults to
+            :data:`dwavebinarycsp.compilers.stitcher.penalty_model_cache`, which is shared by
+            all calls. Use ``PenaltyModelCache(maxsize=0)`` to build every penalty model from
+            scratch.
+
+        workers (int, optional):
+            If given, the penalty models of the distinct shapes of constraint that are not in
+            the cache are first built in parallel by a :class:`~concurrent.futures.ProcessPoolExecutor`
+            with this many worker processes, see :func:`.warm_cache`. The binary quadratic
+            model, including the labels of the auxiliary variables, is the same as when they
+            are built one after another.
+
+        executor (:class:`~concurrent.futures.Executor`, optional):
+            Executor to build the penalty models in parallel with, instead of `workers`.
+
+        aux_prefix (str, optional, default='aux'):
+            Prefix of the labels of the auxiliary variables, which are numbered from 0. Give
+            each component of a problem its own prefix to combine their binary quadratic
+            models with :func:`.merge_bqms`.
+
     Returns:
         :class:`~dimod.BinaryQuadraticModel`
 
@@ -120,65 +246,382 @@ def stitch(csp, min_classical_gap=2.0, max_graph_size=8):
 
     """
 
+    # rather than adding the bqms of iter_stitch, the constraints that share a penalty model are
+    # collected together and their biases added one group at a time, all in spin space
+    index = {}  # the variables of the bqm in order
+    groups = {}  # id(model) -> (model, variable indices, signs), flattened over the constraints
+    for _, model, labels, signs in _iter_penalty_terms(csp, min_classical_gap, max_graph_size,
+                                                       cache, workers, executor, aux_prefix):
+        if not labels:
+            # empty constraint
+            continue
+
+        if id(model) not in groups:
+            groups[id(model)] = (model, array('q'), array('b'))
+        _, variables, signs_ = groups[id(model)]
+        variables.extend(index.setdefault(v, len(index)) for v in labels)
+        signs_.extend(signs)
+
+    labels = list(index)
+    index.clear()
+
+    offset = 0.0
+    linear = np.zeros(len(labels))
+    for model, variables, signs in groups.values():
+        num_variables = len(model.variables)
+        variables = np.frombuffer(variables, dtype=np.int64).reshape(-1, num_variables)
+        signs = np.frombuffer(signs, dtype=np.int8).reshape(-1, num_variables)
+
+        ldata, _, moffset = model.to_numpy_vectors(range(num_variables))
+
+        offset += moffset * len(variables)
+        linear += np.bincount(variables.ravel(), (signs * ldata).ravel(), minlength=len(labels))
+
+    bqm = dimod.BinaryQuadraticModel(dimod.SPIN)
+    bqm.add_linear_from(zip(labels, linear.tolist()))
+    bqm.offset = offset
+    del linear
+
+    # the quadratic biases are added a bounded number of terms at a time, so that the terms of
+    # the whole problem are never held alongside the bqm
+    for model, variables, signs in groups.values():
+        num_variables = len(model.variables)
+        variables = np.frombuffer(variables, dtype=np.int64).reshape(-1, num_variables)
+        signs = np.frombuffer(signs, dtype=np.int8).reshape(-1, num_variables)
+
+        _, (mrow, mcol, mdata), _ = model.to_numpy_vectors(range(num_variables))
+
+        if not len(mdata):
+            continue
+
+        step = max(_STITCH_CHUNK_SIZE // len(mdata), 1)
+        for start in range(0, len(variables), step):
+            chunk = variables[start:start + step]
+            chunk_signs = signs[start:start + step]
+            bqm.add_quadratic_from(zip(map(labels.__getitem__, chunk[:, mrow].ravel().tolist()),
+                                       map(labels.__getitem__, chunk[:, mcol].ravel().tolist()),
+                                       (chunk_signs[:, mrow] * chunk_signs[:, mcol] * mdata).ravel().tolist()))
+
+    return bqm.change_vartype(csp.vartype, inplace=True)
+
+
+def iter_stitch(csp, min_classical_gap=2.0, max_graph_size=8, cache=None, workers=None, executor=None,
+                aux_prefix='aux'):
+    """Build a binary quadratic model for each constraint of a constraint satisfaction problem,
+    one at a time.
+
+    The penalty models, including the labels of their auxiliary variables, are those that
+    :func:`.stitch` adds together, so that large problems can be written out or sampled in
+    parts without holding a binary quadratic model for the whole problem in memory.
+
+    Args:
+        csp (:obj:`.ConstraintSatisfactionProblem`):
+            Constraint satisfaction problem.
+
+        min_classical_gap (float, optional, default=2.0):
+            Minimum energy gap from ground, as for :func:`.stitch`.
+
+        max_graph_size (int, optional, default=8):
+            Maximum number of variables in the binary quadratic model that can be used to
+            represent a single constraint.
+
+        cache (:obj:`.PenaltyModelCache`, optional):
+            Cache of penalty models to consult and fill, as for :func:`.stitch`.
+
+        workers (int, optional):
+            Number of worker processes to build the penalty models in before the first is
+            yielded, as for :func:`.stitch`.
+
+        executor (:class:`~concurrent.futures.Executor`, optional):
+            Executor to build the penalty models in parallel with, instead of `workers`.
+
+        aux_prefix (str, optional, default='aux'):
+            Prefix of the labels of the auxiliary variables, as for :func:`.stitch`.
+
+    Yields:
+        tuple: A 4-tuple `(constraint, bqm, classical_gap, aux_variables)` for each constraint,
+        in the order of :attr:`.ConstraintSatisfactionProblem.constraints`, where `bqm` is the
+        :class:`~dimod.BinaryQuadraticModel` of the constraint, `classical_gap` the energy gap
+        between its ground states and the lowest energy state that violates the constraint
+        (infinite if no state does), and `aux_variables` a list of its auxiliary variables.
+
+    Raises:
+        :exc:`~dwavebinarycsp.exceptions.ImpossibleBQM`: When a constraint is reached for
+        which no binary quadratic model can be built.
+
+    Examples:
+        This example writes the binary quadratic models of a multiplication circuit to a list
+        of lines, as it might to a file.
+
+        >>> csp = dwavebinarycsp.factories.multiplication_circuit(2)
+        >>> lines = []
+        >>> for const, bqm, gap, aux in dwavebinarycsp.iter_stitch(csp):
+        ...     lines.append(repr(bqm.to_serializable()))
+        >>> len(lines)
+        6
+
+    """
+    gaps = {}  # canonical table -> classical gap, for the constraints that share a penalty model
+    for const, model, labels, signs in _iter_penalty_terms(csp, min_classical_gap, max_graph_size,
+                                                           cache, workers, executor, aux_prefix):
+        bqm = _relabel_terms(model, labels, signs).change_vartype(csp.vartype, inplace=True)
+
+        if _is_relabelable(const):
+            key, _ = const.canonical()
+            if key not in gaps:
+                gaps[key] = _classical_gap(bqm, const)
+            classical_gap = gaps[key]
+        else:
+            classical_gap = _classical_gap(bqm, const)
+
+        yield const, bqm, classical_gap, [v for v in labels if v not in const.variables]
+
+
+def _iter_penalty_terms(csp, min_classical_gap, max_graph_size, cache, workers, executor, aux_prefix):
+    # (constraint, model, labels, signs) for each constraint, see _penalty_terms
+
     def aux_factory():
         for i in count():
-            yield 'aux{}'.format(i)
+            yield '{}{}'.format(aux_prefix, i)
 
     aux = aux_factory()
 
-    bqm = dimod.BinaryQuadraticModel.empty(csp.vartype)
+    if cache is None:
+        cache = penalty_model_cache
+
+    if workers is not None or executor is not None:
+        warm_cache(csp, min_classical_gap, max_graph_size, cache, workers=workers, executor=executor)
 
-    # developer note: we could cache them and relabel, for now though let's do the simple thing
-    # penalty_models = {}
     for const in csp.constraints:
-        configurations = const.configurations
+        model, labels, signs = _penalty_terms(const, min_classical_gap, max_graph_size, aux, cache)
+        yield const, model, labels, signs
 
-        if len(const.variables) > max_graph_size:
-            msg = ("The given csp contains a constraint {const} with {num_var} variables. "
-                   "This cannot be mapped to a graph with {max_graph_size} nodes. "
-                   "Consider checking whether your constraint is irreducible."
-                   "").format(const=const, num_var=len(const.variables), max_graph_size=max_graph_size)
-            raise ImpossibleBQM(msg)
 
-        pmodel = None
+def warm_cache(csp, min_classical_gap=2.0, max_graph_size=8, cache=None, workers=None, executor=None):
+    """Build the penalty models that :func:`.stitch` needs for a constraint satisfaction problem.
 
-        if len(const) == 0:
-            # empty constraint
-            continue
+    A penalty model is built for each distinct shape of constraint, that is for each canonical
+    form, see :meth:`.Constraint.canonical`, not already in the cache. Filling a cache that has
+    a :obj:`.PenaltyModelStore` ahead of time lets later processes stitch problems with the same
+    shapes without building any penalty models.
 
-        # at the moment, penaltymodel-cache cannot handle 1-variable PMs, so
-        # we handle that case here
-        if min_classical_gap <= 2.0 and len(const) == 1 and max_graph_size >= 1:
-            bqm.update(_bqm_from_1sat(const))
-            continue
+    Args:
+        csp (:obj:`.ConstraintSatisfactionProblem`):
+            Constraint satisfaction problem.
 
-        # turn the configurations into a sampleset
-        samples_like = (list(configurations), const.variables)
+        min_classical_gap (float, optional, default=2.0):
+            Minimum energy gap, as for :func:`.stitch`.
 
-        for G in iter_complete_graphs(const.variables, max_graph_size + 1, aux):
+        max_graph_size (int, optional, default=8):
+            Maximum number of variables of each penalty model, as for :func:`.stitch`.
 
-            try:
-                pmodel, classical_gap = penaltymodel.get_penalty_model(
-                    samples_like,
-                    G,
-                    min_classical_gap=min_classical_gap
-                    )
-            except penaltymodel.ImpossiblePenaltyModel:
-                # not able to be built on this graph
-                continue
+        cache (:obj:`.PenaltyModelCache`, optional):
+            Cache to fill. Defaults to the cache used by :func:`.stitch`.
 
-            pmodel.change_vartype(csp.vartype, inplace=True)
+        workers (int, optional):
+            If given, the penalty models are built in parallel by a
+            :class:`~concurrent.futures.ProcessPoolExecutor` with this many worker processes.
 
-            if classical_gap >= min_classical_gap:
-                break
+        executor (:class:`~concurrent.futures.Executor`, optional):
+            Executor to build the penalty models in parallel with, instead of `workers`.
 
-        else:
-            msg = ("No penalty model can be built for constraint {}".format(const))
-            raise ImpossibleBQM(msg)
+    Returns:
+        int: Number of distinct shapes of constraint.
+
+    Examples:
+        This example fills a cache for multiplication circuits, which have three shapes of
+        constraint, the AND gate, the half adder and the full adder.
+
+        >>> cache = dwavebinarycsp.PenaltyModelCache()
+        >>> dwavebinarycsp.warm_cache(dwavebinarycsp.factories.multiplication_circuit(3), cache=cache)
+        3
+        >>> bqm = dwavebinarycsp.stitch(dwavebinarycsp.factories.multiplication_circuit(4), cache=cache)
+        >>> cache.misses
+        3
+
+    """
+    if cache is None:
+        cache = penalty_model_cache
+
+    def cached(const):
+        # whether stitch looks the constraint up in the cache, see _penalty_model
+        num_variables = len(const.variables)
+        if not 0 < num_variables <= max_graph_size or not _is_relabelable(const):
+            return False
+        return num_variables > 1 or min_classical_gap > 2.0
+
+    if workers is not None and executor is not None:
+        raise ValueError("only one of workers and executor can be given")
+
+    shapes = dict.fromkeys(const.canonical()[0] for const in csp.constraints if cached(const))
+
+    missing = object()
+    keys = [key for key in shapes if cache._get((key, min_classical_gap, max_graph_size), missing) is missing]
+
+    args = (keys, repeat(min_classical_gap), repeat(max_graph_size))
+    if workers is not None:
+        with ProcessPoolExecutor(workers) as pool:
+            models = list(pool.map(_build_penalty_model, *args))
+    elif executor is not None:
+        models = executor.map(_build_penalty_model, *args)
+    else:
+        models = map(_build_penalty_model, *args)
+
+    # in the order of the constraints, whichever model finishes first
+    for key, model in zip(keys, models):
+        cache._put((key, min_classical_gap, max_graph_size), model)
+
+    return len(shapes)
+
+
+def _penalty_model(const, vartype, min_classical_gap, max_graph_size, aux, cache=None):
+    """build a bqm for a single constraint, drawing auxiliary variable labels from aux
+
+    raises ImpossibleBQM if there is no penalty model within max_graph_size variables
+    """
+    model, labels, signs = _penalty_terms(const, min_classical_gap, max_graph_size, aux, cache)
+    return _relabel_terms(model, labels, signs).change_vartype(vartype, inplace=True)
+
+
+def _relabel_terms(model, labels, signs):
+    """the spin-valued bqm of (model, labels, signs), see _penalty_terms"""
+    linear = {labels[u]: signs[u] * bias for u, bias in model.linear.items()}
+    quadratic = {(labels[u], labels[v]): signs[u] * signs[v] * bias for (u, v), bias in model.quadratic.items()}
+
+    return dimod.BinaryQuadraticModel(linear, quadratic, model.offset, dimod.SPIN)
+
+
+def _classical_gap(bqm, const):
+    """the energy gap of a penalty model between its ground states and the states violating const"""
+    configurations = const.configurations  # built anew on every access
+
+    if not const.variables:
+        return float('inf') if configurations else 0.0
+
+    # minimized over the auxiliary variables
+    energies = {}
+    for sample, energy in dimod.ExactSolver().sample(bqm).data(['sample', 'energy']):
+        config = tuple(sample[v] for v in const.variables)
+        energies[config] = min(energy, energies.get(config, energy))
+
+    ground = min(energies.values())
+    return min((energy - ground for config, energy in energies.items()
+                if config not in configurations), default=float('inf'))
+
+
+def _penalty_terms(const, min_classical_gap, max_graph_size, aux, cache=None):
+    """the penalty model of a single constraint as (model, labels, signs)
+
+    model is a spin-valued bqm over 0..n-1, variable u of which is labels[u], with its spin
+    multiplied by signs[u]. Constraints of the same shape share the model.
+    """
+    if len(const.variables) > max_graph_size:
+        msg = ("The given csp contains a constraint {const} with {num_var} variables. "
+               "This cannot be mapped to a graph with {max_graph_size} nodes. "
+               "Consider checking whether your constraint is irreducible."
+               "").format(const=const, num_var=len(const.variables), max_graph_size=max_graph_size)
+        raise ImpossibleBQM(msg)
+
+    if len(const) == 0:
+        # empty constraint
+        return _EMPTY_MODEL, [], []
+
+    # at the moment, penaltymodel-cache cannot handle 1-variable PMs, so
+    # we handle that case here
+    if min_classical_gap <= 2.0 and len(const) == 1 and max_graph_size >= 1:
+        return _relabeled_terms(_bqm_from_1sat(const))
+
+    if cache is None or not _is_relabelable(const):
+        pmodel = _get_penalty_model((const.table.to_array(const.vartype), const.variables),
+                                    const.variables, min_classical_gap, max_graph_size, aux)
+        if pmodel is None:
+            raise ImpossibleBQM("No penalty model can be built for constraint {}".format(const))
+        return _relabeled_terms(pmodel)
+
+    key, mapping = const.canonical()
+    model = _canonical_penalty_model(key, min_classical_gap, max_graph_size, cache)
+    if model is None:
+        raise ImpossibleBQM("No penalty model can be built for constraint {}".format(const))
+
+    # draw the aux labels as iter_complete_graphs would, skipping the constraint's variables
+    labels = [v for v, _ in mapping]
+    for _ in range(len(model.variables) - len(labels)):
+        v = next(aux)
+        while v in const.variables:
+            v = next(aux)
+        labels.append(v)
+
+    # flipping a spin negates its linear bias and the quadratic biases it is part of
+    signs = [-1 if flipped else 1 for _, flipped in mapping] + [1] * (len(labels) - len(mapping))
+
+    return model, labels, signs
+
+
+_EMPTY_MODEL = dimod.BinaryQuadraticModel.empty(dimod.SPIN)
+
+
+def _relabeled_terms(pmodel):
+    # the terms of a penalty model built for the constraint itself, see _penalty_terms
+    labels = list(pmodel.variables)
+    model = pmodel.relabel_variables({v: u for u, v in enumerate(labels)}, inplace=False)
+    return model.change_vartype(dimod.SPIN, inplace=True), labels, [1] * len(labels)
+
+
+def _is_relabelable(const):
+    # repeated variables cannot be relabeled from the canonical form
+    return len(set(const.variables)) == len(const.variables)
+
+
+def _canonical_penalty_model(key, min_classical_gap, max_graph_size, cache):
+    """the penalty model of a canonical table, from the cache if possible, or None
+
+    the model is a spin-valued bqm over the columns of the key followed by the auxiliary variables
+    """
+    cache_key = (key, min_classical_gap, max_graph_size)
+
+    missing = object()
+    model = cache._get(cache_key, missing)
+    if model is missing:
+        model = _build_penalty_model(key, min_classical_gap, max_graph_size)
+        cache._put(cache_key, model)
+
+    return model
+
+
+def _build_penalty_model(key, min_classical_gap, max_graph_size):
+    """build the penalty model of a canonical table, or None, see _canonical_penalty_model
+
+    a module-level function so that it can be run in another process
+    """
+    num_variables = key.num_variables
+    model = _get_penalty_model((key.to_array(dimod.SPIN), range(num_variables)),
+                               num_variables, min_classical_gap, max_graph_size)
+    if model is not None:
+        model = model.change_vartype(dimod.SPIN, inplace=False)
+    return model
+
+
+def _get_penalty_model(samples_like, nodes, min_classical_gap, max_graph_size, aux=None):
+    """the penalty model on the smallest complete graph with the minimum classical gap, or None
+
+    the graphs start with nodes and add auxiliary nodes labeled from aux
+    """
+    for G in iter_complete_graphs(nodes, max_graph_size + 1, aux):
+
+        try:
+            pmodel, classical_gap = penaltymodel.get_penalty_model(
+                samples_like,
+                G,
+                min_classical_gap=min_classical_gap
+                )
+        except penaltymodel.ImpossiblePenaltyModel:
+            # not able to be built on this graph
+            continue
 
-        bqm.update(pmodel)
+        if classical_gap >= min_classical_gap:
+            return pmodel
 
-    return bqm
+    return None
 
 
 def _bqm_from_1sat(constraint):
@@ -186,15 +629,14 @@ def _bqm_from_1sat(constraint):
 
     bqm will have exactly classical gap 2.
     """
-    configurations = constraint.configurations
-    num_configurations = len(configurations)
+    table = constraint.table
 
     bqm = dimod.BinaryQuadraticModel.empty(dimod.SPIN)
 
-    if num_configurations == 1:
-        val, = next(iter(configurations))
+    if len(table) == 1:
+        row, = table
         v, = constraint.variables
-        bqm.add_variable(v, -1 if val > 0 else +1)
+        bqm.add_variable(v, -1 if row else +1)
     else:
         bqm.add_variables_from((v, 0.0) for v in constraint.variables)
 
@@ -0,0 +1,219 @@
+# Copyright 2018 D-Wave Systems Inc.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License");
+#    you may not use this file except in compliance with the License.
+#    You may obtain a copy of the License at
+#
+#        http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS,
+#    WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#    See the License for the specific language governing permissions and
+#    limitations under the License.
+
+"""
+A persistent store of penalty models, so that processes stitching constraints of the same
+shapes build each penalty model only once between them.
+"""
+import json
+import os
+import sqlite3
+import threading
+import time
+
+import dimod
+
+__all__ = ['PenaltyModelStore']
+
+
+# last_used is a counter, incremented on every write, rather than a time, which can repeat
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS penalty_models (
+    shape TEXT NOT NULL,
+    min_classical_gap REAL NOT NULL,
+    max_graph_size INTEGER NOT NULL,
+    model TEXT,
+    last_used INTEGER NOT NULL,
+    PRIMARY KEY (shape, min_classical_gap, max_graph_size)
+);
+CREATE INDEX IF NOT EXISTS penalty_models_last_used ON penalty_models (last_used);
+"""
+
+
+class PenaltyModelStore(object):
+    """Penalty models kept in an SQLite database file, shared between processes.
+
+    The store is used through a :class:`.PenaltyModelCache`, which consults it before building
+    a penalty model and saves every penalty model it builds to it. Any number of processes and
+    threads can read and write the same file at once. The database is in write-ahead logging
+    mode, so readers do not block the writer.
+
+    Args:
+        path (str):
+            Path of the database file, which is created if it does not exist.
+
+        max_entries (int, optional, default=100000):
+            Maximum number of penalty models to keep. When it is exceeded, the least recently
+            used penalty models are removed. Reading a penalty model that is among the most
+            recently used half does not update its recency, so that most reads do not write to
+            the database.
+
+        timeout (float, optional, default=30):
+            Time, in seconds, to wait for another process to release the database.
+
+    Examples:
+        This example saves the penalty models of a multiplication circuit to a file, where
+        another process could then use them.
+
+        >>> import os, tempfile
+        >>> path = os.path.join(tempfile.mkdtemp(), 'penaltymodels.db')
+        >>> store = dwavebinarycsp.PenaltyModelStore(path)
+        >>> csp = dwavebinarycsp.factories.multiplication_circuit(3)
+        >>> dwavebinarycsp.warm_cache(csp, cache=dwavebinarycsp.PenaltyModelCache(store=store))
+        3
+        >>> len(dwavebinarycsp.PenaltyModelStore(path))
+        3
+
+    """
+    def __init__(self, path, max_entries=100000, timeout=30.):
+        self.path = path
+        self.max_entries = max_entries
+        self.timeout = timeout
+
+        self._lock = threading.Lock()
+        self._connection = None
+        self._pid = None
+
+    def __getstate__(self):
+        # connections cannot be shared with other processes, each opens its own
+        return self.path, self.max_entries, self.timeout
+
+    def __setstate__(self, state):
+        self.__init__(*state)
+
+    def __len__(self):
+        with self._lock:
+            count, = self._connect().execute('SELECT COUNT(*) FROM penalty_models').fetchone()
+        return count
+
+    def _connect(self):
+        # one connection per process, opened on first use
+        if self._connection is None or self._pid != os.getpid():
+            connection = sqlite3.connect(self.path, timeout=self.timeout, isolation_level=None,
+                                         check_same_thread=False)
+            _setup(connection, self.timeout)
+            self._connection = connection
+            self._pid = os.getpid()
+        return self._connection
+
+    def get(self, key, default=None):
+        """Look up a penalty model.
+
+        Args:
+            key (tuple):
+                `(table, min_classical_gap, max_graph_size)` 3-tuple, where `table` is the
+                canonical :obj:`.ConfigurationTable` of the constraint.
+
+            default (optional):
+                Value returned if there is no penalty model for `key`.
+
+        Returns:
+            The penalty model, as a spin-valued :obj:`dimod.BinaryQuadraticModel` over the
+            columns of the table followed by the auxiliary variables, or None if no penalty
+            model could be built for `key`.
+
+        """
+        params = _encode_key(key)
+        with self._lock:
+            connection = self._connect()
+            row = connection.execute('SELECT model, last_used, (SELECT MAX(last_used) FROM penalty_models) '
+                                     'FROM penalty_models WHERE shape=? AND min_classical_gap=? '
+                                     'AND max_graph_size=?', params).fetchone()
+            if row is None:
+                return default
+            model, last_used, newest = row
+
+            # fewer than newest - last_used models were used more recently, so a model used
+            # recently enough is far from being removed and is not worth a write
+            if newest - last_used >= self.max_entries // 2:
+                connection.execute('UPDATE penalty_models SET last_used=(SELECT MAX(last_used) + 1 '
+                                   'FROM penalty_models) WHERE shape=? AND min_classical_gap=? '
+                                   'AND max_graph_size=?', params)
+        return _decode_model(model)
+
+    def put(self, key, model):
+        """Save a penalty model, removing the least recently used if the store is full.
+
+        Args:
+            key (tuple):
+                `(table, min_classical_gap, max_graph_size)` 3-tuple, as for :meth:`.get`.
+
+            model (:obj:`dimod.BinaryQuadraticModel`/None):
+                Spin-valued penalty model, or None if no penalty model could be built.
+
+        """
+        params = _encode_key(key) + (_encode_model(model),)
+        with self._lock:
+            connection = self._connect()
+            connection.execute('BEGIN IMMEDIATE')
+            try:
+                connection.execute('INSERT OR REPLACE INTO penalty_models VALUES (?, ?, ?, ?, '
+                                   '(SELECT COALESCE(MAX(last_used), 0) + 1 FROM penalty_models))', params)
+                connection.execute('DELETE FROM penalty_models WHERE rowid IN (SELECT rowid FROM penalty_models '
+                                   'ORDER BY last_used DESC LIMIT -1 OFFSET ?)', (self.max_entries,))
+            except BaseException:
+                connection.execute('ROLLBACK')
+                raise
+            connection.execute('COMMIT')
+
+    def clear(self):
+        """Remove all of the penalty models."""
+        with self._lock:
+            self._connect().execute('DELETE FROM penalty_models')
+
+    def close(self):
+        """Close this process's connection to the database. It is reopened if needed."""
+        with self._lock:
+            if self._connection is not None and self._pid == os.getpid():
+                self._connection.close()
+            self._connection = None
+
+
+def _setup(connection, timeout):
+    # switching to write-ahead logging fails at once, rather than waiting for the timeout, while
+    # another process is opening the same new file, so it is retried
+    deadline = time.monotonic() + timeout
+    while True:
+        try:
+            connection.execute('PRAGMA journal_mode=WAL')
+            connection.executescript(_SCHEMA)
+            return
+        except sqlite3.OperationalError:
+            if time.monotonic() >= deadline:
+                raise
+            time.sleep(.01)
+
+
+def _encode_key(key):
+    table, min_classical_gap, max_graph_size = key
+    shape = '{}:{}'.format(table.num_variables, ','.join(map(str, table.rows.tolist())))
+    return shape, float(min_classical_gap), int(max_graph_size)
+
+
+def _encode_model(model):
+    if model is None:
+        return None
+    return json.dumps({'linear': [[v, float(bias)] for v, bias in model.linear.items()],
+                       'quadratic': [[u, v, float(bias)] for (u, v), bias in model.quadratic.items()],
+                       'offset': float(model.offset)})
+
+
+def _decode_model(text):
+    if text is None:
+        return None
+    doc = json.loads(text)
+    return dimod.BinaryQuadraticModel({v: bias for v, bias in doc['linear']},
+                                      {(u, v): bias for u, v, bias in doc['quadratic']},
+                                      doc['offset'], dimod.SPIN)
@@ -14,3 +14,4 @@
 
 from dwavebinarycsp.core.constraint import *
 from dwavebinarycsp.core.csp import *
+from dwavebinarycsp.core.table import *
@@ -24,7 +24,9 @@ import itertools
 from collections.abc import Sized, Callable
 
 import dimod
+import numpy as np
 
+from dwavebinarycsp.core.table import ConfigurationTable, decode_rows, encode_rows, values_from_bits
 from dwavebinarycsp.exceptions import UnsatError
 
 __all__ = ['Constraint']
@@ -40,10 +42,17 @@ class Constraint(Sized):
         func (function):
             Function that returns True for configurations of variables that satisfy the
             constraint. Inputs to the function are ordered by :attr:`~Constraint.variables`.
+            If the constraint was not given a function, or has been fixed or flipped since,
+            this evaluates membership in :attr:`~Constraint.table`.
 
         configurations (frozenset[tuple]):
             Valid configurations of the variables. Each configuration is a tuple of variable
-            assignments ordered by :attr:`~Constraint.variables`.
+            assignments ordered by :attr:`~Constraint.variables`. Built from
+            :attr:`~Constraint.table` on each access.
+
+        table (:obj:`.ConfigurationTable`):
+            Bit-packed valid configurations of the variables, with columns ordered by
+            :attr:`~Constraint.variables`.
 
         vartype (:class:`dimod.Vartype`):
             Variable type for the constraint. Accepted input values:
@@ -93,7 +102,7 @@ class Constraint(Sized):
 
     """
 
-    __slots__ = ('vartype', 'variables', 'configurations', 'func', 'name')
+    __slots__ = ('vartype', 'variables', 'name', '_func', '_table')
 
     #
     # Construction
@@ -104,22 +113,35 @@ class Constraint(Sized):
 
         self.vartype = vartype  # checked by decorator
 
-        if not isinstance(func, Callable):
+        if func is not None and not isinstance(func, Callable):
             raise TypeError("expected input 'func' to be callable")
-        self.func = func
+        self._func = func
 
         self.variables = variables = tuple(variables)
         num_variables = len(variables)
 
-        if not isinstance(configurations, frozenset):
-            configurations = frozenset(tuple(config) for config in configurations)  # cast to tuples
-        if len(configurations) == 0 and num_variables > 0:
+        if configurations is None:
+            # lazy, the configurations are found from func when first needed
+            if func is None:
+                raise ValueError("a lazy constraint requires a function")
+            if not isinstance(func, _PartialFunction):
+                func = self._func = _PartialFunction(func, num_variables, vartype)
+            table = None
+        elif isinstance(configurations, ConfigurationTable):
+            if configurations.num_variables != num_variables:
+                raise ValueError("configuration table does not match the number of variables")
+            table = configurations
+        else:
+            if not isinstance(configurations, frozenset):
+                configurations = frozenset(tuple(config) for config in configurations)  # cast to tuples
+            if not all(len(config) == num_variables for config in configurations):
+                raise ValueError("all configurations should be of the same length")
+            if len(vartype.value.union(*configurations)) >= 3:
+                raise ValueError("configurations do not match vartype")
+            table = ConfigurationTable.from_configurations(configurations, num_variables)
+        if table is not None and len(table) == 0 and num_variables > 0:
             raise ValueError("constraint must have at least one feasible configuration")
-        if not all(len(config) == num_variables for config in configurations):
-            raise ValueError("all configurations should be of the same length")
-        if len(vartype.value.union(*configurations)) >= 3:
-            raise ValueError("configurations do not match vartype")
-        self.configurations = configurations
+        self._table = table
 
         if name is None:
             name = 'Constraint'
@@ -127,12 +149,14 @@ class Constraint(Sized):
 
     @classmethod
     @dimod.decorators.vartype_argument('vartype')
-    def from_func(cls, func, variables, vartype, name=None):
+    def from_func(cls, func, variables, vartype, name=None, vectorized=False, lazy=False):
         """Construct a constraint from a validation function.
 
         Args:
             func (function):
                 Function that evaluates True when the variables satisfy the constraint.
+                If `vectorized` is True, the function is given one array per variable and
+                returns a boolean array.
 
             variables (iterable):
                 Iterable of variable labels.
@@ -146,6 +170,21 @@ class Constraint(Sized):
             name (string, optional, default='Constraint'):
                 Name for the constraint.
 
+            vectorized (bool, optional, default=False):
+                If True, `func` is evaluated on chunks of the assignment space at once, with
+                each argument an array of values for the corresponding variable. This is much
+                faster than calling `func` once per assignment for constraints over many
+                variables.
+
+            lazy (bool, optional, default=False):
+                If True, the valid configurations are not enumerated until they are first
+                needed, for instance by :attr:`~Constraint.configurations`,
+                :meth:`~Constraint.projection` or :func:`.stitch`. Until then,
+                :meth:`~Constraint.check` evaluates `func` directly and
+                :meth:`~Constraint.fix_variable` and :meth:`~Constraint.flip_variable` are
+                applied to its arguments. An unsatisfiable lazy constraint raises
+                :exc:`.UnsatError` when its configurations are enumerated.
+
         Examples:
             This example creates a constraint that binary variables `a` and `b`
             are not equal.
@@ -173,14 +212,37 @@ class Constraint(Sized):
             >>> (1, -1) in const.configurations
             True
 
+            This example creates a constraint that exactly one of 16 binary variables is 1,
+            evaluating the function on arrays of assignments.
+
+            >>> def one_hot(*args):
+            ...     return sum(args) == 1
+            ...
+            >>> const = dwavebinarycsp.Constraint.from_func(
+            ...               one_hot, range(16), dwavebinarycsp.BINARY, vectorized=True)
+            >>> len(const.configurations)
+            16
+
+            This example creates a constraint over 30 binary variables without enumerating its
+            :math:`2^{30}` possible configurations, and fixes all but two of them.
+
+            >>> def parity(*args):
+            ...     return sum(args) % 2 == 0
+            ...
+            >>> const = dwavebinarycsp.Constraint.from_func(
+            ...               parity, range(30), dwavebinarycsp.BINARY, lazy=True)
+            >>> for v in range(28):
+            ...     const.fix_variable(v, 1)
+            >>> len(const.configurations)
+            2
+
         """
         variables = tuple(variables)
 
-        configurations = frozenset(config
-                                   for config in itertools.product(vartype.value, repeat=len(variables))
-                                   if func(*config))
+        if lazy:
+            return cls(_PartialFunction(func, len(variables), vartype, vectorized), None, variables, vartype, name)
 
-        return cls(func, configurations, variables, vartype, name)
+        return cls(func, _table_from_func(func, len(variables), vartype, vectorized), variables, vartype, name)
 
     @classmethod
     def from_configurations(cls, configurations, variables, vartype, name=None):
@@ -227,9 +289,45 @@ class Constraint(Sized):
             True
 
         """
-        def func(*args): return args in configurations
+        return cls(None, configurations, variables, vartype, name)
 
-        return cls(func, configurations, variables, vartype, name)
+    #
+    # Properties
+    #
+
+    @property
+    def func(self):
+        if self._func is not None:
+            return self._func
+        return self._evaluate
+
+    @property
+    def configurations(self):
+        return self.table.to_configurations(self.vartype)
+
+    @property
+    def table(self):
+        if self._table is None:
+            table = _table_from_func(self._func, len(self.variables), self.vartype,
+                                     vectorized=self._func.vectorized)
+            if len(table) == 0:
+                raise UnsatError("constraint {} is unsatisfiable".format(self.name))
+            self._table = table
+        return self._table
+
+    def _evaluate(self, *args):
+        row = _encode(args, self.vartype)
+        return row is not None and row in self._table
+
+    def _set_table(self, table):
+        # replace the configuration table, for instance by a subset of its rows found by a
+        # preprocessing pass. The function describes the old table, so it is dropped
+        if table.num_variables != len(self.variables):
+            raise ValueError("configuration table does not match the number of variables")
+        if len(table) == 0 and self.variables:
+            raise UnsatError("constraint {} is unsatisfiable".format(self.name))
+        self._table = table
+        self._func = None
 
     #
     # Special Methods
@@ -246,14 +344,16 @@ class Constraint(Sized):
                                                                               self.name)
 
     def __eq__(self, constraint):
-        return self.variables == constraint.variables and self.configurations == constraint.configurations
+        return (self.variables == constraint.variables and
+                (not self.variables or self.vartype is constraint.vartype) and
+                self.table == constraint.table)
 
     def __ne__(self, constraint):
         return not self.__eq__(constraint)
 
     def __hash__(self):
         # uniquely defined by configurations/variables
-        return hash((self.configurations, self.variables))
+        return hash((self.table, self.variables))
 
     def __or__(self, const):
         if not isinstance(const, Constraint):
@@ -262,28 +362,10 @@ class Constraint(Sized):
         if const and self and self.vartype is not const.vartype:
             raise ValueError("operand | only meaningful for Constraints with matching vartype")
 
-        shared_variables = set(self.variables).intersection(const.variables)
-
-        # dev note: if they share all variables, we could just act on the configurations
-
-        if not shared_variables:
-            # in this case we just append
-            variables = self.variables + const.variables
-
-            n = len(self)  # need to know how to divide up the variables
-
-            def union(*args):
-                return self.func(*args[:n]) or const.func(*args[n:])
-
-            return self.from_func(union, variables, self.vartype, name='{} | {}'.format(self.name, const.name))
-
-        variables = self.variables + tuple(v for v in const.variables if v not in shared_variables)
-
-        def union(*args):
-            solution = dict(zip(variables, args))
-            return self.check(solution) or const.check(solution)
+        variables, on = self._combined_variables(const)
+        table = self.table.union(const.table, on)
 
-        return self.from_func(union, variables, self.vartype, name='{} | {}'.format(self.name, const.name))
+        return self.__class__(None, table, variables, self.vartype, name='{} | {}'.format(self.name, const.name))
 
     def __and__(self, const):
         if not isinstance(const, Constraint):
@@ -292,29 +374,18 @@ class Constraint(Sized):
         if const and self and self.vartype is not const.vartype:
             raise ValueError("operand & only meaningful for Constraints with matching vartype")
 
-        shared_variables = set(self.variables).intersection(const.variables)
+        variables, on = self._combined_variables(const)
+        table = self.table.join(const.table, on)
 
-        # dev note: if they share all variables, we could just act on the configurations
-        name = '{} & {}'.format(self.name, const.name)
+        return self.__class__(None, table, variables, self.vartype, name='{} & {}'.format(self.name, const.name))
 
-        if not shared_variables:
-            # in this case we just append
-            variables = self.variables + const.variables
-
-            n = len(self)  # need to know how to divide up the variables
-
-            def intersection(*args):
-                return self.func(*args[:n]) and const.func(*args[n:])
-
-            return self.from_func(intersection, variables, self.vartype, name=name)
-
-        variables = self.variables + tuple(v for v in const.variables if v not in shared_variables)
-
-        def intersection(*args):
-            solution = dict(zip(variables, args))
-            return self.check(solution) and const.check(solution)
-
-        return self.from_func(intersection, variables, self.vartype, name=name)
+    def _combined_variables(self, const):
+        # any variables shared with const keep their position in self, the rest of const's
+        # variables are appended
+        index = {v: idx for idx, v in enumerate(self.variables)}
+        on = [(index[v], idx) for idx, v in enumerate(const.variables) if v in index]
+        variables = self.variables + tuple(v for v in const.variables if v not in index)
+        return variables, on
 
     #
     # verification
@@ -345,7 +416,52 @@ class Constraint(Sized):
             True
 
         """
-        return self.func(*(solution[v] for v in self.variables))
+        if self._table is None:
+            return self._func(*(solution[v] for v in self.variables))
+        row = _encode((solution[v] for v in self.variables), self.vartype)
+        return row is not None and row in self._table
+
+    def check_samples(self, samples_like):
+        """Check which of a collection of samples satisfy the constraint.
+
+        Args:
+            samples_like (samples_like):
+                A collection of samples, for example a :class:`dimod.SampleSet`, a 2-D array
+                with a list of labels, or a list of dicts. See :func:`dimod.as_samples`. Each
+                sample must assign values to all of the constraint's variables.
+
+        Returns:
+            :class:`numpy.ndarray`: Boolean array with one entry per sample, True where the
+            sample satisfies the constraint.
+
+        Examples:
+            This example creates a constraint that :math:`a \\ne b` on binary variables
+            and tests three candidate solutions at once, with additional unconstrained
+            variable c.
+
+            >>> const = dwavebinarycsp.Constraint.from_configurations([(0, 1), (1, 0)],
+            ...             ['a', 'b'], dwavebinarycsp.BINARY)
+            >>> const.check_samples(([[1, 1, 0], [1, 0, 0], [0, 1, 1]], ['a', 'b', 'c']))
+            array([False,  True,  True])
+
+        """
+        samples, labels = dimod.as_samples(samples_like)
+        return self._check_array(samples, {v: idx for idx, v in enumerate(labels)})
+
+    def _check_array(self, samples, index):
+        # samples is a 2-D array with the column of each variable given by index
+        columns = [index[v] for v in self.variables]
+
+        if self._table is None:
+            func = self._func
+            if func.vectorized:
+                return np.broadcast_to(np.asarray(func(*samples[:, columns].T), dtype=bool), samples.shape[:1])
+            return np.fromiter((func(*sample) for sample in samples[:, columns].tolist()),
+                               dtype=bool, count=samples.shape[0])
+
+        values = samples[:, columns]
+        satisfied = self._table.contains(encode_rows(values > 0))
+        return satisfied & np.isin(values, list(self.vartype.value)).all(axis=1)
 
     #
     # transformation
@@ -384,20 +500,19 @@ class Constraint(Sized):
         if value not in self.vartype.value:
             raise ValueError("expected value to be in {}, received {} instead".format(self.vartype.value, value))
 
-        configurations = frozenset(config[:idx] + config[idx + 1:]  # exclude the fixed var
-                                   for config in self.configurations
-                                   if config[idx] == value)
+        if self._table is None:
+            # stay lazy, the check for satisfiability is deferred
+            self._func = self._func.fix(idx, value)
+        else:
+            table = self._table.fix(idx, int(value > 0))
 
-        if not configurations:
-            raise UnsatError("fixing {} to {} makes this constraint unsatisfiable".format(v, value))
+            if not table:
+                raise UnsatError("fixing {} to {} makes this constraint unsatisfiable".format(v, value))
 
-        variables = variables[:idx] + variables[idx + 1:]
+            self._table = table
+            self._func = None
 
-        self.configurations = configurations
-        self.variables = variables
-
-        def func(*args): return args in configurations
-        self.func = func
+        self.variables = variables[:idx] + variables[idx + 1:]
 
         self.name = '{} ({} fixed to {})'.format(self.name, v, value)
 
@@ -429,35 +544,66 @@ class Constraint(Sized):
         except ValueError:
             raise ValueError("variable {} is not a variable in constraint {}".format(v, self.name))
 
-        if self.vartype is dimod.BINARY:
+        if self._table is None:
+            self._func = self._func.flip(idx)
+        else:
+            self._table = self._table.flip([idx])
+            self._func = None
 
-            original_func = self.func
+        self.name = '{} ({} flipped)'.format(self.name, v)
+
+    @dimod.decorators.vartype_argument('vartype')
+    def change_vartype(self, vartype, inplace=True):
+        """Change the variable type of the constraint.
 
-            def func(*args):
-                new_args = list(args)
-                new_args[idx] = 1 - new_args[idx]  # negate v
-                return original_func(*new_args)
+        Configurations are mapped between vartypes by mapping each variable's value, so that
+        0 in :attr:`~dimod.Vartype.BINARY` corresponds to -1 in :attr:`~dimod.Vartype.SPIN` and
+        1 corresponds to +1. The configuration table does not depend on the vartype, so
+        conversion does not enumerate the configurations.
 
-            self.func = func
+        Args:
+            vartype (:class:`~dimod.Vartype`/str/set):
+                Variable type for the constraint. Accepted input values:
 
-            self.configurations = frozenset(config[:idx] + (1 - config[idx],) + config[idx + 1:]
-                                            for config in self.configurations)
+                * :attr:`~dimod.Vartype.SPIN`, ``'SPIN'``, ``{-1, 1}``
+                * :attr:`~dimod.Vartype.BINARY`, ``'BINARY'``, ``{0, 1}``
 
-        else:  # SPIN
+            inplace (bool, optional, default=True):
+                If True, the constraint is updated in-place; otherwise, a new constraint is
+                returned.
 
-            original_func = self.func
+        Returns:
+            :obj:`.Constraint`: A constraint with the specified vartype.
 
-            def func(*args):
-                new_args = list(args)
-                new_args[idx] = -new_args[idx]  # negate v
-                return original_func(*new_args)
+        Examples:
+            This example converts a binary-valued constraint that :math:`a \\ne b` to spin
+            variables.
 
-            self.func = func
+            >>> const = dwavebinarycsp.Constraint.from_configurations([(0, 1), (1, 0)],
+            ...             ['a', 'b'], dwavebinarycsp.BINARY)
+            >>> spin = const.change_vartype(dwavebinarycsp.SPIN, inplace=False)
+            >>> sorted(spin.configurations)
+            [(-1, 1), (1, -1)]
+            >>> const.vartype is dwavebinarycsp.BINARY
+            True
 
-            self.configurations = frozenset(config[:idx] + (-config[idx],) + config[idx + 1:]
-                                            for config in self.configurations)
+        """
+        if not inplace:
+            return self.copy().change_vartype(vartype, inplace=True)
 
-        self.name = '{} ({} flipped)'.format(self.name, v)
+        if vartype is self.vartype:
+            return self
+
+        if self._table is None:
+            # stay lazy, converting the arguments before they are given to the function
+            self._func = self._func.change_vartype(vartype)
+        else:
+            # the function is specific to the old vartype, so evaluate the table instead
+            self._func = None
+
+        self.vartype = vartype
+
+        return self
 
     #
     # copies and projections
@@ -481,7 +627,7 @@ class Constraint(Sized):
 
         """
         # each object is itself immutable (except the function)
-        return self.__class__(self.func, self.configurations, self.variables, self.vartype, name=self.name)
+        return self.__class__(self._func, self._table, self.variables, self.vartype, name=self.name)
 
     def projection(self, variables):
         """Create a new constraint that is the projection onto a subset of the variables.
@@ -513,7 +659,129 @@ class Constraint(Sized):
 
         idxs = [i for i, v in enumerate(self.variables) if v in variables]
 
-        configurations = frozenset(tuple(config[i] for i in idxs) for config in self.configurations)
         variables = tuple(self.variables[i] for i in idxs)
 
-        return self.from_configurations(configurations, variables, self.vartype)
+        return self.__class__(None, self.table.take(idxs), variables, self.vartype)
+
+    def canonical(self):
+        """Find a label-free canonical form of the constraint.
+
+        Constraints whose valid configurations are the same up to relabeling, reordering and
+        flipping of their variables have the same canonical key, whatever the labels of their
+        variables. The canonical form is cached on the constraint's
+        :attr:`~Constraint.table`, which is shared by copies of the constraint.
+
+        Returns:
+            tuple: A 2-tuple of
+
+            * the canonical key, a hashable :obj:`.ConfigurationTable`. The key does not
+              depend on the vartype of the constraint.
+            * the mapping back to the constraint, a tuple of `(variable, flipped)` pairs, one
+              for each column of the key, where `flipped` is True if the column is the
+              complement of the variable.
+
+        Examples:
+            This example shows that AND gates on different wires share a canonical key, and
+            that an OR gate is an AND gate with all of its variables flipped.
+
+            >>> import dwavebinarycsp.factories.constraint.gates as gates
+            >>> and1, mapping1 = gates.and_gate(['a', 'b', 'c']).canonical()
+            >>> and2, mapping2 = gates.and_gate(['x', 'y', 'z']).canonical()
+            >>> and1 == and2
+            True
+            >>> mapping2
+            (('x', False), ('y', False), ('z', False))
+            >>> or_, mapping = gates.or_gate(['a', 'b', 'c']).canonical()
+            >>> or_ == and1
+            True
+            >>> mapping
+            (('a', True), ('b', True), ('c', True))
+
+        """
+        key, columns, flips = self.table.canonical()
+        return key, tuple((self.variables[col], flipped) for col, flipped in zip(columns, flips))
+
+
+class _PartialFunction(object):
+    # a function with some of its arguments fixed and some flipped, fixing and flipping return a
+    # new object and the wrapped function is called directly however many have been applied
+
+    __slots__ = ('func', 'vartype', 'input_vartype', 'vectorized', 'arguments', 'free', 'flipped')
+
+    def __init__(self, func, num_variables, vartype, vectorized=False):
+        self.func = func
+        self.vartype = vartype
+        self.input_vartype = vartype  # the vartype of the values given to __call__
+        self.vectorized = vectorized
+        self.arguments = (None,) * num_variables  # the fixed values, by position in func
+        self.free = tuple(range(num_variables))  # the position in func of each remaining argument
+        self.flipped = frozenset()  # the positions in func that are flipped
+
+    def __call__(self, *args):
+        arguments = list(self.arguments)
+        for pos, value in zip(self.free, args):
+            arguments[pos] = self._convert(value)
+        for pos in self.flipped:
+            arguments[pos] = -arguments[pos] if self.vartype is dimod.SPIN else 1 - arguments[pos]
+        return self.func(*arguments)
+
+    def _replace(self, **kwargs):
+        new = object.__new__(type(self))
+        for attr in self.__slots__:
+            setattr(new, attr, kwargs.get(attr, getattr(self, attr)))
+        return new
+
+    def _convert(self, value):
+        if self.input_vartype is self.vartype:
+            return value
+        elif self.vartype is dimod.SPIN:
+            return 2 * value - 1
+        else:
+            return (value + 1) // 2
+
+    def fix(self, idx, value):
+        pos = self.free[idx]
+        arguments = self.arguments[:pos] + (self._convert(value),) + self.arguments[pos + 1:]
+        return self._replace(arguments=arguments, free=self.free[:idx] + self.free[idx + 1:])
+
+    def flip(self, idx):
+        return self._replace(flipped=self.flipped.symmetric_difference([self.free[idx]]))
+
+    def change_vartype(self, vartype):
+        return self._replace(input_vartype=vartype)
+
+
+def _table_from_func(func, num_variables, vartype, vectorized=False):
+    if vectorized:
+        return _vectorized_table(func, num_variables, vartype)
+
+    # with the values sorted, the product is in the same order as the encoded rows
+    values = sorted(vartype.value)
+    return ConfigurationTable.from_mask([bool(func(*config))
+                                         for config in itertools.product(values, repeat=num_variables)])
+
+
+def _vectorized_table(func, num_variables, vartype, chunk_size=1 << 16):
+    # build the table by evaluating func on chunks of the assignment space
+    feasible = []
+    for start in range(0, 1 << num_variables, chunk_size):
+        rows = np.arange(start, min(start + chunk_size, 1 << num_variables), dtype=np.uint64)
+        values = values_from_bits(decode_rows(rows, num_variables), vartype)
+
+        mask = np.broadcast_to(np.asarray(func(*values.T), dtype=bool), rows.shape)
+        feasible.append(rows[mask])
+
+    return ConfigurationTable(np.concatenate(feasible), num_variables)
+
+
+def _encode(values, vartype):
+    # encode an assignment as a row of a ConfigurationTable, or None if a value is not of vartype
+    domain = vartype.value
+    row = 0
+    for value in values:
+        if value not in domain:
+            return None
+        row <<= 1
+        if value > 0:
+            row |= 1
+    return row
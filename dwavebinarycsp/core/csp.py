@@ -19,12 +19,17 @@ The :class:`ConstraintSatisfactionProblem` class aggregates all constraints and
 defined for a problem and provides functionality to assist in problem solution, such
 as verifying whether a candidate solution satisfies the constraints.
 """
-from collections import defaultdict
-from collections.abc import Callable, Iterable
+import functools
+
+from collections import defaultdict, deque
+from collections.abc import Callable, Iterable, Sequence
 
 import dimod
+import numpy as np
 
 from dwavebinarycsp.core.constraint import Constraint
+from dwavebinarycsp.core.table import encode_rows, row_dtype
+from dwavebinarycsp.exceptions import UnsatError
 
 
 class ConstraintSatisfactionProblem(object):
@@ -42,9 +47,11 @@ class ConstraintSatisfactionProblem(object):
             Constraints that together constitute the constraint satisfaction problem. Valid solutions
             satisfy all of the constraints.
 
-        variables (dict[variable, list[:obj:`.Constraint`]]):
+        variables (dict[variable, sequence[:obj:`.Constraint`]]):
             Variables of the constraint satisfaction problem as a dict, where keys are the variables
-            and values a list of all of constraints associated with the variable.
+            and values a read-only sequence of all of constraints associated with the variable,
+            in the order they were added. The sequences can be indexed and compare equal to
+            lists of the same constraints.
 
         vartype (:class:`dimod.Vartype`):
             Enumeration of valid variable types. Supported values are :attr:`~dimod.Vartype.SPIN`
@@ -66,11 +73,36 @@ class ConstraintSatisfactionProblem(object):
     @dimod.decorators.vartype_argument('vartype')
     def __init__(self, vartype):
         self.vartype = vartype
-        self.constraints = []
-        self.variables = defaultdict(list)
+
+        # the constraints are stored by slot, a number assigned when they are added, so that one
+        # can be removed or replaced in O(1) without disturbing the order of the others
+        self._constraints = {}  # slot -> constraint
+        self._slots = {}  # id of a constraint -> slot
+        self._num_slots = 0
+
+        self.variables = defaultdict(functools.partial(_ConstraintSet, self._constraints))
+
+        # check_samples interns each variable label to a dense integer index the first time it
+        # sees it, and evaluates the constraints over arrays of these indices
+        self._labels = []
+        self._label_index = {}
+        self._compiled = None
+
+        # ids of the constraints that no copy of the constraint satisfaction problem shares, the
+        # others are copied before they are modified
+        self._owned = set()
 
     def __len__(self):
-        return self.constraints.__len__()
+        return self._constraints.__len__()
+
+    @property
+    def constraints(self):
+        """list[:obj:`.Constraint`]: Constraints in the order they were added.
+
+        A new list is returned on each access, so modifying it does not change the constraint
+        satisfaction problem. Use :meth:`.add_constraint` and :meth:`.remove_constraint` instead.
+        """
+        return list(self._constraints.values())
 
     def add_constraint(self, constraint, variables=tuple()):
         """Add a constraint.
@@ -89,6 +121,11 @@ class ConstraintSatisfactionProblem(object):
                 Variables associated with the constraint. Not required when `constraint` is
                 a :obj:`.Constraint` object.
 
+        Raises:
+            ValueError: If `constraint` is a :obj:`.Constraint` object that is already part of
+                the constraint satisfaction problem. Earlier versions added it a second time;
+                add a copy, see :meth:`.Constraint.copy`, for a constraint that is counted twice.
+
         Examples:
             This example defines a function that evaluates True when the constraint is satisfied.
             The function's input arguments match the order and type of the `variables` argument.
@@ -132,9 +169,17 @@ class ConstraintSatisfactionProblem(object):
         else:
             raise TypeError("Unknown constraint type given")
 
-        self.constraints.append(constraint)
+        if id(constraint) in self._slots:
+            raise ValueError("given constraint is already part of the constraint satisfaction problem")
+
+        slot = self._num_slots
+        self._num_slots += 1
+        self._constraints[slot] = constraint
+        self._slots[id(constraint)] = slot
+        self._owned.add(id(constraint))
+
         for v in constraint.variables:
-            self.variables[v].append(constraint)
+            self.variables[v].slots[slot] = None
 
     def add_variable(self, v):
         """Add a variable.
@@ -161,6 +206,161 @@ class ConstraintSatisfactionProblem(object):
         """
         self.variables[v]  # because defaultdict will create it if it's not there
 
+    def remove_constraint(self, constraint):
+        """Remove a constraint.
+
+        The variables of the constraint remain in the constraint satisfaction problem, as if they
+        had been added with :meth:`.add_variable`.
+
+        Args:
+            constraint (:obj:`.Constraint`):
+                Constraint in the constraint satisfaction problem. Constraints are matched by
+                identity, not by equality.
+
+        Raises:
+            ValueError: If the constraint is not part of the constraint satisfaction problem.
+
+        Examples:
+            This example removes the first of two constraints, :math:`a = b` and
+            :math:`b \\ne c`.
+
+            >>> import operator
+            >>> csp = dwavebinarycsp.ConstraintSatisfactionProblem(dwavebinarycsp.BINARY)
+            >>> csp.add_constraint(operator.eq, ['a', 'b'])
+            >>> csp.add_constraint(operator.ne, ['b', 'c'])
+            >>> csp.remove_constraint(csp.constraints[0])
+            >>> csp.check({'a': 0, 'b': 1, 'c': 0})
+            True
+            >>> sorted(csp.variables)
+            ['a', 'b', 'c']
+
+        """
+        if id(constraint) not in self._slots:
+            raise ValueError("given constraint is not part of the constraint satisfaction problem")
+        self._remove(self._slots[id(constraint)])
+
+    def discard_constraint(self, constraint):
+        """Remove a constraint if it is part of the constraint satisfaction problem.
+
+        Args:
+            constraint (:obj:`.Constraint`):
+                Constraint to remove. Constraints are matched by identity, not by equality.
+
+        """
+        if id(constraint) in self._slots:
+            self._remove(self._slots[id(constraint)])
+
+    def _remove(self, slot):
+        const = self._constraints.pop(slot)
+        del self._slots[id(const)]
+        self._owned.discard(id(const))
+
+        for v in const.variables:
+            if v in self.variables:
+                self.variables[v].slots.pop(slot, None)
+
+    def _intern(self, v):
+        # the integer index of variable label v, assigning the next free index if it is new
+        try:
+            return self._label_index[v]
+        except KeyError:
+            idx = self._label_index[v] = len(self._labels)
+            self._labels.append(v)
+            return idx
+
+    def copy(self):
+        """Create a copy of the constraint satisfaction problem.
+
+        The copy shares its constraints with the original until one of them is modified through
+        a method of either, such as :meth:`.fix_variable`, at which point that constraint alone
+        is copied. Copying is therefore cheap even for large problems, and each copy can be
+        fixed independently. Constraints modified directly, for example with
+        :meth:`.Constraint.fix_variable`, are not copied first.
+
+        Returns:
+            :obj:`.ConstraintSatisfactionProblem`: A copy that can be modified without changing
+            the original.
+
+        Examples:
+            This example fixes an input of a copy of a half adder, leaving the original
+            unchanged.
+
+            >>> csp = dwavebinarycsp.ConstraintSatisfactionProblem(dwavebinarycsp.BINARY)
+            >>> csp.add_constraint(dwavebinarycsp.factories.halfadder_gate(['a', 'b', 's', 'c']))
+            >>> variant = csp.copy()
+            >>> variant.fix_variable('a', 1)
+            >>> variant.constraints[0].variables
+            ('b', 's', 'c')
+            >>> csp.constraints[0].variables
+            ('a', 'b', 's', 'c')
+
+        """
+        csp = type(self)(self.vartype)
+        csp._constraints.update(self._constraints)  # the variables refer to this dict
+        csp._slots = dict(self._slots)
+        csp._num_slots = self._num_slots
+        for v, constraints in self.variables.items():
+            csp.variables[v].slots.update(constraints.slots)
+
+        csp._labels = list(self._labels)
+        csp._label_index = dict(self._label_index)
+        csp._compiled = self._compiled  # immutable and keyed by the constraints themselves
+
+        # every constraint is now shared
+        self._owned = set()
+
+        return csp
+
+    def _copy_on_write(self, slot):
+        # the constraint in slot, copied first if it is shared with a copy of the problem. The
+        # variables refer to the slot, so they need no change
+        const = self._constraints[slot]
+        if id(const) in self._owned:
+            return const
+
+        copy = self._constraints[slot] = const.copy()
+        del self._slots[id(const)]
+        self._slots[id(copy)] = slot
+        self._owned.add(id(copy))
+        return copy
+
+    def _copy_shared(self):
+        # copy all of the shared constraints, for passes that may modify any of them
+        for slot in list(self._constraints):
+            self._copy_on_write(slot)
+
+    def _compile(self):
+        # Group the constraints by table so that each group can be checked with a single
+        # lookup. The result is reused until a constraint is added, replaced or changed. Tuples
+        # compare their items by identity first, so the signature check is cheap.
+        signature = [(const, const.variables, const._table) for const in self._constraints.values()]
+
+        compiled = self._compiled
+        if compiled is not None and compiled[0] == signature:
+            return compiled[1]
+
+        intern = self._intern
+        tables = {}
+        lazy = []
+        for pos, const in enumerate(self._constraints.values()):
+            indices = [intern(v) for v in const.variables]
+            if const._table is None:
+                lazy.append((pos, const, np.asarray(indices, dtype=np.intp)))
+            else:
+                group = tables.setdefault(id(const._table), (const._table, [], []))
+                group[1].append(indices)
+                group[2].append(pos)
+
+        groups = [(table, np.asarray(indices, dtype=np.intp).reshape(len(positions), table.num_variables),
+                   np.asarray(positions, dtype=np.intp))
+                  for table, indices, positions in tables.values()]
+
+        arrays = [group[1] for group in groups] + [indices for _, _, indices in lazy]
+        needed = np.unique(np.concatenate([a.ravel() for a in arrays])) if arrays else np.empty(0, dtype=np.intp)
+
+        self._compiled = signature, (groups, lazy, needed)
+        return groups, lazy, needed
+
     def check(self, solution):
         """Check that a solution satisfies all of the constraints.
 
@@ -185,11 +385,197 @@ class ConstraintSatisfactionProblem(object):
             True
 
         """
-        return all(constraint.check(solution) for constraint in self.constraints)
+        return all(constraint.check(solution) for constraint in self._constraints.values())
+
+    def check_samples(self, samples_like, return_violations=False):
+        """Check which of a collection of samples satisfy all of the constraints.
+
+        Args:
+            samples_like (samples_like):
+                A collection of samples, for example a :class:`dimod.SampleSet`, a 2-D array
+                with a list of labels, or a list of dicts. See :func:`dimod.as_samples`.
+
+            return_violations (bool, optional, default=False):
+                If True, also return which constraints each sample violates.
+
+        Returns:
+            :class:`numpy.ndarray`/tuple: Boolean array with one entry per sample, True where
+            the sample satisfies all of the constraints. If `return_violations` is True, a
+            2-tuple of that array and a boolean array of shape (num_samples, num_constraints),
+            True where the sample violates the constraint in the corresponding position of
+            :attr:`~.ConstraintSatisfactionProblem.constraints`. Summing the latter over
+            either axis gives violation counts per sample or per constraint.
+
+        Examples:
+            This example creates a binary-valued constraint satisfaction problem with two
+            constraints, :math:`a = b` and :math:`b \\ne c`, and filters a sample set.
+
+            >>> import operator
+            >>> import dimod
+            >>> csp = dwavebinarycsp.ConstraintSatisfactionProblem(dwavebinarycsp.BINARY)
+            >>> csp.add_constraint(operator.eq, ['a', 'b'])
+            >>> csp.add_constraint(operator.ne, ['b', 'c'])
+            >>> sampleset = dimod.SampleSet.from_samples(([[1, 1, 0], [1, 0, 0]], 'abc'),
+            ...                                          dwavebinarycsp.BINARY, energy=[0, 0])
+            >>> feasible, violations = csp.check_samples(sampleset, return_violations=True)
+            >>> feasible
+            array([ True, False])
+            >>> violations.sum(axis=1)
+            array([0, 2])
+
+        """
+        samples, labels = dimod.as_samples(samples_like)
+        index = {v: idx for idx, v in enumerate(labels)}
+
+        groups, lazy, needed = self._compile()
+
+        # the column of samples holding each interned variable
+        columns = np.zeros(len(self._labels), dtype=np.intp)
+        columns[needed] = [index[self._labels[idx]] for idx in needed.tolist()]
+
+        # work with one row per variable and one column per sample, so that the rows for a
+        # group of constraints are gathered from contiguous memory
+        bits = np.ascontiguousarray((samples > 0).T)
+        num_samples = samples.shape[0]
+
+        # values that are not of the vartype satisfy no constraint
+        valid = np.isin(samples, list(self.vartype.value))
+        valid = None if valid.all() else np.ascontiguousarray(valid.T)
+
+        satisfied = np.empty((len(self), num_samples), dtype=bool)
+
+        for table, indices, positions in groups:
+            num_constraints, num_variables = indices.shape
+            if row_dtype(num_variables) is object:
+                rows = encode_rows(bits[columns[indices]].transpose(0, 2, 1).reshape(-1, num_variables))
+                rows = rows.reshape(num_constraints, num_samples)
+            else:
+                # build the rows one column at a time, (num_constraints, num_samples)
+                rows = np.zeros((num_constraints, num_samples), dtype=np.uint64)
+                for col in columns[indices].T:
+                    rows <<= np.uint64(1)
+                    rows |= bits[col]
+            satisfied[positions] = table.contains(rows)
+            if valid is not None:
+                satisfied[positions] &= valid[columns[indices]].all(axis=1)
+
+        for pos, const, _ in lazy:
+            satisfied[pos] = const._check_array(samples, index)
+
+        if return_violations:
+            return satisfied.all(axis=0), ~satisfied.T
+        return satisfied.all(axis=0)
+
+    def components(self):
+        """Split the constraint satisfaction problem into its connected components.
+
+        Two variables are connected if they appear in a common constraint. The components share
+        no variables, so they can be compiled, solved and checked independently, and their
+        results combined with :func:`.merge_bqms` or :func:`.merge_assignments`.
+
+        Returns:
+            list[:obj:`.ConstraintSatisfactionProblem`]: One constraint satisfaction problem per
+            connected component, each with copies of its constraints. Variables without
+            constraints are components of their own.
+
+        Examples:
+            This example splits a constraint satisfaction problem with two independent parts.
+
+            >>> import operator
+            >>> csp = dwavebinarycsp.ConstraintSatisfactionProblem(dwavebinarycsp.BINARY)
+            >>> csp.add_constraint(operator.eq, ['a', 'b'])
+            >>> csp.add_constraint(operator.ne, ['c', 'd'])
+            >>> csp.add_constraint(operator.eq, ['b', 'e'])
+            >>> [sorted(component.variables) for component in csp.components()]
+            [['a', 'b', 'e'], ['c', 'd']]
+
+        """
+        # union-find over the variables, with path halving
+        parent = {v: v for v in self.variables}
+
+        def find(v):
+            while parent[v] != v:
+                parent[v] = v = parent[parent[v]]
+            return v
+
+        for const in self._constraints.values():
+            root = find(const.variables[0]) if const.variables else None
+            for v in const.variables[1:]:
+                other = find(v)
+                if other != root:
+                    parent[other] = root
+
+        # build the components in the order their first variable appears
+        components = {}
+        for v in self.variables:
+            root = find(v)
+            if root not in components:
+                components[root] = type(self)(self.vartype)
+            components[root].add_variable(v)
+
+        for const in self._constraints.values():
+            if const.variables:
+                components[find(const.variables[0])].add_constraint(const.copy())
+
+        return list(components.values())
+
+    def count_solutions(self, order='min-fill'):
+        """Count the solutions of the constraint satisfaction problem by variable elimination.
+
+        Args:
+            order (list/str, optional, default='min-fill'):
+                Elimination order as a list of all of the variables, or the heuristic,
+                'min-fill' or 'min-degree', used to find one.
+
+        Returns:
+            int: Number of assignments of the variables that satisfy all of the constraints.
+
+        Examples:
+            This example counts the solutions of a constraint satisfaction problem with two
+            constraints, :math:`a = b` and :math:`b \\ne c`, and a fourth, unconstrained
+            variable.
+
+            >>> import operator
+            >>> csp = dwavebinarycsp.ConstraintSatisfactionProblem(dwavebinarycsp.BINARY)
+            >>> csp.add_constraint(operator.eq, ['a', 'b'])
+            >>> csp.add_constraint(operator.ne, ['b', 'c'])
+            >>> csp.add_variable('d')
+            >>> csp.count_solutions()
+            4
+
+        """
+        from dwavebinarycsp.solvers.elimination import count_solutions
+        return count_solutions(self, order=order)
+
+    def iter_solutions(self, order='min-fill'):
+        """Iterate over the solutions of the constraint satisfaction problem.
+
+        The solutions are found by variable elimination, without backtracking.
+
+        Args:
+            order (list/str, optional, default='min-fill'):
+                Elimination order as a list of all of the variables, or the heuristic,
+                'min-fill' or 'min-degree', used to find one.
+
+        Yields:
+            dict: Solutions as dicts, where keys are the variables.
+
+        Examples:
+            >>> import operator
+            >>> csp = dwavebinarycsp.ConstraintSatisfactionProblem(dwavebinarycsp.SPIN)
+            >>> csp.add_constraint(operator.ne, ['a', 'b'])
+            >>> sorted(sorted(solution.items()) for solution in csp.iter_solutions())
+            [[('a', -1), ('b', 1)], [('a', 1), ('b', -1)]]
+
+        """
+        from dwavebinarycsp.solvers.elimination import iter_solutions
+        return iter_solutions(self, order=order)
 
     def fix_variable(self, v, value):
         """Fix the value of a variable and remove it from the constraint satisfaction problem.
 
+        Constraints left without variables are removed.
+
         Args:
             v (variable):
                 Variable to be fixed in the constraint satisfaction problem.
@@ -225,11 +611,256 @@ class ConstraintSatisfactionProblem(object):
         if v not in self.variables:
             raise ValueError("given variable {} is not part of the constraint satisfaction problem".format(v))
 
-        for constraint in self.variables[v]:
-            constraint.fix_variable(v, value)
+        for slot in list(self.variables[v].slots):
+            constraint = self._copy_on_write(slot)
+            while v in constraint.variables:
+                constraint.fix_variable(v, value)
+
+            # a constraint without variables is satisfied (its table is checked in case it is
+            # lazy), so it is removed rather than kept around
+            if not constraint.variables and constraint.table:
+                self._remove(slot)
 
         del self.variables[v]  # delete the variable
 
+    def fix_variables(self, fixed, propagate=True):
+        """Fix the values of several variables and remove them from the constraint satisfaction problem.
+
+        Args:
+            fixed (dict):
+                Values assigned to variables as a dict, where keys are the variables. Values must
+                match the :attr:`~.ConstraintSatisfactionProblem.vartype` of the constraint
+                satisfaction problem.
+
+            propagate (bool, optional, default=True):
+                If True, variables that a constraint forces to a single value are also fixed,
+                repeatedly, and constraints that are satisfied by every assignment of their
+                remaining variables are removed.
+
+        Returns:
+            dict: All of the fixed variables and their values, including the implied ones.
+
+        Raises:
+            :exc:`~dwavebinarycsp.exceptions.UnsatError`: If the fixed values cannot satisfy
+            the constraints. The constraint satisfaction problem is left partially fixed.
+
+        Examples:
+            This example creates a binary-valued constraint satisfaction problem with an AND
+            gate, :math:`c = a \\wedge b`, and a NOT gate, :math:`d \\ne c`. Fixing the output
+            of the AND gate forces its inputs and the output of the NOT gate.
+
+            >>> import operator
+            >>> import dwavebinarycsp.factories.constraint.gates as gates
+            >>> csp = dwavebinarycsp.ConstraintSatisfactionProblem(dwavebinarycsp.BINARY)
+            >>> csp.add_constraint(gates.and_gate(['a', 'b', 'c']))
+            >>> csp.add_constraint(operator.ne, ['c', 'd'])
+            >>> sorted(csp.fix_variables({'c': 1}).items())
+            [('a', 1), ('b', 1), ('c', 1), ('d', 0)]
+            >>> len(csp)
+            0
+
+        """
+        for v in fixed:
+            if v not in self.variables:
+                raise ValueError("given variable {} is not part of the constraint satisfaction problem".format(v))
+
+        low = -1 if self.vartype is dimod.SPIN else 0
+
+        assignment = {}
+        queue = deque(fixed.items())
+        while queue:
+            v, value = queue.popleft()
+
+            if v in assignment:
+                if assignment[v] != value:
+                    raise UnsatError("{} is forced to both {} and {}".format(v, assignment[v], value))
+                continue
+            assignment[v] = value
+
+            for slot in self.variables.pop(v).slots:
+                const = self._copy_on_write(slot)
+                while v in const.variables:
+                    const.fix_variable(v, value)  # raises UnsatError
+
+                if not propagate:
+                    # as in fix_variable
+                    if not const.variables and const.table:
+                        self._remove(slot)
+                    continue
+
+                table = const.table
+                if len(table) == 1 << table.num_variables:
+                    # satisfied by any assignment of the remaining variables
+                    self._remove(slot)
+                    continue
+
+                for col, bit in table.constant_columns().items():
+                    queue.append((const.variables[col], 1 if bit else low))
+
+        return assignment
+
+    def evaluator(self, sample):
+        """Track which constraints a sample satisfies as its variables are changed one at a time.
+
+        Args:
+            sample (dict):
+                An assignment of values for the variables in the constraint satisfaction problem.
+
+        Returns:
+            :obj:`.CSPEvaluator`: An evaluator over a copy of `sample`.
+
+        Examples:
+            This example flips variables of a sample of a spin-valued constraint satisfaction
+            problem, :math:`a = b` and :math:`b \\ne c`, and tracks the number of violated
+            constraints.
+
+            >>> import operator
+            >>> csp = dwavebinarycsp.ConstraintSatisfactionProblem(dwavebinarycsp.SPIN)
+            >>> csp.add_constraint(operator.eq, ['a', 'b'])
+            >>> csp.add_constraint(operator.ne, ['b', 'c'])
+            >>> evaluator = csp.evaluator({'a': -1, 'b': +1, 'c': +1})
+            >>> evaluator.num_violations
+            2
+            >>> evaluator.flip('b')  # the change in the number of violated constraints
+            -2
+            >>> evaluator.set('c', -1)
+            1
+
+        """
+        return CSPEvaluator(self, sample)
+
+
+class CSPEvaluator(object):
+    """Incrementally evaluate the constraints of a constraint satisfaction problem.
+
+    Changing the value of a variable rechecks only the constraints that contain it. The
+    evaluator reflects the constraints of the constraint satisfaction problem when it was
+    created; create a new one after adding or changing constraints.
+
+    Args:
+        csp (:obj:`.ConstraintSatisfactionProblem`):
+            Constraint satisfaction problem.
+
+        sample (dict):
+            An assignment of values for the variables in the constraint satisfaction problem.
+            The evaluator works on a copy.
+
+    Attributes:
+        sample (dict):
+            Current assignment of values to variables.
+
+        satisfied (list[bool]):
+            Whether the current sample satisfies each of the constraints, in the order of
+            :attr:`.ConstraintSatisfactionProblem.constraints`.
+
+        num_violations (int):
+            Number of constraints the current sample violates.
+
+    """
+    def __init__(self, csp, sample):
+        self.csp = csp
+        self.sample = sample = dict(sample)
+
+        self._constraints = constraints = list(csp.constraints)
+
+        # the positions of the constraints that contain each variable, each constraint once
+        adj = self._adj = defaultdict(list)
+        for pos, const in enumerate(constraints):
+            for v in set(const.variables):
+                adj[v].append(pos)
+
+        self.satisfied = satisfied = [bool(const.check(sample)) for const in constraints]
+        self.num_violations = satisfied.count(False)
+
+    def check(self):
+        """True if the current sample satisfies all of the constraints."""
+        return not self.num_violations
+
+    def violated(self):
+        """List of the constraints the current sample violates."""
+        return [const for const, sat in zip(self._constraints, self.satisfied) if not sat]
+
+    def set(self, v, value):
+        """Set the value of a variable.
+
+        Args:
+            v (variable):
+                Variable in the constraint satisfaction problem.
+
+            value (int):
+                Value assigned to the variable.
+
+        Returns:
+            int: Change in the number of violated constraints.
+
+        """
+        sample = self.sample
+        if sample.get(v, None) == value:
+            return 0
+        sample[v] = value
+
+        constraints = self._constraints
+        satisfied = self.satisfied
+        delta = 0
+        for pos in self._adj.get(v, ()):
+            sat = bool(constraints[pos].check(sample))
+            if sat != satisfied[pos]:
+                satisfied[pos] = sat
+                delta += -1 if sat else 1
+
+        self.num_violations += delta
+        return delta
+
+    def flip(self, v):
+        """Flip the value of a variable.
+
+        Args:
+            v (variable):
+                Variable in the constraint satisfaction problem.
+
+        Returns:
+            int: Change in the number of violated constraints.
+
+        """
+        value = self.sample[v]
+        if self.csp.vartype is dimod.SPIN:
+            return self.set(v, -value)
+        return self.set(v, 1 - value)
+
 
 CSP = ConstraintSatisfactionProblem
 """An alias for :class:`.ConstraintSatisfactionProblem`."""
+
+
+class _ConstraintSet(Sequence):
+    # the constraints of a variable, as an ordered set of their slots in the constraint
+    # satisfaction problem. Reads like the list of constraints it replaces: it can be indexed
+    # and compares equal to a list of the same constraints
+    __slots__ = ('constraints', 'slots')
+
+    def __init__(self, constraints):
+        self.constraints = constraints  # slot -> constraint, shared with the problem
+        self.slots = {}  # slot -> None, a dict for its order
+
+    def __iter__(self):
+        constraints = self.constraints
+        return (constraints[slot] for slot in self.slots)
+
+    def __len__(self):
+        return len(self.slots)
+
+    def __getitem__(self, index):
+        return list(self)[index]
+
+    def __reversed__(self):
+        return reversed(list(self))
+
+    def __eq__(self, other):
+        if isinstance(other, _ConstraintSet):
+            other = list(other)
+        return list(self) == other
+
+    __hash__ = None
+
+    def __repr__(self):
+        return repr(list(self))
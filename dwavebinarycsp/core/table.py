@@ -0,0 +1,510 @@
+# Copyright 2018 D-Wave Systems Inc.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License");
+#    you may not use this file except in compliance with the License.
+#    You may obtain a copy of the License at
+#
+#        http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS,
+#    WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#    See the License for the specific language governing permissions and
+#    limitations under the License.
+
+"""
+The feasible configurations of a constraint are stored in a bit-packed
+:class:`ConfigurationTable`. Each configuration is encoded as an integer row in which the
+bit for a variable is set when the variable takes its higher value (1 for
+:attr:`~dimod.Vartype.BINARY`, +1 for :attr:`~dimod.Vartype.SPIN`), so tables do not depend on
+the vartype of the constraint they belong to.
+"""
+import functools
+import itertools
+import operator
+
+import numpy as np
+
+__all__ = ['ConfigurationTable']
+
+# tables over more variables than this are never stored as a dense bitmask (4 MiB)
+_MAX_DENSE_VARIABLES = 25
+
+
+def row_dtype(num_variables):
+    """The dtype used to hold encoded rows over `num_variables` variables."""
+    return np.uint64 if num_variables <= 64 else object
+
+
+def encode_rows(bits):
+    """Encode a 2-D array of bits, one configuration per row, as integer rows.
+
+    The first column is the most significant bit, so sorting the encoded rows sorts the
+    configurations lexicographically.
+    """
+    bits = np.asarray(bits)
+    num_rows, num_variables = bits.shape
+
+    dtype = row_dtype(num_variables)
+
+    if dtype is object:
+        rows = np.zeros(num_rows, dtype=dtype)
+        for col in range(num_variables):
+            rows = (rows << 1) | bits[:, col].astype(np.int64).astype(object)
+        return rows
+
+    weights = np.uint64(1) << np.arange(num_variables - 1, -1, -1, dtype=np.uint64)
+    return bits.astype(np.uint64) @ weights
+
+
+def decode_rows(rows, num_variables):
+    """Decode integer rows into a 2-D array of bits with one configuration per row."""
+    rows = np.asarray(rows)
+    if row_dtype(num_variables) is object:
+        shifts = np.arange(num_variables - 1, -1, -1)
+        return ((rows.astype(object)[:, np.newaxis] >> shifts) & 1).astype(np.uint8)
+    shifts = np.arange(num_variables - 1, -1, -1, dtype=np.uint64)
+    rows = rows.astype(np.uint64, copy=False)
+    return ((rows[:, np.newaxis] >> shifts) & np.uint64(1)).astype(np.uint8)
+
+
+def decode_columns(rows, num_variables, columns):
+    """Decode the given columns of integer rows into a 2-D array of bits."""
+    rows = np.asarray(rows)
+    columns = np.asarray(columns, dtype=np.int64).reshape(-1)
+    if row_dtype(num_variables) is object:
+        shifts = (num_variables - 1 - columns).astype(object)
+        return ((rows.astype(object)[:, np.newaxis] >> shifts) & 1).astype(np.uint8)
+    shifts = (num_variables - 1 - columns).astype(np.uint64)
+    rows = rows.astype(np.uint64, copy=False)
+    return ((rows[:, np.newaxis] >> shifts) & np.uint64(1)).astype(np.uint8)
+
+
+def values_from_bits(bits, vartype):
+    """Map an array of bits to the values of the given vartype."""
+    if vartype.name == 'SPIN':
+        return 2 * np.asarray(bits, dtype=np.int8) - 1
+    return np.asarray(bits, dtype=np.int8)
+
+
+class ConfigurationTable(object):
+    """An immutable set of configurations of binary-valued variables.
+
+    Tables are stored either as a dense bitmask over the full :math:`2^n` assignment space or
+    as a sorted array of encoded rows, whichever is smaller.
+
+    Args:
+        rows (array_like):
+            Encoded rows. Duplicates are removed.
+
+        num_variables (int):
+            Number of variables, i.e. the number of bits in each row.
+
+    Examples:
+        >>> from dwavebinarycsp.core.table import ConfigurationTable
+        >>> table = ConfigurationTable.from_configurations([(0, 0, 0), (0, 1, 0), (1, 0, 0), (1, 1, 1)], 3)
+        >>> len(table)
+        4
+        >>> 0b111 in table
+        True
+        >>> 0b001 in table
+        False
+
+    """
+
+    __slots__ = ('num_variables', '_rows', '_mask', '_size', '_hash', '_canonical')
+
+    def __init__(self, rows, num_variables):
+        num_variables = int(num_variables)
+        if num_variables < 0:
+            raise ValueError("num_variables must be non-negative")
+
+        rows = np.unique(np.asarray(rows, dtype=row_dtype(num_variables)))
+
+        self.num_variables = num_variables
+        self._size = len(rows)
+        self._hash = None
+        self._canonical = None
+
+        if self._use_dense(num_variables, len(rows)):
+            mask = np.zeros(1 << num_variables, dtype=bool)
+            mask[rows.astype(np.intp)] = True
+            self._mask = np.packbits(mask, bitorder='little').tobytes()
+            self._rows = None
+        else:
+            rows.flags.writeable = False
+            self._mask = None
+            self._rows = rows
+
+    @staticmethod
+    def _use_dense(num_variables, size):
+        # dense when the bitmask is no larger than the sorted array of 64 bit rows
+        return num_variables <= _MAX_DENSE_VARIABLES and (1 << num_variables) <= 64 * max(size, 1)
+
+    @classmethod
+    def from_configurations(cls, configurations, num_variables):
+        """Build a table from an iterable of configurations (tuples of variable values)."""
+        configurations = list(configurations)
+        bits = np.asarray(configurations).reshape(len(configurations), num_variables) > 0
+        return cls(encode_rows(bits), num_variables)
+
+    @classmethod
+    def from_mask(cls, mask):
+        """Build a table from a boolean array over all :math:`2^n` rows."""
+        mask = np.asarray(mask, dtype=bool)
+        num_variables = len(mask).bit_length() - 1
+        if len(mask) != 1 << num_variables:
+            raise ValueError("mask must have length 2**num_variables")
+        return cls(np.flatnonzero(mask), num_variables)
+
+    #
+    # Special Methods
+    #
+
+    def __len__(self):
+        return self._size
+
+    def __contains__(self, row):
+        if self._mask is not None:
+            return 0 <= row < (1 << self.num_variables) and bool((self._mask[row >> 3] >> (row & 7)) & 1)
+        idx = np.searchsorted(self._rows, row)
+        return idx < self._size and self._rows[idx] == row
+
+    def __iter__(self):
+        return iter(self.rows.tolist())
+
+    def __eq__(self, other):
+        if not isinstance(other, ConfigurationTable):
+            return NotImplemented
+        if self.num_variables != other.num_variables or self._size != other._size:
+            return False
+        if self._mask is not None:
+            return self._mask == other._mask
+        return bool(np.array_equal(self._rows, other._rows))
+
+    def __ne__(self, other):
+        eq = self.__eq__(other)
+        return eq if eq is NotImplemented else not eq
+
+    def __hash__(self):
+        if self._hash is None:
+            if self._mask is not None:
+                data = self._mask
+            elif self._rows.dtype == object:
+                data = tuple(self._rows.tolist())
+            else:
+                data = self._rows.tobytes()
+            self._hash = hash((self.num_variables, data))
+        return self._hash
+
+    def __repr__(self):
+        return '{}({}, {})'.format(type(self).__name__, self.rows.tolist(), self.num_variables)
+
+    #
+    # Views
+    #
+
+    @property
+    def rows(self):
+        """:class:`numpy.ndarray`: The encoded rows, sorted."""
+        if self._mask is not None:
+            bits = np.unpackbits(np.frombuffer(self._mask, dtype=np.uint8),
+                                 count=1 << self.num_variables, bitorder='little')
+            return np.flatnonzero(bits).astype(row_dtype(self.num_variables))
+        return self._rows
+
+    def contains(self, rows):
+        """Vectorized membership test.
+
+        Args:
+            rows (array_like): Encoded rows.
+
+        Returns:
+            :class:`numpy.ndarray`: Boolean array, True where the row is in the table.
+
+        """
+        rows = np.asarray(rows, dtype=row_dtype(self.num_variables))
+
+        if self._mask is not None:
+            mask = np.frombuffer(self._mask, dtype=np.uint8)
+            idx = rows.astype(np.intp)
+            return ((mask[idx >> 3] >> (idx & 7)) & 1).astype(bool)
+
+        if not self._size:
+            return np.zeros(rows.shape, dtype=bool)
+        idx = np.searchsorted(self._rows, rows)
+        found = np.zeros(rows.shape, dtype=bool)
+        inbounds = idx < self._size
+        found[inbounds] = self._rows[idx[inbounds]] == rows[inbounds]
+        return found
+
+    def to_bits(self):
+        """Return the table as a 2-D array of bits, one configuration per row."""
+        return decode_rows(self.rows, self.num_variables)
+
+    def to_array(self, vartype):
+        """Return the table as a 2-D array of values of the given vartype."""
+        return values_from_bits(self.to_bits(), vartype)
+
+    def to_configurations(self, vartype):
+        """Return the table as a frozenset of tuples of values of the given vartype."""
+        return frozenset(map(tuple, self.to_array(vartype).tolist()))
+
+    def constant_columns(self):
+        """Columns that take the same value in every row, as a dict mapping column to bit."""
+        if not self._size:
+            return {}
+
+        rows = self.rows
+        if row_dtype(self.num_variables) is object:
+            rows = rows.tolist()
+            ones = functools.reduce(operator.and_, rows)
+            anys = functools.reduce(operator.or_, rows)
+        else:
+            ones = int(np.bitwise_and.reduce(rows))
+            anys = int(np.bitwise_or.reduce(rows))
+
+        constant = {}
+        for col in range(self.num_variables):
+            shift = self.num_variables - 1 - col
+            if (ones >> shift) & 1:
+                constant[col] = 1
+            elif not (anys >> shift) & 1:
+                constant[col] = 0
+        return constant
+
+    def canonical(self):
+        """Find a canonical form of the table under column permutations and flips.
+
+        Two tables with the same canonical form can be obtained from each other by reordering
+        and flipping their columns. The converse holds unless the search is cut short: for
+        highly symmetric tables, such as parity tables over many variables, only a bounded
+        number of candidate forms are compared, so two equivalent tables may get different
+        forms and miss each other in a cache keyed on the canonical form. The result is cached
+        on the table.
+
+        Returns:
+            tuple: A 3-tuple of
+
+            * the canonical :obj:`.ConfigurationTable`
+            * a tuple of column indices in this table, one for each column of the canonical
+              table
+            * a tuple of bools, one for each column of the canonical table, True where the
+              column is flipped relative to this table
+
+        """
+        if self._canonical is None:
+            self._canonical = _canonical(self)
+        return self._canonical
+
+    #
+    # Transformations, each returns a new table
+    #
+
+    def take(self, columns):
+        """Select the given columns, in the given order, removing duplicate rows.
+
+        Args:
+            columns (sequence[int]): Column indices.
+
+        Returns:
+            :obj:`.ConfigurationTable`
+
+        """
+        columns = list(columns)
+        # decode only the selected columns, duplicates are removed on construction
+        return type(self)(encode_rows(decode_columns(self.rows, self.num_variables, columns)), len(columns))
+
+    def fix(self, column, bit):
+        """Keep the rows with the given bit in `column` and remove the column."""
+        bits = self.to_bits()
+        bits = bits[bits[:, column] == bit]
+        return type(self)(encode_rows(np.delete(bits, column, axis=1)), self.num_variables - 1)
+
+    def flip(self, columns):
+        """Flip the bits in the given columns."""
+        # a single xor with a sign mask, however many columns are flipped
+        mask = 0
+        for col in set(columns):
+            mask |= 1 << (self.num_variables - 1 - col)
+        dtype = row_dtype(self.num_variables)
+        return type(self)(self.rows ^ (np.uint64(mask) if dtype is np.uint64 else mask), self.num_variables)
+
+    def join(self, other, on):
+        """Natural join with another table.
+
+        Args:
+            other (:obj:`.ConfigurationTable`):
+                Table to join with.
+
+            on (iterable[tuple]):
+                Pairs of column indices, `(self_column, other_column)`, that refer to the same
+                variable.
+
+        Returns:
+            :obj:`.ConfigurationTable`: The rows that agree with a row of both tables on their
+            shared columns. Columns are those of this table followed by the unshared columns
+            of `other`, in order.
+
+        """
+        on = list(on)
+        self_shared = [i for i, _ in on]
+        other_shared = [j for _, j in on]
+        other_rest = [j for j in range(other.num_variables) if j not in set(other_shared)]
+
+        self_bits = self.to_bits()
+        other_bits = other.to_bits()
+
+        # sort the keys of other so that each key of self matches a contiguous range
+        self_keys = encode_rows(self_bits[:, self_shared])
+        other_keys = encode_rows(other_bits[:, other_shared])
+        order = np.argsort(other_keys, kind='stable')
+        other_keys = other_keys[order]
+
+        lo = np.searchsorted(other_keys, self_keys, side='left')
+        counts = np.searchsorted(other_keys, self_keys, side='right') - lo
+
+        self_idx = np.repeat(np.arange(len(self_keys)), counts)
+        offsets = np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
+        other_idx = order[np.repeat(lo, counts) + offsets]
+
+        bits = np.hstack((self_bits[self_idx], other_bits[other_idx][:, other_rest]))
+        return type(self)(encode_rows(bits), self.num_variables + len(other_rest))
+
+    def union(self, other, on):
+        """Union with another table, over the columns of both.
+
+        Args:
+            other (:obj:`.ConfigurationTable`):
+                Table to take the union with.
+
+            on (iterable[tuple]):
+                Pairs of column indices, `(self_column, other_column)`, that refer to the same
+                variable.
+
+        Returns:
+            :obj:`.ConfigurationTable`: The rows that agree with a row of either table.
+            Columns are those of this table followed by the unshared columns of `other`, in
+            order.
+
+        """
+        on = dict((j, i) for i, j in on)
+        other_rest = [j for j in range(other.num_variables) if j not in on]
+
+        num_variables = self.num_variables + len(other_rest)
+
+        # the position of each column of other in the result
+        positions = [on[j] if j in on else self.num_variables + other_rest.index(j)
+                     for j in range(other.num_variables)]
+
+        bits = np.vstack((_expand(self.to_bits(), range(self.num_variables), num_variables),
+                          _expand(other.to_bits(), positions, num_variables)))
+        return type(self)(encode_rows(bits), num_variables)
+
+
+def _expand(bits, positions, num_variables):
+    # place the columns of bits at the given positions, enumerating every assignment of the
+    # remaining columns
+    positions = list(positions)
+    free = [col for col in range(num_variables) if col not in set(positions)]
+    fill = decode_rows(np.arange(1 << len(free)), len(free))
+
+    expanded = np.empty((len(bits) * len(fill), num_variables), dtype=np.uint8)
+    expanded[:, positions] = np.repeat(bits, len(fill), axis=0)
+    expanded[:, free] = np.tile(fill, (len(bits), 1))
+    return expanded
+
+
+# the maximum number of candidate forms compared by ConfigurationTable.canonical
+_MAX_CANONICAL_CANDIDATES = 1 << 11
+
+
+def _canonical(table):
+    num_variables = table.num_variables
+    bits = table.to_bits()
+
+    # flip invariant column statistics, as spins the column sums and the pairwise correlations
+    spins = 2 * bits.astype(np.int64) - 1
+    sums = spins.sum(axis=0)
+    correlations = np.abs(spins.T @ spins)
+
+    # a column is flipped so that it is mostly 0, unless it is balanced and could go either way
+    flips = (sums > 0).astype(np.uint8)
+    balanced = [col for col in range(num_variables) if sums[col] == 0]
+
+    colors = _refine([int(abs(c)) for c in sums], correlations)
+
+    # swapping two columns that leave the (flipped) rows unchanged gives the same candidates
+    normalized = bits ^ flips
+    base = np.sort(encode_rows(normalized))
+
+    def interchangeable(u, v):
+        swapped = list(range(num_variables))
+        swapped[u], swapped[v] = v, u
+        return np.array_equal(np.sort(encode_rows(normalized[:, swapped])), base)
+
+    # individualize and refine down to orderings of the columns, keeping the candidate with the
+    # lexicographically smallest sorted rows. If the search is cut short by the limit, the result
+    # is still an equivalent table but may differ between equivalent inputs.
+    best = None
+    num_candidates = 0
+    for columns in _orderings(colors, correlations, interchangeable):
+        # flipping columns xors every encoded row with the same mask, so encode once per ordering
+        rows = encode_rows(bits[:, columns])
+        for flipping in itertools.product((0, 1), repeat=len(balanced)):
+            candidate_flips = flips.copy()
+            candidate_flips[balanced] = flipping
+            candidate_flips = candidate_flips[columns]
+            key = np.sort(rows ^ encode_rows(candidate_flips[np.newaxis, :])[0])
+            if best is None or _less(key, best[0]):
+                best = (key, tuple(columns), tuple(bool(flip) for flip in candidate_flips))
+            num_candidates += 1
+            if num_candidates >= _MAX_CANONICAL_CANDIDATES:
+                break
+        if num_candidates >= _MAX_CANONICAL_CANDIDATES:
+            break
+
+    key, columns, flipped = best
+    return ConfigurationTable(key, num_variables), columns, flipped
+
+
+def _less(a, b):
+    # lexicographic comparison of two sorted row arrays of the same length
+    differ = np.flatnonzero(a != b)
+    return len(differ) > 0 and a[differ[0]] < b[differ[0]]
+
+
+def _refine(colors, correlations):
+    # split the columns by their colors and the colors of, and correlation with, the other
+    # columns until the partition is stable. Colors are relabelled by rank.
+    num_variables = len(colors)
+    while True:
+        signatures = [(colors[col], tuple(sorted((colors[other], int(correlations[col, other]))
+                                                 for other in range(num_variables) if other != col)))
+                      for col in range(num_variables)]
+        rank = {sig: idx for idx, sig in enumerate(sorted(set(signatures)))}
+        refined = [rank[sig] for sig in signatures]
+        if len(rank) == len(set(colors)):
+            return refined
+        colors = refined
+
+
+def _orderings(colors, correlations, interchangeable):
+    # yield column orderings, individualizing each column of the first class with more than one
+    # member in turn, skipping columns interchangeable with one already tried
+    num_variables = len(colors)
+    if len(set(colors)) == num_variables:
+        yield sorted(range(num_variables), key=colors.__getitem__)
+        return
+
+    counts = np.bincount(colors)
+    target = min(color for color in colors if counts[color] > 1)
+    tried = []
+    for col in range(num_variables):
+        if colors[col] != target or any(interchangeable(col, other) for other in tried):
+            continue
+        tried.append(col)
+
+        individualized = [2 * color for color in colors]
+        individualized[col] -= 1
+        yield from _orderings(_refine(individualized, correlations), correlations, interchangeable)
@@ -15,6 +15,7 @@
 import dimod
 
 from dwavebinarycsp.core.constraint import Constraint
+from dwavebinarycsp.core.table import ConfigurationTable
 
 __all__ = ['and_gate',
            'or_gate',
@@ -22,6 +23,59 @@ __all__ = ['and_gate',
            'halfadder_gate',
            'fulladder_gate']
 
+# one table and function per kind of gate, shared by every gate of that kind and both vartypes
+
+_AND = ConfigurationTable.from_configurations([(0, 0, 0),
+                                               (0, 1, 0),
+                                               (1, 0, 0),
+                                               (1, 1, 1)], 3)
+
+_OR = ConfigurationTable.from_configurations([(0, 0, 0),
+                                              (0, 1, 1),
+                                              (1, 0, 1),
+                                              (1, 1, 1)], 3)
+
+_XOR = ConfigurationTable.from_configurations([(0, 0, 0),
+                                               (0, 1, 1),
+                                               (1, 0, 1),
+                                               (1, 1, 0)], 3)
+
+_HALF_ADDER = ConfigurationTable.from_configurations([(0, 0, 0, 0),
+                                                      (0, 1, 1, 0),
+                                                      (1, 0, 1, 0),
+                                                      (1, 1, 0, 1)], 4)
+
+_FULL_ADDER = ConfigurationTable.from_configurations([(0, 0, 0, 0, 0),
+                                                      (0, 0, 1, 1, 0),
+                                                      (0, 1, 0, 1, 0),
+                                                      (0, 1, 1, 0, 1),
+                                                      (1, 0, 0, 1, 0),
+                                                      (1, 0, 1, 0, 1),
+                                                      (1, 1, 0, 0, 1),
+                                                      (1, 1, 1, 1, 1)], 5)
+
+
+def _and(in1, in2, out):
+    return ((in1 > 0) & (in2 > 0)) == (out > 0)
+
+
+def _or(in1, in2, out):
+    return ((in1 > 0) | (in2 > 0)) == (out > 0)
+
+
+def _xor(in1, in2, out):
+    return ((in1 > 0) != (in2 > 0)) == (out > 0)
+
+
+def _halfadder(augend, addend, sum_, carry):
+    total = (augend > 0) * 1 + (addend > 0) * 1
+    return ((sum_ > 0) == (total % 2 == 1)) & ((carry > 0) == (total > 1))
+
+
+def _fulladder(in1, in2, in3, sum_, carry):
+    total = (in1 > 0) * 1 + (in2 > 0) * 1 + (in3 > 0) * 1
+    return ((sum_ > 0) == (total % 2 == 1)) & ((carry > 0) == (total > 1))
+
 
 @dimod.decorators.vartype_argument('vartype')
 def and_gate(variables, vartype=dimod.BINARY, name='AND'):
@@ -51,24 +105,7 @@ def and_gate(variables, vartype=dimod.BINARY, name='AND'):
 
     variables = tuple(variables)
 
-    if vartype is dimod.BINARY:
-        configurations = frozenset([(0, 0, 0),
-                                    (0, 1, 0),
-                                    (1, 0, 0),
-                                    (1, 1, 1)])
-
-        def func(in1, in2, out): return (in1 and in2) == out
-
-    else:
-        # SPIN, vartype is checked by the decorator
-        configurations = frozenset([(-1, -1, -1),
-                                    (-1, +1, -1),
-                                    (+1, -1, -1),
-                                    (+1, +1, +1)])
-
-        def func(in1, in2, out): return ((in1 > 0) and (in2 > 0)) == (out > 0)
-
-    return Constraint(func, configurations, variables, vartype=vartype, name=name)
+    return Constraint(_and, _AND, variables, vartype=vartype, name=name)
 
 
 @dimod.decorators.vartype_argument('vartype')
@@ -99,24 +136,7 @@ def or_gate(variables, vartype=dimod.BINARY, name='OR'):
 
     variables = tuple(variables)
 
-    if vartype is dimod.BINARY:
-        configs = frozenset([(0, 0, 0),
-                             (0, 1, 1),
-                             (1, 0, 1),
-                             (1, 1, 1)])
-
-        def func(in1, in2, out): return (in1 or in2) == out
-
-    else:
-        # SPIN, vartype is checked by the decorator
-        configs = frozenset([(-1, -1, -1),
-                             (-1, +1, +1),
-                             (+1, -1, +1),
-                             (+1, +1, +1)])
-
-        def func(in1, in2, out): return ((in1 > 0) or (in2 > 0)) == (out > 0)
-
-    return Constraint(func, configs, variables, vartype=vartype, name=name)
+    return Constraint(_or, _OR, variables, vartype=vartype, name=name)
 
 
 @dimod.decorators.vartype_argument('vartype')
@@ -146,24 +166,8 @@ def xor_gate(variables, vartype=dimod.BINARY, name='XOR'):
     """
 
     variables = tuple(variables)
-    if vartype is dimod.BINARY:
-        configs = frozenset([(0, 0, 0),
-                             (0, 1, 1),
-                             (1, 0, 1),
-                             (1, 1, 0)])
-
-        def func(in1, in2, out): return (in1 != in2) == out
-
-    else:
-        # SPIN, vartype is checked by the decorator
-        configs = frozenset([(-1, -1, -1),
-                             (-1, +1, +1),
-                             (+1, -1, +1),
-                             (+1, +1, -1)])
-
-        def func(in1, in2, out): return ((in1 > 0) != (in2 > 0)) == (out > 0)
 
-    return Constraint(func, configs, variables, vartype=vartype, name=name)
+    return Constraint(_xor, _XOR, variables, vartype=vartype, name=name)
 
 
 @dimod.decorators.vartype_argument('vartype')
@@ -196,31 +200,7 @@ def halfadder_gate(variables, vartype=dimod.BINARY, name='HALF_ADDER'):
 
     variables = tuple(variables)
 
-    if vartype is dimod.BINARY:
-        configs = frozenset([(0, 0, 0, 0),
-                             (0, 1, 1, 0),
-                             (1, 0, 1, 0),
-                             (1, 1, 0, 1)])
-
-    else:
-        # SPIN, vartype is checked by the decorator
-        configs = frozenset([(-1, -1, -1, -1),
-                             (-1, +1, +1, -1),
-                             (+1, -1, +1, -1),
-                             (+1, +1, -1, +1)])
-
-    def func(augend, addend, sum_, carry):
-        total = (augend > 0) + (addend > 0)
-        if total == 0:
-            return (sum_ <= 0) and (carry <= 0)
-        elif total == 1:
-            return (sum_ > 0) and (carry <= 0)
-        elif total == 2:
-            return (sum_ <= 0) and (carry > 0)
-        else:
-            raise ValueError("func recieved unexpected values")
-
-    return Constraint(func, configs, variables, vartype=vartype, name=name)
+    return Constraint(_halfadder, _HALF_ADDER, variables, vartype=vartype, name=name)
 
 
 @dimod.decorators.vartype_argument('vartype')
@@ -253,38 +233,4 @@ def fulladder_gate(variables, vartype=dimod.BINARY, name='FULL_ADDER'):
 
     variables = tuple(variables)
 
-    if vartype is dimod.BINARY:
-        configs = frozenset([(0, 0, 0, 0, 0),
-                             (0, 0, 1, 1, 0),
-                             (0, 1, 0, 1, 0),
-                             (0, 1, 1, 0, 1),
-                             (1, 0, 0, 1, 0),
-                             (1, 0, 1, 0, 1),
-                             (1, 1, 0, 0, 1),
-                             (1, 1, 1, 1, 1)])
-
-    else:
-        # SPIN, vartype is checked by the decorator
-        configs = frozenset([(-1, -1, -1, -1, -1),
-                             (-1, -1, +1, +1, -1),
-                             (-1, +1, -1, +1, -1),
-                             (-1, +1, +1, -1, +1),
-                             (+1, -1, -1, +1, -1),
-                             (+1, -1, +1, -1, +1),
-                             (+1, +1, -1, -1, +1),
-                             (+1, +1, +1, +1, +1)])
-
-    def func(in1, in2, in3, sum_, carry):
-        total = (in1 > 0) + (in2 > 0) + (in3 > 0)
-        if total == 0:
-            return (sum_ <= 0) and (carry <= 0)
-        elif total == 1:
-            return (sum_ > 0) and (carry <= 0)
-        elif total == 2:
-            return (sum_ <= 0) and (carry > 0)
-        elif total == 3:
-            return (sum_ > 0) and (carry > 0)
-        else:
-            raise ValueError("func recieved unexpected values")
-
-    return Constraint(func, configs, variables, vartype=vartype, name=name)
+    return Constraint(_fulladder, _FULL_ADDER, variables, vartype=vartype, name=name)
@@ -12,11 +12,12 @@
 #    See the License for the specific language governing permissions and
 #    limitations under the License.
 
-import itertools
+import functools
 
 import dimod
 
 from dwavebinarycsp.core.constraint import Constraint
+from dwavebinarycsp.core.table import ConfigurationTable
 
 __all__ = ['sat2in4']
 
@@ -61,39 +62,25 @@ def sat2in4(pos, neg=tuple(), vartype=dimod.BINARY, name='2-in-4'):
 
     if neg and (len(neg) < 4):
         # because 2-in-4 sat is symmetric, all negated is the same as none negated
+        return Constraint(None, _negated_table(len(pos)), variables, vartype=vartype, name=name)
 
-        const = sat2in4(pos=variables, vartype=vartype)  # make one that has no negations
-        for v in neg:
-            const.flip_variable(v)
-            const.name = name  # overwrite the name directly
-
-        return const
-
-    # we can just construct them directly for speed
-    if vartype is dimod.BINARY:
-        configurations = frozenset([(0, 0, 1, 1),
-                                    (0, 1, 0, 1),
-                                    (1, 0, 0, 1),
-                                    (0, 1, 1, 0),
-                                    (1, 0, 1, 0),
-                                    (1, 1, 0, 0)])
-    else:
-        # SPIN, vartype is checked by the decorator
-        configurations = frozenset([(-1, -1, +1, +1),
-                                    (-1, +1, -1, +1),
-                                    (+1, -1, -1, +1),
-                                    (-1, +1, +1, -1),
-                                    (+1, -1, +1, -1),
-                                    (+1, +1, -1, -1)])
-
-    def func(a, b, c, d):
-        if a == b:
-            return (b != c) and (c == d)
-        elif a == c:
-            # a != b
-            return b == d
-        else:
-            # a != b, a != c => b == c
-            return a == d
-
-    return Constraint(func, configurations, variables, vartype=vartype, name=name)
+    return Constraint(_sat2in4, _SAT2IN4, variables, vartype=vartype, name=name)
+
+
+_SAT2IN4 = ConfigurationTable.from_configurations([(0, 0, 1, 1),
+                                                   (0, 1, 0, 1),
+                                                   (1, 0, 0, 1),
+                                                   (0, 1, 1, 0),
+                                                   (1, 0, 1, 0),
+                                                   (1, 1, 0, 0)], 4)
+
+
+@functools.lru_cache(maxsize=None)
+def _negated_table(num_pos):
+    # the last 4 - num_pos variables are negated
+    return _SAT2IN4.flip(range(num_pos, 4))
+
+
+def _sat2in4(a, b, c, d):
+    # works for both vartypes and, elementwise, on arrays of values
+    return (a > 0) * 1 + (b > 0) * 1 + (c > 0) * 1 + (d > 0) * 1 == 2
@@ -0,0 +1,321 @@
+# Copyright 2018 D-Wave Systems Inc.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License");
+#    you may not use this file except in compliance with the License.
+#    You may obtain a copy of the License at
+#
+#        http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS,
+#    WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#    See the License for the specific language governing permissions and
+#    limitations under the License.
+
+"""
+Constraint satisfaction problems can often be simplified before they are compiled, removing
+configurations and variables that cannot be part of any solution.
+"""
+import itertools
+
+from collections import deque, namedtuple
+
+import dimod
+
+from dwavebinarycsp.compilers.stitcher import _penalty_model, penalty_model_cache
+from dwavebinarycsp.core.table import ConfigurationTable, decode_columns, encode_rows
+from dwavebinarycsp.exceptions import ImpossibleBQM, UnsatError
+
+__all__ = ['arc_consistency', 'ArcConsistencyReport', 'merge_constraints', 'MergeReport']
+
+
+ArcConsistencyReport = namedtuple('ArcConsistencyReport', ['rows_removed', 'fixed', 'constraints_removed'])
+"""Summary of the changes made by :func:`.arc_consistency`.
+
+Attributes:
+    rows_removed (int): Number of configurations removed from the constraints.
+    fixed (dict): Variables found to have a single feasible value, and their values.
+    constraints_removed (int): Number of constraints removed from the constraint satisfaction problem.
+
+"""
+
+MergeReport = namedtuple('MergeReport', ['identical', 'same_scope', 'subsumed', 'clustered'])
+"""Summary of the changes made by :func:`.merge_constraints`.
+
+Attributes:
+    identical (int): Number of constraints removed as duplicates of another constraint.
+    same_scope (int): Number of constraints intersected into another over the same variables.
+    subsumed (int): Number of constraints intersected into another over a superset of their variables.
+    clustered (int): Number of pairs of neighbouring constraints replaced by their intersection.
+
+"""
+
+
+def arc_consistency(csp, fix=True):
+    """Remove the configurations of each constraint that no neighbouring constraint supports.
+
+    A configuration of a constraint is supported by a neighbouring constraint, one with which it
+    shares variables, if the neighbour has a configuration that agrees with it on the shared
+    variables. Unsupported configurations cannot be part of any solution and are removed,
+    repeatedly, until every remaining configuration is supported. For binary variables this
+    is stronger than generalized arc consistency, which only removes configurations once a
+    variable is forced.
+
+    The constraints are modified in-place.
+
+    Args:
+        csp (:obj:`.ConstraintSatisfactionProblem`):
+            Constraint satisfaction problem.
+
+        fix (bool, optional, default=True):
+            If True, variables that are left with a single feasible value are fixed with
+            :meth:`.ConstraintSatisfactionProblem.fix_variables`, which also removes the
+            constraints they satisfy.
+
+    Returns:
+        :obj:`.ArcConsistencyReport`: The number of configurations removed, the variables
+        with a single feasible value and the number of constraints removed.
+
+    Raises:
+        :exc:`~dwavebinarycsp.exceptions.UnsatError`: If a constraint is left with no
+        configurations, in which case the constraint satisfaction problem has no solution.
+
+    Examples:
+        This example prunes an AND gate, :math:`c = a \\wedge b`, with a constraint that
+        :math:`a \\ne b`. Only the configurations with :math:`c = 0` remain, so c is fixed.
+
+        >>> import operator
+        >>> import dwavebinarycsp.factories.constraint.gates as gates
+        >>> csp = dwavebinarycsp.ConstraintSatisfactionProblem(dwavebinarycsp.BINARY)
+        >>> csp.add_constraint(gates.and_gate(['a', 'b', 'c']))
+        >>> csp.add_constraint(operator.ne, ['a', 'b'])
+        >>> report = dwavebinarycsp.arc_consistency(csp)
+        >>> report.rows_removed, report.fixed
+        (2, {'c': 0})
+        >>> sorted(csp.constraints[0].configurations)
+        [(0, 1), (1, 0)]
+
+    """
+    csp._copy_shared()
+    constraints = csp.constraints
+
+    queue = deque(constraints)
+    queued = set(map(id, constraints))
+
+    rows_removed = 0
+    while queue:
+        support = queue.popleft()
+        queued.discard(id(support))
+
+        for const in _neighbours(csp, support):
+            removed = _revise(const, support)
+            if removed:
+                rows_removed += removed
+                if id(const) not in queued:
+                    queue.append(const)
+                    queued.add(id(const))
+
+    forced = {}
+    for const in csp.constraints:
+        low = -1 if const.vartype is dimod.SPIN else 0
+        for col, bit in const.table.constant_columns().items():
+            forced[const.variables[col]] = 1 if bit else low
+
+    num_constraints = len(csp)
+    if fix and forced:
+        forced = csp.fix_variables(forced)
+
+    return ArcConsistencyReport(rows_removed, forced, num_constraints - len(csp))
+
+
+def _neighbours(csp, const):
+    # the other constraints that share a variable with const, each once
+    seen = {id(const)}
+    for v in const.variables:
+        for other in csp.variables[v]:
+            if id(other) not in seen:
+                seen.add(id(other))
+                yield other
+
+
+def _revise(const, support):
+    # remove the rows of const whose values on the shared variables are not in support, returning
+    # the number of rows removed
+    support_index = {}
+    for col, v in enumerate(support.variables):
+        support_index.setdefault(v, col)
+
+    columns = []
+    support_columns = []
+    seen = set()
+    for col, v in enumerate(const.variables):
+        if v in support_index and v not in seen:
+            seen.add(v)
+            columns.append(col)
+            support_columns.append(support_index[v])
+
+    if not columns:
+        return 0
+
+    table = const.table
+    supported = support.table.take(support_columns)
+
+    rows = table.rows
+    keep = supported.contains(encode_rows(decode_columns(rows, table.num_variables, columns)))
+
+    if keep.all():
+        return 0
+    if not keep.any():
+        raise UnsatError("constraint {} has no configurations supported by {}".format(const.name, support.name))
+
+    const._set_table(ConfigurationTable(rows[keep], table.num_variables))
+
+    return len(table) - len(const.table)
+
+
+def merge_constraints(csp, max_graph_size=None, min_classical_gap=2.0):
+    """Merge constraints whose variables overlap, giving a smaller equivalent problem.
+
+    Every constraint whose variables are all variables of another constraint is intersected
+    into the smallest such constraint and removed. This covers duplicated constraints, several
+    constraints over the same variables, and constraints over a subset of another's
+    variables, each of which would otherwise be given its own penalty model by
+    :func:`.stitch`.
+
+    If `max_graph_size` is given, pairs of neighbouring constraints with at most
+    `max_graph_size` variables between them are then replaced by their intersection whenever
+    its penalty model needs fewer auxiliary variables than the two separate penalty models.
+    This requires building penalty models for the candidate pairs, which can be slow.
+
+    The constraint satisfaction problem is modified in-place.
+
+    Args:
+        csp (:obj:`.ConstraintSatisfactionProblem`):
+            Constraint satisfaction problem.
+
+        max_graph_size (int, optional):
+            Maximum number of variables of a merged pair of neighbouring constraints, as for
+            :func:`.stitch`. If not given, neighbouring constraints are not merged.
+
+        min_classical_gap (float, optional, default=2.0):
+            Minimum energy gap of the penalty models used to count auxiliary variables, as
+            for :func:`.stitch`.
+
+    Returns:
+        :obj:`.MergeReport`: The number of constraints merged of each kind.
+
+    Raises:
+        :exc:`~dwavebinarycsp.exceptions.UnsatError`: If two merged constraints have no
+        configuration in common, in which case the constraint satisfaction problem has no
+        solution.
+
+    Examples:
+        This example merges an AND gate, :math:`c = a \\wedge b`, with a duplicate of itself
+        and with a constraint that :math:`a \\ne c`.
+
+        >>> import operator
+        >>> import dwavebinarycsp.factories.constraint.gates as gates
+        >>> csp = dwavebinarycsp.ConstraintSatisfactionProblem(dwavebinarycsp.BINARY)
+        >>> csp.add_constraint(gates.and_gate(['a', 'b', 'c']))
+        >>> csp.add_constraint(gates.and_gate(['a', 'b', 'c']))
+        >>> csp.add_constraint(operator.ne, ['a', 'c'])
+        >>> dwavebinarycsp.merge_constraints(csp)
+        MergeReport(identical=1, same_scope=0, subsumed=1, clustered=0)
+        >>> sorted(csp.constraints[0].configurations)
+        [(1, 0, 0)]
+
+    """
+    csp._copy_shared()
+
+    removed = {}  # id -> constraint, for the removed constraints
+
+    def remove(const):
+        removed[id(const)] = const
+        csp.remove_constraint(const)
+
+    identical = same_scope = subsumed = 0
+
+    # largest first, so that constraints are compared with each other before any of their
+    # subsets are merged into them
+    for const in sorted(csp.constraints, key=lambda c: len(set(c.variables)), reverse=True):
+        scope = set(const.variables)
+
+        # the smallest other constraint over all of the variables of const
+        target = None
+        for other in _neighbours(csp, const):
+            if scope.issubset(other.variables):
+                if target is None or len(set(other.variables)) < len(set(target.variables)):
+                    target = other
+        if target is None:
+            continue
+
+        table = target.table
+        _, on = target._combined_variables(const)
+        joined = table.join(const.table, on)
+
+        if not joined:
+            raise UnsatError("constraints {} and {} have no configurations in common".format(const.name, target.name))
+
+        if len(scope) < len(set(target.variables)):
+            subsumed += 1
+        elif len(joined) == len(table) == len(const.table):
+            identical += 1
+        else:
+            same_scope += 1
+
+        if len(joined) < len(table):
+            target._set_table(joined)
+
+        remove(const)
+
+    clustered = 0
+    if max_graph_size is not None:
+        aux = {}  # id of a constraint -> (constraint, number of auxiliary variables)
+
+        def num_aux(const):
+            if id(const) not in aux:
+                aux[id(const)] = const, _num_aux(const, csp.vartype, min_classical_gap, max_graph_size)
+            return aux[id(const)][1]
+
+        rejected = set()  # pairs of ids that are not worth merging
+
+        queue = deque(csp.constraints)
+        while queue:
+            const = queue.popleft()
+            if id(const) in removed:
+                continue
+
+            for other in list(_neighbours(csp, const)):
+                pair = frozenset((id(const), id(other)))
+                if pair in rejected or len(set(const.variables).union(other.variables)) > max_graph_size:
+                    continue
+
+                separate = num_aux(const) + num_aux(other)
+                if separate:
+                    variables, on = const._combined_variables(other)
+                    joined = const.table.join(other.table, on)
+                    if not joined:
+                        raise UnsatError("constraints {} and {} have no configurations in common".format(const.name, other.name))
+                    merged = type(const)(None, joined, variables, const.vartype,
+                                         name='{} & {}'.format(const.name, other.name))
+                    if num_aux(merged) < separate:
+                        remove(const)
+                        remove(other)
+                        csp.add_constraint(merged)
+                        queue.append(merged)
+                        clustered += 1
+                        break
+
+                rejected.add(pair)
+
+    return MergeReport(identical, same_scope, subsumed, clustered)
+
+
+def _num_aux(const, vartype, min_classical_gap, max_graph_size):
+    # the number of auxiliary variables in the penalty model that stitch would use for const
+    labels = ('aux{}'.format(i) for i in itertools.count())
+    try:
+        bqm = _penalty_model(const, vartype, min_classical_gap, max_graph_size, labels, penalty_model_cache)
+    except ImpossibleBQM:
+        return float('inf')
+    return sum(1 for v in bqm.variables if v not in const.variables)
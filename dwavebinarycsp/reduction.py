@@ -13,13 +13,16 @@
 #    limitations under the License.
 
 """
-Constraints can sometimes be reduced into several smaller constraints.
+Constraints can sometimes be reduced into several smaller constraints, and constraint
+satisfaction problems into independent components whose results are merged back together.
 """
 
 import itertools
 
 from collections import defaultdict
 
+import dimod
+
 
 def irreducible_components(constraint):
     """Determine the sets of variables that are irreducible.
@@ -92,3 +95,76 @@ def _irreducible_components(configurations, variables):
                 return subset_components + complement_components
 
     return [variables]
+
+
+def merge_bqms(bqms, vartype=None):
+    """Combine binary quadratic models over disjoint variables into one.
+
+    Args:
+        bqms (iterable[:obj:`dimod.BinaryQuadraticModel`]):
+            Binary quadratic models, for example those compiled for each of the components
+            returned by :meth:`.ConstraintSatisfactionProblem.components`.
+
+        vartype (:class:`~dimod.Vartype`/str/set, optional):
+            Variable type of the combined model. Defaults to that of the first model.
+
+    Returns:
+        :obj:`dimod.BinaryQuadraticModel`: The sum of the models.
+
+    Raises:
+        ValueError: If two of the models share a variable.
+
+    Examples:
+        This example compiles each component of a constraint satisfaction problem
+        separately. Each is given its own prefix for the labels of its auxiliary variables,
+        so that the models do not share them.
+
+        >>> import dwavebinarycsp.factories.constraint.gates as gates
+        >>> csp = dwavebinarycsp.ConstraintSatisfactionProblem(dwavebinarycsp.BINARY)
+        >>> csp.add_constraint(gates.xor_gate(['a', 'b', 'c']))
+        >>> csp.add_constraint(gates.xor_gate(['d', 'e', 'f']))
+        >>> bqm = dwavebinarycsp.merge_bqms(dwavebinarycsp.stitch(component, aux_prefix='aux{}_'.format(i))
+        ...                                 for i, component in enumerate(csp.components()))
+        >>> sorted(bqm.variables)
+        ['a', 'aux0_0', 'aux0_1', 'aux1_0', 'aux1_1', 'b', 'c', 'd', 'e', 'f']
+
+    """
+    bqms = list(bqms)
+
+    if vartype is None:
+        vartype = bqms[0].vartype if bqms else dimod.BINARY
+
+    bqm = dimod.BinaryQuadraticModel.empty(vartype)
+    for other in bqms:
+        if any(v in bqm.variables for v in other.variables):
+            raise ValueError("the binary quadratic models must not share variables, stitch "
+                             "components with different aux_prefix")
+        bqm.update(other)
+    return bqm
+
+
+def merge_assignments(assignments):
+    """Combine assignments of disjoint sets of variables into one.
+
+    Args:
+        assignments (iterable[dict]):
+            Assignments, for example solutions of each of the components returned by
+            :meth:`.ConstraintSatisfactionProblem.components`.
+
+    Returns:
+        dict: The union of the assignments.
+
+    Raises:
+        ValueError: If two of the assignments give a variable different values.
+
+    Examples:
+        >>> dwavebinarycsp.merge_assignments([{'a': 1, 'b': 1}, {'c': 0}])
+        {'a': 1, 'b': 1, 'c': 0}
+
+    """
+    merged = {}
+    for assignment in assignments:
+        for v, value in assignment.items():
+            if merged.setdefault(v, value) != value:
+                raise ValueError("variable {} is assigned both {} and {}".format(v, merged[v], value))
+    return merged
@@ -0,0 +1,309 @@
+# Copyright 2018 D-Wave Systems Inc.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License");
+#    you may not use this file except in compliance with the License.
+#    You may obtain a copy of the License at
+#
+#        http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS,
+#    WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#    See the License for the specific language governing permissions and
+#    limitations under the License.
+
+"""
+Variable elimination over the configuration tables of a constraint satisfaction problem. The
+variables are summed out one at a time, so the runtime and memory are exponential only in the
+induced width of the constraint graph under the elimination order.
+"""
+import heapq
+import itertools
+import random
+
+from collections import defaultdict
+
+import dimod
+import numpy as np
+
+from dwavebinarycsp.exceptions import UnsatError
+
+__all__ = ['count_solutions', 'iter_solutions', 'sample_solutions', 'elimination_order']
+
+
+def elimination_order(csp, heuristic='min-fill'):
+    """Find an order in which to eliminate the variables of a constraint satisfaction problem.
+
+    Args:
+        csp (:obj:`.ConstraintSatisfactionProblem`):
+            Constraint satisfaction problem.
+
+        heuristic (str, optional, default='min-fill'):
+            Greedy heuristic, either 'min-fill', which eliminates the variable that adds the
+            fewest edges between its neighbours, or 'min-degree', which eliminates the variable
+            with the fewest neighbours. Ties are broken by degree and then by the order of
+            :attr:`.ConstraintSatisfactionProblem.variables`.
+
+    Returns:
+        tuple: (order, width) 2-tuple, where `order` is a list of the variables and `width` is the
+        induced width of the constraint graph under that order.
+
+    """
+    if heuristic not in ('min-fill', 'min-degree'):
+        raise ValueError("unknown heuristic {!r}, expected 'min-fill' or 'min-degree'".format(heuristic))
+
+    adj = {v: set() for v in csp.variables}
+    for const in csp.constraints:
+        for u in const.variables:
+            adj[u].update(w for w in const.variables if w != u)
+
+    def score(v):
+        neighbours = adj[v]
+        if heuristic == 'min-degree':
+            return len(neighbours), 0
+        # the number of missing edges between the neighbours
+        neighbours = list(neighbours)
+        fill = sum(1 for i, u in enumerate(neighbours) for w in neighbours[i + 1:] if w not in adj[u])
+        return fill, len(neighbours)
+
+    # a heap with lazy deletion, entries are stale when their version is not the current one
+    version = {v: 0 for v in adj}
+    heap = [(score(v), pos, 0, v) for pos, v in enumerate(adj)]
+    heapq.heapify(heap)
+    tiebreak = len(heap)
+
+    order = []
+    width = 0
+    while heap:
+        _, _, ver, v = heapq.heappop(heap)
+        if v not in adj or ver != version[v]:
+            continue
+
+        neighbours = adj.pop(v)
+        order.append(v)
+        width = max(width, len(neighbours))
+
+        for u in neighbours:
+            adj[u].discard(v)
+            adj[u].update(w for w in neighbours if w != u)
+
+        # the neighbours' scores change, and for min-fill so do the scores of their neighbours
+        changed = set(neighbours)
+        if heuristic == 'min-fill':
+            for u in neighbours:
+                changed.update(adj[u])
+        for u in changed:
+            version[u] += 1
+            heapq.heappush(heap, (score(u), tiebreak, version[u], u))
+            tiebreak += 1
+
+    return order, width
+
+
+def count_solutions(csp, order='min-fill'):
+    """Count the solutions of a constraint satisfaction problem.
+
+    Args:
+        csp (:obj:`.ConstraintSatisfactionProblem`):
+            Constraint satisfaction problem.
+
+        order (list/str, optional, default='min-fill'):
+            Elimination order as a list of all of the variables, or the heuristic used by
+            :func:`.elimination_order` to find one.
+
+    Returns:
+        int: Number of assignments of the variables that satisfy all of the constraints.
+
+    Examples:
+        This example counts the solutions of a 3x3 bit multiplication circuit, one for
+        each pair of multiplicands.
+
+        >>> csp = dwavebinarycsp.factories.multiplication_circuit(3)
+        >>> dwavebinarycsp.solvers.count_solutions(csp)
+        64
+
+    """
+    return _Elimination(csp, order, keep_buckets=False).count
+
+
+def iter_solutions(csp, order='min-fill'):
+    """Iterate over the solutions of a constraint satisfaction problem.
+
+    Solutions are found without backtracking, the elimination pass determines which partial
+    assignments extend to a solution.
+
+    Args:
+        csp (:obj:`.ConstraintSatisfactionProblem`):
+            Constraint satisfaction problem.
+
+        order (list/str, optional, default='min-fill'):
+            Elimination order as a list of all of the variables, or the heuristic used by
+            :func:`.elimination_order` to find one.
+
+    Yields:
+        dict: Solutions as dicts, where keys are the variables of the constraint satisfaction
+        problem.
+
+    """
+    elimination = _Elimination(csp, order)
+    if not elimination.count:
+        return
+
+    values = (-1, 1) if csp.vartype is dimod.SPIN else (0, 1)
+    buckets = elimination.buckets[::-1]
+
+    assignment = {}
+    stack = [(0, None)]  # (bucket position, bits left to try)
+    while stack:
+        pos, bits = stack.pop()
+
+        if pos == len(buckets):
+            yield {v: values[bit] for v, bit in assignment.items()}
+            continue
+
+        v, scope, array = buckets[pos]
+        if bits is None:
+            counts = array[(slice(None),) + tuple(assignment[u] for u in scope[1:])]
+            bits = [bit for bit in (1, 0) if counts[bit]]
+
+        if bits:
+            assignment[v] = bits.pop()
+            stack.append((pos, bits))
+            stack.append((pos + 1, None))
+        else:
+            assignment.pop(v, None)
+
+
+def sample_solutions(csp, num_reads=1, seed=None, order='min-fill'):
+    """Sample uniformly from the solutions of a constraint satisfaction problem.
+
+    Args:
+        csp (:obj:`.ConstraintSatisfactionProblem`):
+            Constraint satisfaction problem.
+
+        num_reads (int, optional, default=1):
+            Number of samples.
+
+        seed (int, optional):
+            Seed for the random number generator.
+
+        order (list/str, optional, default='min-fill'):
+            Elimination order as a list of all of the variables, or the heuristic used by
+            :func:`.elimination_order` to find one.
+
+    Returns:
+        :obj:`dimod.SampleSet`: Independent, uniformly distributed solutions, each with an
+        energy of 0.
+
+    Raises:
+        :exc:`~dwavebinarycsp.exceptions.UnsatError`: If the constraint satisfaction problem
+        has no solutions.
+
+    """
+    elimination = _Elimination(csp, order)
+    if not elimination.count:
+        raise UnsatError("the constraint satisfaction problem has no solutions")
+
+    rng = random.Random(seed)
+    buckets = elimination.buckets[::-1]
+
+    labels = [v for v, _, _ in buckets]
+    samples = np.empty((num_reads, len(labels)), dtype=np.int8)
+    for read in range(num_reads):
+        assignment = {}
+        for v, scope, array in buckets:
+            counts = array[(slice(None),) + tuple(assignment[u] for u in scope[1:])]
+            zeros, ones = int(counts[0]), int(counts[1])
+            assignment[v] = int(rng.randrange(zeros + ones) >= zeros)
+        samples[read] = [assignment[v] for v in labels]
+
+    if csp.vartype is dimod.SPIN:
+        samples = 2 * samples - 1
+
+    return dimod.SampleSet.from_samples((samples, labels), csp.vartype, energy=np.zeros(num_reads))
+
+
+class _Elimination(object):
+    # Sum out the variables in order. The bucket of a variable is the product of the factors
+    # that contain it when it is eliminated, with the variable as the first axis, each entry
+    # counting the completions of the previously eliminated variables.
+
+    def __init__(self, csp, order='min-fill', keep_buckets=True):
+        if isinstance(order, str):
+            order, _ = elimination_order(csp, order)
+        elif set(order) != set(csp.variables) or len(order) != len(csp.variables):
+            raise ValueError("order must contain every variable of the constraint satisfaction problem once")
+
+        # counts are bounded by 2**num_variables, beyond int64 they are kept as python ints
+        dtype = np.int64 if len(order) < 63 else object
+
+        factors = {}  # key -> (scope, array)
+        containing = defaultdict(set)  # variable -> keys of the factors that contain it
+        keys = itertools.count()
+
+        def add(scope, array):
+            # add a factor, returning the multiplier if it has no variables left
+            if not scope:
+                return int(array)
+            key = next(keys)
+            factors[key] = (scope, array)
+            for u in scope:
+                containing[u].add(key)
+            return 1
+
+        count = 1
+        for const in csp.constraints:
+            count *= add(*_constraint_factor(const, dtype))
+
+        self.buckets = []
+        for v in order:
+            bucket = []
+            for key in containing.pop(v, ()):
+                scope, array = factors.pop(key)
+                for u in scope:
+                    if u != v:
+                        containing[u].discard(key)
+                bucket.append((scope, array))
+
+            # v first, so the variables that have no constraints left still get a bucket
+            scope, array = _product([((v,), np.ones(2, dtype=dtype))] + bucket, dtype)
+
+            if keep_buckets:
+                self.buckets.append((v, scope, array))
+
+            count *= add(scope[1:], array.sum(axis=0))
+
+            if not count:
+                break
+
+        self.count = int(count)
+
+
+def _constraint_factor(const, dtype):
+    # the constraint as a 0/1 array with one axis per distinct variable
+    variables = const.variables
+    scope = tuple(dict.fromkeys(variables))
+    first = [variables.index(v) for v in variables]
+
+    bits = const.table.to_bits()
+    keep = np.all(bits == bits[:, first], axis=1)  # repeated variables take the same value
+
+    array = np.zeros((2,) * len(scope), dtype=dtype)
+    array[tuple(bits[keep][:, [variables.index(v) for v in scope]].T)] = 1
+    return scope, array
+
+
+def _product(factors, dtype):
+    # multiply the factors by broadcasting each over the union of their scopes
+    scope = tuple(dict.fromkeys(v for s, _ in factors for v in s))
+    position = {v: i for i, v in enumerate(scope)}
+
+    result = np.ones((1,) * len(scope), dtype=dtype)
+    for s, array in factors:
+        axes = sorted(range(len(s)), key=lambda i: position[s[i]])
+        shape = [1] * len(scope)
+        for v in s:
+            shape[position[v]] = 2
+        result = result * array.transpose(axes).reshape(shape)
+    return scope, result
+
@@ -0,0 +1,174 @@
+# Copyright 2018 D-Wave Systems Inc.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License");
+#    you may not use this file except in compliance with the License.
+#    You may obtain a copy of the License at
+#
+#        http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS,
+#    WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#    See the License for the specific language governing permissions and
+#    limitations under the License.
+
+"""
+Exact solvers that search the configuration tables of a constraint satisfaction problem
+directly, without compiling it to a binary quadratic model.
+"""
+import functools
+import itertools
+import operator
+
+from collections import defaultdict
+
+import dimod
+
+__all__ = ['backtrack']
+
+
+def backtrack(csp, num_solutions=1):
+    """Find solutions of a constraint satisfaction problem by backtracking search.
+
+    The search assigns one variable at a time, keeping for every constraint only the
+    configurations that agree with the assignment so far (forward checking). Variables that
+    a constraint's remaining configurations force to a single value are assigned
+    immediately, so the next free variable always has the minimum remaining values. Ties
+    are broken by the number of constraints the variable appears in.
+
+    Args:
+        csp (:obj:`.ConstraintSatisfactionProblem`):
+            Constraint satisfaction problem.
+
+        num_solutions (int/None, optional, default=1):
+            Maximum number of solutions to return. If None, all of the solutions are returned.
+
+    Returns:
+        list[dict]: Solutions as dicts, where keys are the variables of the constraint
+        satisfaction problem. An empty list if there is no solution.
+
+    Examples:
+        This example finds the factors of 15 with a 3x3 bit multiplication circuit.
+
+        >>> csp = dwavebinarycsp.factories.multiplication_circuit(3)
+        >>> fixed = csp.fix_variables({'p0': 1, 'p1': 1, 'p2': 1, 'p3': 1, 'p4': 0, 'p5': 0})
+        >>> solutions = dwavebinarycsp.solvers.backtrack(csp, num_solutions=None)
+        >>> solutions = [dict(fixed, **s) for s in solutions]  # with the propagated values
+        >>> sorted(sum(s['a%d' % i] << i for i in range(3)) for s in solutions)
+        [3, 5]
+
+    """
+    solutions = _Search(csp).solutions()
+    return list(itertools.islice(solutions, num_solutions))
+
+
+class _Search(object):
+    # depth-first search over the rows of the configuration tables, undoing changes with a trail
+
+    def __init__(self, csp):
+        self.values = (-1, 1) if csp.vartype is dimod.SPIN else (0, 1)
+
+        self.scopes = [const.variables for const in csp.constraints]
+        self.rows = [list(const.table) for const in csp.constraints]
+
+        # for each variable, the constraints it appears in and the shift of its bit in their rows
+        self.occurrences = occurrences = defaultdict(list)
+        for c, scope in enumerate(self.scopes):
+            for col, v in enumerate(scope):
+                occurrences[v].append((c, len(scope) - 1 - col))
+
+        # static tie-breaking order, most constrained first
+        self.order = sorted(csp.variables, key=lambda v: len(occurrences[v]), reverse=True)
+
+        self.assignment = {}  # variable -> bit
+        self.trail = []  # (None, variable) for an assignment or (constraint, rows) for a reduction
+
+    def undo(self, mark):
+        trail = self.trail
+        while len(trail) > mark:
+            c, item = trail.pop()
+            if c is None:
+                del self.assignment[item]
+            else:
+                self.rows[c] = item
+
+    def assign(self, queue):
+        # assign the (variable, bit) pairs in queue and everything they force, False on a conflict
+        assignment = self.assignment
+        rows = self.rows
+        trail = self.trail
+
+        while queue:
+            v, bit = queue.pop()
+
+            if v in assignment:
+                if assignment[v] != bit:
+                    return False
+                continue
+            assignment[v] = bit
+            trail.append((None, v))
+
+            for c, shift in self.occurrences[v]:
+                current = rows[c]
+                kept = [row for row in current if (row >> shift) & 1 == bit]
+                if not kept:
+                    return False
+                if len(kept) == len(current):
+                    continue
+                trail.append((c, current))
+                rows[c] = kept
+
+                queue.extend(_forced(kept, self.scopes[c], assignment))
+
+        return True
+
+    def solutions(self):
+        # variables forced before anything is assigned
+        queue = []
+        for c, scope in enumerate(self.scopes):
+            if not self.rows[c]:
+                return
+            queue.extend(_forced(self.rows[c], scope, self.assignment))
+        if not self.assign(queue):
+            return
+
+        order = self.order
+        assignment = self.assignment
+        values = self.values
+
+        stack = []  # (order index, variable, trail mark, bits left to try)
+        i = 0
+        while True:
+            # every variable before i in the order is assigned
+            while i < len(order) and order[i] in assignment:
+                i += 1
+
+            if i == len(order):
+                yield {v: values[assignment[v]] for v in order}
+            else:
+                stack.append((i, order[i], len(self.trail), [1, 0]))
+
+            while stack:
+                i, v, mark, bits = stack[-1]
+                self.undo(mark)
+                if not bits:
+                    stack.pop()
+                elif self.assign([(v, bits.pop())]):
+                    break
+            else:
+                return
+
+
+def _forced(rows, scope, assignment):
+    # the unassigned variables that take the same value in every row
+    ones = functools.reduce(operator.and_, rows)
+    anys = functools.reduce(operator.or_, rows)
+    shift = len(scope)
+    for u in scope:
+        shift -= 1
+        if u in assignment:
+            continue
+        if (ones >> shift) & 1:
+            yield u, 1
+        elif not (anys >> shift) & 1:
+            yield u, 0
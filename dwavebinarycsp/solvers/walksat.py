@@ -0,0 +1,226 @@
+# Copyright 2018 D-Wave Systems Inc.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License");
+#    you may not use this file except in compliance with the License.
+#    You may obtain a copy of the License at
+#
+#        http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS,
+#    WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#    See the License for the specific language governing permissions and
+#    limitations under the License.
+
+"""
+A stochastic local search sampler that works on the constraints of a constraint satisfaction
+problem directly, without compiling it to a binary quadratic model.
+"""
+import random
+
+import dimod
+import numpy as np
+
+__all__ = ['WalkSATSampler']
+
+
+class WalkSATSampler(object):
+    """WalkSAT-style local search over the constraints of a constraint satisfaction problem.
+
+    Each read starts from a random (or given) assignment and repeatedly picks a violated
+    constraint at random, then flips one of its variables. If a flip reduces the number of
+    violated constraints, the best such flip is made. Otherwise, with probability `noise` a
+    random variable of the constraint is flipped, and else the one that increases the number
+    of violated constraints the least. The variable flipped last is not flipped straight back
+    unless it is the only variable of the constraint. The sampler follows the dimod
+    :class:`~dimod.Sampler` conventions for :attr:`parameters`, :attr:`properties` and
+    :meth:`sample`, but samples a :obj:`.ConstraintSatisfactionProblem` rather than a
+    binary quadratic model.
+
+    Examples:
+        This example samples a random 2-in-4 satisfiability problem.
+
+        >>> csp = dwavebinarycsp.factories.random_2in4sat(8, 4)
+        >>> sampleset = dwavebinarycsp.solvers.WalkSATSampler().sample(csp, num_reads=2, seed=5)
+        >>> bool(sampleset.record.is_feasible.all())
+        True
+
+    """
+
+    parameters = {'num_reads': [],
+                  'max_flips': [],
+                  'noise': [],
+                  'initial_states': [],
+                  'seed': []}
+    """dict: Keyword arguments accepted by :meth:`sample`."""
+
+    properties = {}
+    """dict: Empty, the sampler has no properties."""
+
+    def sample(self, csp, num_reads=None, max_flips=10000, noise=.5, initial_states=None, seed=None):
+        """Sample from a constraint satisfaction problem.
+
+        Args:
+            csp (:obj:`.ConstraintSatisfactionProblem`):
+                Constraint satisfaction problem.
+
+            num_reads (int, optional):
+                Number of reads, each an independent restart. Defaults to the number of
+                initial states if given, otherwise to 1.
+
+            max_flips (int, optional, default=10000):
+                Maximum number of variable flips in each read.
+
+            noise (float, optional, default=0.5):
+                Probability of flipping a random variable of the chosen violated constraint
+                when no flip reduces the number of violated constraints.
+
+            initial_states (samples_like, optional):
+                Assignments to start the reads from, for example to post-process samples from
+                another sampler. Variables without a value start at random. If there are
+                fewer initial states than reads, the remaining reads start at random.
+
+            seed (int, optional):
+                Seed for the random number generator.
+
+        Returns:
+            :obj:`dimod.SampleSet`: The assignment with the fewest violated constraints found
+            in each read. The energy is the number of violated constraints, and the
+            `is_feasible` field is True for samples that satisfy all of the constraints.
+
+        """
+        rng = random.Random(seed)
+
+        labels = list(csp.variables)
+        state = _State(csp, labels)
+
+        starts = []
+        if initial_states is not None:
+            samples, sample_labels = dimod.as_samples(initial_states)
+            columns = [(state.index[v], col) for col, v in enumerate(sample_labels) if v in state.index]
+            for sample in (samples > 0).tolist():
+                starts.append({idx: int(sample[col]) for idx, col in columns})
+
+        if num_reads is None:
+            num_reads = len(starts) or 1
+
+        samples = np.empty((num_reads, len(labels)), dtype=np.int8)
+        violations = np.empty(num_reads, dtype=int)
+        for read in range(num_reads):
+            bits = [rng.randrange(2) for _ in labels]
+            if read < len(starts):
+                for idx, bit in starts[read].items():
+                    bits[idx] = bit
+
+            best, num_violations = state.search(bits, max_flips, noise, rng)
+
+            samples[read] = best
+            violations[read] = num_violations
+
+        if csp.vartype is dimod.SPIN:
+            samples = 2 * samples - 1
+
+        return dimod.SampleSet.from_samples((samples, labels), csp.vartype, energy=violations,
+                                            is_feasible=violations == 0)
+
+
+class _State(object):
+    # the constraints as integer rows over variable indices, so that a flip is a single xor
+
+    def __init__(self, csp, labels):
+        self.index = index = {v: idx for idx, v in enumerate(labels)}
+
+        # share the lookup sets between constraints that share a table
+        lookups = {}
+        self.tables = tables = []
+        self.scopes = scopes = []
+        for const in csp.constraints:
+            table = const.table
+            if id(table) not in lookups:
+                lookups[id(table)] = frozenset(table)
+            tables.append(lookups[id(table)])
+            scopes.append([index[v] for v in const.variables])
+
+        # for each variable, the constraints it appears in and the mask of its bit in their rows
+        self.occurrences = occurrences = [[] for _ in labels]
+        for c, scope in enumerate(scopes):
+            for col, idx in enumerate(scope):
+                occurrences[idx].append((c, 1 << (len(scope) - 1 - col)))
+
+        # the variables of each constraint, each once
+        self.candidates = [list(dict.fromkeys(scope)) for scope in scopes]
+
+    def search(self, bits, max_flips, noise, rng):
+        tables = self.tables
+        occurrences = self.occurrences
+        candidates = self.candidates
+
+        rows = []
+        for scope in self.scopes:
+            row = 0
+            for idx in scope:
+                row = (row << 1) | bits[idx]
+            rows.append(row)
+
+        # violated constraints in a list with their positions, for O(1) random choice and removal
+        violated = [c for c, row in enumerate(rows) if row not in tables[c]]
+        position = {c: pos for pos, c in enumerate(violated)}
+
+        # rather than copying the assignment at every improvement, keep the flips made since
+        # the best one and undo them at the end
+        best_violations = len(violated)
+        since_best = []
+
+        last = None  # the variable flipped last, not flipped back straight away
+
+        for _ in range(max_flips):
+            if not violated:
+                break
+
+            c = violated[rng.randrange(len(violated))]
+
+            # the change in the number of violated constraints for each candidate flip, its break
+            # count (satisfied constraints it would violate) less its make count (violated
+            # constraints it would satisfy)
+            choices = [idx for idx in candidates[c] if idx != last] or candidates[c]
+            deltas = []
+            for idx in choices:
+                delta = 0
+                for d, mask in occurrences[idx]:
+                    if (rows[d] ^ mask in tables[d]) == (d in position):
+                        delta += -1 if d in position else 1
+                deltas.append(delta)
+
+            best = min(deltas)
+            if best >= 0 and rng.random() < noise:
+                idx = rng.choice(choices)
+            else:
+                idx = rng.choice([idx for idx, delta in zip(choices, deltas) if delta == best])
+            last = idx
+
+            # flip, updating the rows and the violated constraints of its neighbours
+            bits[idx] ^= 1
+            for d, mask in occurrences[idx]:
+                row = rows[d] = rows[d] ^ mask
+                satisfied = row in tables[d]
+                if satisfied and d in position:
+                    # swap-remove
+                    pos = position.pop(d)
+                    moved = violated.pop()
+                    if moved != d:
+                        violated[pos] = moved
+                        position[moved] = pos
+                elif not satisfied and d not in position:
+                    position[d] = len(violated)
+                    violated.append(d)
+
+            if len(violated) < best_violations:
+                best_violations = len(violated)
+                since_best.clear()
+            else:
+                since_best.append(idx)
+
+        for idx in since_best:
+            bits[idx] ^= 1
+
+        return bits, best_violations
@@ -16,8 +16,11 @@ import unittest
 import operator
 import itertools
 
+import numpy as np
+
 import dwavebinarycsp
 import dwavebinarycsp.testing as dcspt
+from dwavebinarycsp.core.table import ConfigurationTable
 
 
 class TestConstraint(unittest.TestCase):
@@ -36,6 +39,90 @@ class TestConstraint(unittest.TestCase):
         self.assertEqual(const.configurations, frozenset([(-1, -1), (1, 1)]))
         self.assertEqual(('a', 'b'), const.variables)
 
+    def test_from_func_vectorized(self):
+        const = dwavebinarycsp.Constraint.from_func(operator.eq, ['a', 'b'], dwavebinarycsp.SPIN,
+                                                    vectorized=True)
+
+        dcspt.assert_consistent_constraint(const)
+
+        self.assertEqual(const.configurations, frozenset([(-1, -1), (1, 1)]))
+        self.assertEqual(('a', 'b'), const.variables)
+
+    def test_from_func_vectorized_chunks(self):
+        def parity(*args):
+            return sum(args) % 2 == 0
+
+        # more assignments than a single chunk
+        variables = range(18)
+        const = dwavebinarycsp.Constraint.from_func(parity, variables, dwavebinarycsp.BINARY,
+                                                    vectorized=True)
+
+        self.assertEqual(len(const.table), 1 << 17)
+        self.assertTrue(const.check({v: 1 for v in variables}))
+        self.assertFalse(const.check({v: int(v == 3) for v in variables}))
+
+    def test_from_func_vectorized_empty(self):
+        const = dwavebinarycsp.Constraint.from_func(lambda: True, [], dwavebinarycsp.BINARY, vectorized=True)
+        self.assertEqual(const.configurations, frozenset([tuple()]))
+
+    def test_from_func_lazy(self):
+        const = dwavebinarycsp.Constraint.from_func(operator.ne, ['a', 'b'], dwavebinarycsp.SPIN, lazy=True)
+
+        self.assertIsNone(const._table)  # not yet enumerated
+        self.assertTrue(const.check({'a': -1, 'b': 1}))
+        self.assertFalse(const.check({'a': 1, 'b': 1}))
+        self.assertEqual(const.check_samples(([[1, 1], [1, -1]], 'ab')).tolist(), [False, True])
+        self.assertIsNone(const._table)
+
+        dcspt.assert_consistent_constraint(const)
+        self.assertEqual(const.configurations, frozenset([(-1, 1), (1, -1)]))
+        self.assertIsNotNone(const._table)
+
+    def test_from_func_lazy_fix_flip(self):
+        def f(a, b, c, d):
+            return (a, b, c, d) in {(0, 1, 1, 0), (1, 1, 0, 0), (0, 0, 1, 1)}
+
+        for vectorized in (False, True):
+            if vectorized:
+                func = np.vectorize(f)
+            else:
+                func = f
+
+            lazy = dwavebinarycsp.Constraint.from_func(func, 'abcd', dwavebinarycsp.BINARY,
+                                                       lazy=True, vectorized=vectorized)
+            eager = dwavebinarycsp.Constraint.from_func(f, 'abcd', dwavebinarycsp.BINARY)
+
+            for const in (lazy, eager):
+                const.flip_variable('b')
+                const.fix_variable('c', 1)
+                const.flip_variable('d')
+                const.fix_variable('b', 0)
+
+            self.assertIsNone(lazy._table)
+            for a, d in itertools.product((0, 1), repeat=2):
+                self.assertEqual(lazy.check({'a': a, 'd': d}), eager.check({'a': a, 'd': d}))
+
+            self.assertEqual(lazy, eager)
+            dcspt.assert_consistent_constraint(lazy)
+
+    def test_from_func_lazy_unsat(self):
+        const = dwavebinarycsp.Constraint.from_func(operator.eq, ['a', 'b'], dwavebinarycsp.BINARY, lazy=True)
+        const.fix_variable('a', 0)
+        const.flip_variable('b')
+        const.fix_variable('b', 0)  # no error raised until the configurations are needed
+
+        with self.assertRaises(dwavebinarycsp.exceptions.UnsatError):
+            const.configurations
+
+    def test_from_func_lazy_copy(self):
+        const = dwavebinarycsp.Constraint.from_func(operator.eq, ['a', 'b'], dwavebinarycsp.BINARY, lazy=True)
+        new = const.copy()
+        new.fix_variable('a', 1)
+
+        self.assertEqual(const.variables, ('a', 'b'))
+        self.assertTrue(const.check({'a': 0, 'b': 0}))
+        self.assertFalse(new.check({'b': 0}))
+
     def test_from_configurations(self):
         const = dwavebinarycsp.Constraint.from_configurations([(-1, 1), (1, 1)], ['a', 'b'], dwavebinarycsp.SPIN)
 
@@ -44,6 +131,18 @@ class TestConstraint(unittest.TestCase):
         self.assertEqual(const.configurations, frozenset([(-1, 1), (1, 1)]))
         self.assertEqual(const.variables, ('a', 'b'))
 
+    def test_check_samples(self):
+        const = dwavebinarycsp.Constraint.from_func(operator.ne, ['a', 'b'], dwavebinarycsp.SPIN)
+
+        samples = list(itertools.product([-1, 1], repeat=3))
+
+        feasible = const.check_samples((samples, ['c', 'b', 'a']))
+        expected = [const.check(dict(zip('cba', sample))) for sample in samples]
+        self.assertEqual(feasible.tolist(), expected)
+
+        with self.assertRaises(KeyError):
+            const.check_samples(([[1, 1]], ['a', 'c']))
+
     def test_fix_variable(self):
         const = dwavebinarycsp.Constraint.from_configurations([(-1, 1), (1, 1)], ['a', 'b'], dwavebinarycsp.SPIN)
 
@@ -70,8 +169,27 @@ class TestConstraint(unittest.TestCase):
 
         self.assertEqual(const.variables, ('a', 'b', 'c', 'd'))
 
-        self.assertTrue(const.check({'a': 0, 'b': 0, 'c': 0, 'd': 0}))  # only eq_a_b is satisfied
-        self.assertFalse(const.check({'a': 1, 'b': 0, 'c': 0, 'd': 0}))  # neither satisified
+        self.assertTrue(const.check({'a': -1, 'b': -1, 'c': -1, 'd': -1}))  # only eq_a_b is satisfied
+        self.assertFalse(const.check({'a': 1, 'b': -1, 'c': -1, 'd': -1}))  # neither satisified
+
+    def test_check_out_of_domain(self):
+        spin = dwavebinarycsp.Constraint.from_configurations([(-1, 1), (1, -1)], 'ab', dwavebinarycsp.SPIN)
+        self.assertTrue(spin.check({'a': -1, 'b': 1}))
+        self.assertFalse(spin.check({'a': 0, 'b': 1}))  # 0 is not -1
+        self.assertFalse(spin.func(0, 1))
+
+        binary = dwavebinarycsp.Constraint.from_configurations([(0, 1), (1, 0)], 'ab', dwavebinarycsp.BINARY)
+        self.assertTrue(binary.check({'a': 0, 'b': 1}))
+        self.assertFalse(binary.check({'a': 0, 'b': 2}))  # 2 is not 1
+        self.assertFalse(binary.check({'a': -1, 'b': 1}))
+
+        samples = ([[0, 1], [0, 2], [-1, 1], [1, 0]], 'ab')
+        np.testing.assert_array_equal(binary.check_samples(samples), [True, False, False, True])
+
+        csp = dwavebinarycsp.ConstraintSatisfactionProblem(dwavebinarycsp.BINARY)
+        csp.add_constraint(binary)
+        np.testing.assert_array_equal(csp.check_samples(samples), [True, False, False, True])
+        self.assertFalse(csp.check({'a': 0, 'b': 2}))
 
     def test__or__(self):
         eq_a_b = dwavebinarycsp.Constraint.from_func(operator.eq, ['a', 'b'], dwavebinarycsp.SPIN)
@@ -83,9 +201,9 @@ class TestConstraint(unittest.TestCase):
 
         self.assertEqual(const.variables, ('a', 'b', 'c'))
 
-        self.assertTrue(const.check({'a': 0, 'b': 0, 'c': 0}))  # only eq_a_b is satisfied
-        self.assertFalse(const.check({'a': 1, 'b': 0, 'c': 0}))  # neither satisfied
-        self.assertTrue(const.check({'a': 0, 'b': 1, 'c': 0}))  # only ne_b_c is satisfied
+        self.assertTrue(const.check({'a': -1, 'b': -1, 'c': -1}))  # only eq_a_b is satisfied
+        self.assertFalse(const.check({'a': 1, 'b': -1, 'c': -1}))  # neither satisfied
+        self.assertTrue(const.check({'a': -1, 'b': 1, 'c': -1}))  # only ne_b_c is satisfied
 
     def test__and__disjoint(self):
         eq_a_b = dwavebinarycsp.Constraint.from_func(operator.eq, ['a', 'b'], dwavebinarycsp.SPIN)
@@ -110,6 +228,36 @@ class TestConstraint(unittest.TestCase):
         self.assertEqual(const.configurations, frozenset([(-1, -1, 1), (1, 1, -1)]))
         self.assertEqual(const.variables, ('a', 'b', 'c'))
 
+    def test__and__circuit(self):
+        csp = dwavebinarycsp.factories.multiplication_circuit(3)
+
+        const = csp.constraints[0]
+        for other in csp.constraints[1:]:
+            const = const & other
+
+        # one configuration for every pair of multiplicands
+        self.assertEqual(len(const.table), 64)
+        for config in const.configurations:
+            self.assertTrue(csp.check(dict(zip(const.variables, config))))
+
+    def test__or__shared_reordered(self):
+        ab = dwavebinarycsp.Constraint.from_configurations([(0, 1)], ['a', 'b'], dwavebinarycsp.BINARY)
+        cba = dwavebinarycsp.Constraint.from_configurations([(1, 1, 0)], ['c', 'b', 'a'], dwavebinarycsp.BINARY)
+
+        const = ab | cba
+
+        dcspt.assert_consistent_constraint(const)
+
+        self.assertEqual(const.variables, ('a', 'b', 'c'))
+        self.assertEqual(const.configurations, frozenset([(0, 1, 0), (0, 1, 1)]))
+
+    def test__and__unsat(self):
+        eq = dwavebinarycsp.Constraint.from_func(operator.eq, ['a', 'b'], dwavebinarycsp.BINARY)
+        ne = dwavebinarycsp.Constraint.from_func(operator.ne, ['b', 'a'], dwavebinarycsp.BINARY)
+
+        with self.assertRaises(ValueError):
+            eq & ne
+
     def test_negate_variables_binary(self):
         const = dwavebinarycsp.Constraint.from_configurations([(0, 1), (1, 0)], ['a', 'b'], vartype=dwavebinarycsp.BINARY)
 
@@ -141,6 +289,25 @@ class TestConstraint(unittest.TestCase):
 
         self.assertEqual(const.configurations, frozenset([(1, 1, 0), (0, 0, 1)]))
 
+    def test_flip_variable_check_cost(self):
+        fresh = dwavebinarycsp.factories.xor_gate(['a', 'b', 'c'])
+        flipped = dwavebinarycsp.factories.xor_gate(['a', 'b', 'c'])
+        for _ in range(500):
+            flipped.flip_variable('a')  # even number of flips, same table as fresh
+
+        # the flips are applied to the table, checking does not go through a chain of functions
+        self.assertIsNone(flipped._func)
+        self.assertEqual(flipped.table, fresh.table)
+        self.assertEqual(fresh.configurations, flipped.configurations)
+
+        # a lazy constraint keeps the function it was given, with the flipped positions
+        lazy = dwavebinarycsp.Constraint.from_func(operator.eq, ['a', 'b'], dwavebinarycsp.BINARY, lazy=True)
+        for _ in range(501):
+            lazy.flip_variable('a')
+        self.assertIs(lazy._func.func, operator.eq)
+        self.assertEqual(lazy._func.flipped, frozenset([0]))
+        self.assertTrue(lazy.check({'a': 1, 'b': 0}))
+
     def test_negate_variables_spi(self):
         const = dwavebinarycsp.Constraint.from_configurations([(-1, 1), (1, -1)], ['a', 'b'], vartype=dwavebinarycsp.SPIN)
 
@@ -198,6 +365,56 @@ class TestConstraint(unittest.TestCase):
         self.assertEqual(const, new_const)
         self.assertIsNot(const, new_const)
 
+    def test_change_vartype(self):
+        const = dwavebinarycsp.Constraint.from_func(operator.ne, ['a', 'b'], dwavebinarycsp.BINARY)
+
+        spin = const.change_vartype(dwavebinarycsp.SPIN, inplace=False)
+        dcspt.assert_consistent_constraint(spin)
+        self.assertIs(const.vartype, dwavebinarycsp.BINARY)
+        self.assertEqual(spin.configurations, frozenset([(-1, 1), (1, -1)]))
+
+        binary = spin.change_vartype('BINARY')
+        self.assertIs(binary, spin)
+        self.assertEqual(binary, const)
+
+    def test_change_vartype_lazy(self):
+        const = dwavebinarycsp.Constraint.from_func(lambda a, b, c: a + b == c, 'abc', dwavebinarycsp.BINARY,
+                                                    lazy=True)
+        const.flip_variable('c')
+        const.change_vartype(dwavebinarycsp.SPIN)
+        const.fix_variable('b', -1)
+
+        self.assertIsNone(const._table)
+        # a + 0 == NOT c
+        self.assertTrue(const.check({'a': -1, 'c': 1}))
+        self.assertTrue(const.check({'a': 1, 'c': -1}))
+        self.assertFalse(const.check({'a': 1, 'c': 1}))
+
+        dcspt.assert_consistent_constraint(const)
+        self.assertEqual(const.configurations, frozenset([(-1, 1), (1, -1)]))
+
+    def test__set_table(self):
+        const = dwavebinarycsp.Constraint.from_func(operator.eq, 'ab', dwavebinarycsp.SPIN, lazy=True)
+        table = dwavebinarycsp.Constraint.from_configurations([(1, 1)], 'ab', dwavebinarycsp.SPIN).table
+
+        const._set_table(table)
+        self.assertIs(const.table, table)
+        self.assertFalse(const.check({'a': -1, 'b': -1}))  # the function is not used
+        dcspt.assert_consistent_constraint(const)
+
+        with self.assertRaises(ValueError):
+            const._set_table(table.take([0]))
+        with self.assertRaises(dwavebinarycsp.exceptions.UnsatError):
+            const._set_table(ConfigurationTable([], 2))
+
+    def test_projection_order(self):
+        const = dwavebinarycsp.Constraint.from_configurations([(0, 0, 1), (0, 1, 1), (1, 1, 0)], 'abc',
+                                                              dwavebinarycsp.BINARY)
+
+        proj = const.projection(['c', 'a'])  # variables keep their order in the constraint
+        self.assertEqual(proj.variables, ('a', 'c'))
+        self.assertEqual(proj.configurations, frozenset([(0, 1), (1, 0)]))
+
     def test_projection_identity(self):
         const = dwavebinarycsp.Constraint.from_func(operator.eq, ['a', 'b'], dwavebinarycsp.SPIN)
 
@@ -220,3 +437,55 @@ class TestConstraint(unittest.TestCase):
 
         self.assertEqual(const.projection(['b']), b)
         self.assertEqual(const.projection(['a']), a)
+
+    def test_canonical_relabel(self):
+        and1 = dwavebinarycsp.factories.and_gate(['a', 'b', 'c'])
+        and2 = dwavebinarycsp.factories.and_gate(['y', 'x', 'z'], vartype=dwavebinarycsp.SPIN)
+
+        key1, mapping1 = and1.canonical()
+        key2, mapping2 = and2.canonical()
+
+        self.assertEqual(key1, key2)
+        self.assertEqual(hash(key1), hash(key2))
+        self.assertEqual([v for v, _ in mapping2], ['y', 'x', 'z'])
+
+        xor = dwavebinarycsp.factories.xor_gate(['a', 'b', 'c'])
+        self.assertNotEqual(xor.canonical()[0], key1)
+
+    def test_canonical_mapping(self):
+        const = dwavebinarycsp.factories.fulladder_gate(['a', 'b', 'c', 's', 'k'])
+        const.flip_variable('b')
+        const.flip_variable('s')
+
+        key, mapping = const.canonical()
+
+        # relabel and flip the key to get back to the constraint
+        variables = [v for v, _ in mapping]
+        table = key.flip([idx for idx, (_, f) in enumerate(mapping) if f])
+        self.assertEqual(table.take([variables.index(v) for v in const.variables]), const.table)
+
+        # a reordered and differently flipped full adder has the same key
+        other = dwavebinarycsp.factories.fulladder_gate(['a', 'b', 'c', 's', 'k'])
+        for v in 'akc':
+            other.flip_variable(v)
+        other = reorder(other, ['k', 'c', 's', 'a', 'b'])
+        self.assertEqual(other.canonical()[0], key)
+
+    def test_canonical_invariant(self):
+        # every reordering and flipping of a random table has the same canonical key
+        configurations = [(0, 1, 1, 0), (1, 1, 0, 0), (0, 0, 1, 1), (1, 1, 1, 0), (0, 0, 0, 0)]
+        const = dwavebinarycsp.Constraint.from_configurations(configurations, 'abcd', dwavebinarycsp.BINARY)
+        key, _ = const.canonical()
+
+        for order in itertools.permutations('abcd'):
+            for flips in itertools.product((False, True), repeat=4):
+                other = reorder(const, order)
+                for v, flip in zip(order, flips):
+                    if flip:
+                        other.flip_variable(v)
+                self.assertEqual(other.canonical()[0], key)
+
+
+def reorder(const, variables):
+    table = const.table.take([const.variables.index(v) for v in variables])
+    return dwavebinarycsp.Constraint(None, table, variables, const.vartype)
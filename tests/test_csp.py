@@ -15,6 +15,9 @@
 import unittest
 import operator
 
+import dimod
+import numpy as np
+
 import dwavebinarycsp
 
 
@@ -72,3 +75,370 @@ class TestCSP(unittest.TestCase):
         self.assertFalse(csp.check({'a': 1, 'b': 1, 'c': 0, 'd': 0}))
 
         self.assertTrue(csp.check({'a': 0, 'b': 0, 'c': 1}))
+
+    def test_check_samples(self):
+        csp = dwavebinarycsp.CSP(dwavebinarycsp.BINARY)
+
+        csp.add_constraint(operator.eq, ['a', 'b'])
+        csp.add_constraint(operator.ne, ['b', 'c'])
+
+        samples = [{'a': 1, 'b': 1, 'c': 0}, {'a': 0, 'b': 1, 'c': 0}, {'a': 0, 'b': 0, 'c': 0}]
+        sampleset = dimod.SampleSet.from_samples(samples, dwavebinarycsp.BINARY, energy=[0, 0, 0])
+
+        feasible = csp.check_samples(sampleset)
+        np.testing.assert_array_equal(feasible, [csp.check(sample) for sample in samples])
+
+        feasible, violations = csp.check_samples(sampleset, return_violations=True)
+        np.testing.assert_array_equal(feasible, [True, False, False])
+        np.testing.assert_array_equal(violations, [[False, False], [True, False], [False, True]])
+
+    def test_check_samples_empty(self):
+        csp = dwavebinarycsp.CSP(dwavebinarycsp.SPIN)
+        csp.add_constraint(operator.eq, ['a', 'b'])
+
+        feasible, violations = csp.check_samples((np.empty((0, 2)), 'ab'), return_violations=True)
+        self.assertEqual(feasible.shape, (0,))
+        self.assertEqual(violations.shape, (0, 1))
+
+    def test_check_samples_shared_table(self):
+        csp = dwavebinarycsp.CSP(dwavebinarycsp.SPIN)
+
+        ne = dwavebinarycsp.Constraint.from_func(operator.ne, ['a', 'b'], dwavebinarycsp.SPIN)
+        for u, v in [('a', 'b'), ('b', 'c'), ('c', 'd')]:
+            const = ne.copy()
+            const.variables = (u, v)
+            csp.add_constraint(const)
+
+        samples = np.array([[-1, 1, -1, 1], [-1, 1, 1, -1], [1, 1, 1, 1]])
+        feasible, violations = csp.check_samples((samples, 'abcd'), return_violations=True)
+        np.testing.assert_array_equal(feasible, [True, False, False])
+        np.testing.assert_array_equal(violations, [[False, False, False],
+                                                   [False, True, False],
+                                                   [True, True, True]])
+
+        # changes to the constraints are picked up
+        csp.constraints[1].flip_variable('c')
+        feasible = csp.check_samples((samples, 'abcd'))
+        np.testing.assert_array_equal(feasible, [False, True, False])
+
+        csp.fix_variable('a', -1)
+        feasible = csp.check_samples((samples[:, 1:], 'bcd'))
+        np.testing.assert_array_equal(feasible, [False, True, False])
+
+    def test_add_constraint_keeps_labels(self):
+        csp = dwavebinarycsp.CSP(dwavebinarycsp.BINARY)
+
+        first = dwavebinarycsp.Constraint.from_func(operator.eq, [''.join(['a', 'b']), 'c'], csp.vartype)
+        second = dwavebinarycsp.Constraint.from_func(operator.eq, [''.join(['a', 'b']), 'd'], csp.vartype)
+        variables = second.variables
+        csp.add_constraint(first)
+        csp.add_constraint(second)
+
+        # the caller's constraints are not rewritten
+        self.assertIs(second.variables, variables)
+        self.assertTrue(csp.check_samples(([[1, 1, 1]], ['ab', 'c', 'd'])).all())
+
+
+class TestEvaluator(unittest.TestCase):
+    def test_flip(self):
+        csp = dwavebinarycsp.factories.multiplication_circuit(2)
+
+        sample = {v: 0 for v in csp.variables}
+        evaluator = csp.evaluator(sample)
+
+        self.assertEqual(evaluator.num_violations, sum(not const.check(sample) for const in csp.constraints))
+
+        for v in sorted(csp.variables) * 2:
+            before = evaluator.num_violations
+            delta = evaluator.flip(v)
+            sample[v] = 1 - sample[v]
+
+            self.assertEqual(evaluator.sample, sample)
+            self.assertEqual(evaluator.num_violations - before, delta)
+            self.assertEqual(evaluator.satisfied, [const.check(sample) for const in csp.constraints])
+            self.assertEqual(evaluator.check(), csp.check(sample))
+            self.assertEqual(len(evaluator.violated()), evaluator.num_violations)
+
+    def test_set(self):
+        csp = dwavebinarycsp.CSP(dwavebinarycsp.SPIN)
+        csp.add_constraint(operator.eq, ['a', 'b'])
+        csp.add_constraint(operator.ne, ['b', 'c'])
+        csp.add_constraint(operator.eq, ['a', 'a'])  # same variable twice
+
+        sample = {'a': -1, 'b': 1, 'c': 1}
+        evaluator = csp.evaluator(sample)
+        self.assertEqual(evaluator.num_violations, 2)
+
+        self.assertEqual(evaluator.set('b', 1), 0)
+        self.assertEqual(evaluator.set('a', 1), -1)
+        self.assertEqual(evaluator.set('c', -1), -1)
+        self.assertTrue(evaluator.check())
+
+        self.assertEqual(sample, {'a': -1, 'b': 1, 'c': 1})  # the sample is copied
+
+
+class TestFixVariables(unittest.TestCase):
+    def test_propagate(self):
+        csp = dwavebinarycsp.CSP(dwavebinarycsp.BINARY)
+        csp.add_constraint(dwavebinarycsp.factories.and_gate(['a', 'b', 'c']))
+        csp.add_constraint(operator.ne, ['c', 'd'])
+        csp.add_constraint(operator.eq, ['e', 'f'])
+
+        fixed = csp.fix_variables({'c': 1})
+        self.assertEqual(fixed, {'a': 1, 'b': 1, 'c': 1, 'd': 0})
+        self.assertEqual(len(csp), 1)
+        self.assertEqual(set(csp.variables), {'e', 'f'})
+        self.assertTrue(csp.check({'e': 0, 'f': 0}))
+
+    def test_no_propagate(self):
+        csp = dwavebinarycsp.CSP(dwavebinarycsp.SPIN)
+        csp.add_constraint(dwavebinarycsp.factories.and_gate(['a', 'b', 'c'], vartype=dwavebinarycsp.SPIN))
+
+        self.assertEqual(csp.fix_variables({'c': 1}, propagate=False), {'c': 1})
+        self.assertEqual(len(csp), 1)
+        self.assertEqual(set(csp.variables), {'a', 'b'})
+
+    def test_multiplication_circuit(self):
+        csp = dwavebinarycsp.factories.multiplication_circuit(3)
+
+        # 15 = 3 * 5 with both multiplicands fixed determines every variable
+        fixed = csp.fix_variables({'a0': 1, 'a1': 1, 'a2': 0, 'b0': 1, 'b1': 0, 'b2': 1})
+        self.assertEqual(len(csp), 0)
+        self.assertEqual([fixed['p%d' % i] for i in range(6)], [1, 1, 1, 1, 0, 0])
+
+        original = dwavebinarycsp.factories.multiplication_circuit(3)
+        self.assertTrue(original.check(fixed))
+
+    def test_unsat(self):
+        csp = dwavebinarycsp.CSP(dwavebinarycsp.BINARY)
+        csp.add_constraint(operator.eq, ['a', 'b'])
+        csp.add_constraint(operator.eq, ['b', 'c'])
+
+        with self.assertRaises(dwavebinarycsp.exceptions.UnsatError):
+            csp.fix_variables({'a': 1, 'c': 0})
+
+    def test_unknown_variable(self):
+        csp = dwavebinarycsp.CSP(dwavebinarycsp.BINARY)
+        csp.add_constraint(operator.eq, ['a', 'b'])
+
+        with self.assertRaises(ValueError):
+            csp.fix_variables({'a': 1, 'c': 0})
+        self.assertEqual(len(csp.constraints[0]), 2)
+
+
+class TestComponents(unittest.TestCase):
+    def test_components(self):
+        csp = dwavebinarycsp.CSP(dwavebinarycsp.BINARY)
+        csp.add_constraint(operator.eq, ['a', 'b'])
+        csp.add_constraint(operator.ne, ['c', 'd'])
+        csp.add_constraint(dwavebinarycsp.factories.and_gate(['e', 'c', 'f']))
+        csp.add_constraint(operator.eq, ['b', 'g'])
+        csp.add_variable('h')
+
+        components = csp.components()
+        self.assertEqual([set(component.variables) for component in components],
+                         [{'a', 'b', 'g'}, {'c', 'd', 'e', 'f'}, {'h'}])
+        self.assertEqual([len(component) for component in components], [2, 2, 0])
+        self.assertTrue(all(component.vartype is csp.vartype for component in components))
+
+        # solving per component gives solutions of the whole
+        solution = dwavebinarycsp.merge_assignments(dwavebinarycsp.solvers.backtrack(component)[0]
+                                                    for component in components)
+        self.assertTrue(csp.check(solution))
+        self.assertEqual(csp.count_solutions(),
+                         np.prod([component.count_solutions() for component in components]))
+
+        # the components are independent of the original
+        components[0].fix_variable('a', 1)
+        self.assertEqual(csp.constraints[0].variables, ('a', 'b'))
+
+    def test_empty(self):
+        self.assertEqual(dwavebinarycsp.CSP(dwavebinarycsp.SPIN).components(), [])
+
+    def test_subclass(self):
+        class CSP(dwavebinarycsp.CSP):
+            pass
+
+        csp = CSP(dwavebinarycsp.SPIN)
+        csp.add_constraint(operator.eq, ['a', 'b'])
+        csp.add_constraint(operator.ne, ['c', 'd'])
+        self.assertTrue(all(type(component) is CSP for component in csp.components()))
+
+
+class TestCopy(unittest.TestCase):
+    def test_fix_copy(self):
+        csp = dwavebinarycsp.ConstraintSatisfactionProblem(dwavebinarycsp.SPIN)
+        csp.add_constraint(operator.eq, ['a', 'b'])
+        csp.add_constraint(operator.ne, ['b', 'c'])
+        csp.add_constraint(operator.eq, ['c', 'd'])
+
+        copy = csp.copy()
+        self.assertTrue(all(c is d for c, d in zip(csp.constraints, copy.constraints)))
+
+        copy.fix_variable('b', 1)
+        self.assertEqual(set(copy.variables), set('acd'))
+        self.assertEqual(set(csp.variables), set('abcd'))
+        self.assertEqual(csp.constraints[0].variables, ('a', 'b'))
+        self.assertEqual(copy.constraints[0].variables, ('a',))
+        self.assertIs(csp.constraints[2], copy.constraints[2])  # untouched constraints stay shared
+        for v, constraints in copy.variables.items():
+            self.assertTrue(all(any(c is d for d in copy.constraints) for c in constraints))
+
+        self.assertTrue(csp.check({'a': -1, 'b': -1, 'c': 1, 'd': 1}))
+        self.assertFalse(copy.check({'a': -1, 'c': 1, 'd': 1}))
+
+        # and the original can be modified without changing the copy
+        csp.fix_variables({'d': 1})
+        self.assertEqual(set(copy.variables), set('acd'))
+        self.assertEqual(copy.constraints[2].variables, ('c', 'd'))
+
+    def test_fan_out(self):
+        csp = dwavebinarycsp.factories.multiplication_circuit(3)
+        tables = [(const.variables, const.table) for const in csp.constraints]
+
+        for p in range(1, 20):
+            variant = csp.copy()
+            try:
+                fixed = variant.fix_variables({'p%d' % i: (p >> i) & 1 for i in range(6)})
+            except dwavebinarycsp.exceptions.UnsatError:
+                self.assertTrue(p in (11, 13, 17, 19))
+                continue
+
+            solutions = [dict(fixed, **s) for s in dwavebinarycsp.solvers.backtrack(variant, num_solutions=None)]
+            products = {(sum(s['a%d' % i] << i for i in range(3)), sum(s['b%d' % i] << i for i in range(3)))
+                        for s in solutions}
+            self.assertEqual(products, {(a, b) for a in range(8) for b in range(8) if a * b == p})
+
+        self.assertEqual([(const.variables, const.table) for const in csp.constraints], tables)
+
+    def test_arc_consistency_copy(self):
+        csp = dwavebinarycsp.CSP(dwavebinarycsp.BINARY)
+        csp.add_constraint(dwavebinarycsp.factories.xor_gate(['a', 'b', 'c']))
+        csp.add_constraint(operator.eq, ['a', 'b'])
+
+        copy = csp.copy()
+        dwavebinarycsp.arc_consistency(copy)
+        self.assertEqual(len(csp.constraints[0].table), 4)
+        self.assertEqual(len(copy.constraints[0].table), 2)
+
+    def test_stitch_fixed_copy(self):
+        original_circuit = dwavebinarycsp.factories.multiplication_circuit(3)
+        circuit = original_circuit.copy()
+
+        # 15 = 3 * 5
+        fixed_variables = dict([('p0', 1), ('p1', 1), ('p2', 1), ('p3', 1), ('p4', 0), ('p5', 0),
+                                ('a0', 1), ('a1', 1), ('a2', 0),
+                                ('b0', 1), ('b1', 0), ('b2', 1)])
+
+        for v, val in fixed_variables.items():
+            circuit.fix_variable(v, val)
+
+        self.assertTrue(set(fixed_variables).isdisjoint(circuit.variables))
+        self.assertTrue(set(fixed_variables).issubset(original_circuit.variables))
+
+        bqm = dwavebinarycsp.stitch(circuit, min_classical_gap=.1)
+        resp = dimod.ExactSolver().sample(bqm)
+        ground_energy = min(resp.record['energy'])
+
+        for sample, energy in resp.data(['sample', 'energy']):
+            fixed = fixed_variables.copy()
+            fixed.update(sample)
+            self.assertEqual(circuit.check(sample), energy == ground_energy)
+            self.assertEqual(original_circuit.check(fixed), energy == ground_energy)
+
+
+class TestRemoveConstraint(unittest.TestCase):
+    def test_remove(self):
+        csp = dwavebinarycsp.ConstraintSatisfactionProblem(dwavebinarycsp.BINARY)
+        csp.add_constraint(operator.eq, ['a', 'b'])
+        csp.add_constraint(operator.ne, ['b', 'c'])
+        csp.add_constraint(operator.eq, ['c', 'd'])
+        first, second, third = csp.constraints
+
+        self.assertFalse(csp.check_samples([{'a': 0, 'b': 1, 'c': 0, 'd': 0}]).any())
+
+        csp.remove_constraint(first)
+        self.assertEqual(csp.constraints, [second, third])
+        self.assertEqual(list(csp.variables['a']), [])
+        self.assertEqual(list(csp.variables['b']), [second])
+        self.assertEqual(set(csp.variables), set('abcd'))
+        self.assertTrue(csp.check_samples([{'a': 0, 'b': 1, 'c': 0, 'd': 0}]).all())
+
+        # constraints are matched by identity
+        with self.assertRaises(ValueError):
+            csp.remove_constraint(first)
+        with self.assertRaises(ValueError):
+            csp.remove_constraint(second.copy())
+        csp.discard_constraint(second.copy())
+        self.assertEqual(len(csp), 2)
+
+        csp.discard_constraint(third)
+        self.assertEqual(csp.constraints, [second])
+        self.assertEqual(list(csp.variables['c']), [second])
+
+        # and can be added again
+        csp.add_constraint(first)
+        self.assertEqual(csp.constraints, [second, first])
+        self.assertIn(first, csp.variables['a'])
+
+    def test_constraints_copy(self):
+        csp = dwavebinarycsp.ConstraintSatisfactionProblem(dwavebinarycsp.BINARY)
+        csp.add_constraint(operator.eq, ['a', 'b'])
+
+        constraints = csp.constraints
+        constraints.append(constraints[0])
+        constraints.pop(0)
+        self.assertEqual(len(csp.constraints), 1)
+        self.assertIsNot(csp.constraints, csp.constraints)
+
+    def test_variables_sequence(self):
+        csp = dwavebinarycsp.ConstraintSatisfactionProblem(dwavebinarycsp.BINARY)
+        csp.add_constraint(operator.eq, ['a', 'b'])
+        csp.add_constraint(operator.ne, ['b', 'c'])
+        first, second = csp.constraints
+
+        self.assertEqual(csp.variables['b'], [first, second])
+        self.assertEqual(csp.variables['a'], csp.variables['a'])
+        self.assertNotEqual(csp.variables['a'], csp.variables['c'])
+        self.assertIs(csp.variables['b'][0], first)
+        self.assertIs(csp.variables['b'][-1], second)
+        self.assertEqual(csp.variables['b'][1:], [second])
+        self.assertEqual(list(reversed(csp.variables['b'])), [second, first])
+        self.assertEqual(csp.variables['b'].index(second), 1)
+        self.assertEqual(len(csp.variables['b']), 2)
+        with self.assertRaises(IndexError):
+            csp.variables['a'][1]
+
+    def test_add_twice(self):
+        csp = dwavebinarycsp.ConstraintSatisfactionProblem(dwavebinarycsp.BINARY)
+        csp.add_constraint(operator.eq, ['a', 'b'])
+
+        with self.assertRaises(ValueError):
+            csp.add_constraint(csp.constraints[0])
+        csp.add_constraint(csp.constraints[0].copy())
+        self.assertEqual(len(csp), 2)
+
+    def test_fix_variable_compacts(self):
+        csp = dwavebinarycsp.ConstraintSatisfactionProblem(dwavebinarycsp.SPIN)
+        csp.add_constraint(operator.eq, ['a', 'a'])
+        csp.add_constraint(operator.ne, ['a', 'b'])
+        csp.add_constraint(dwavebinarycsp.Constraint.from_func(operator.eq, ['b', 'c'], dwavebinarycsp.SPIN, lazy=True))
+
+        csp.fix_variable('a', 1)
+        self.assertEqual(len(csp), 2)
+        self.assertEqual([const.variables for const in csp.constraints], [('b',), ('b', 'c')])
+
+        csp.fix_variable('b', -1)
+        self.assertEqual(len(csp), 1)
+
+        csp.fix_variable('c', -1)
+        self.assertEqual(len(csp), 0)
+        self.assertEqual(dict(csp.variables), {})
+
+    def test_fix_variable_lazy_unsat(self):
+        csp = dwavebinarycsp.ConstraintSatisfactionProblem(dwavebinarycsp.SPIN)
+        csp.add_constraint(dwavebinarycsp.Constraint.from_func(operator.eq, ['a', 'b'], dwavebinarycsp.SPIN, lazy=True))
+
+        csp.fix_variable('a', 1)
+        with self.assertRaises(dwavebinarycsp.exceptions.UnsatError):
+            csp.fix_variable('b', -1)
@@ -79,6 +79,32 @@ class TestGates(unittest.TestCase):
 
         self.assertEqual(or_.name, 'FULL_ADDER')
 
+    def test_vectorized_funcs(self):
+        gates = [(constraint.and_gate, 3), (constraint.or_gate, 3), (constraint.xor_gate, 3),
+                 (constraint.halfadder_gate, 4), (constraint.fulladder_gate, 5)]
+
+        for vartype in (dwavebinarycsp.BINARY, dwavebinarycsp.SPIN):
+            for gate, num_variables in gates:
+                const = gate(range(num_variables), vartype=vartype)
+                vectorized = dwavebinarycsp.Constraint.from_func(const.func, const.variables, vartype,
+                                                                 vectorized=True)
+                self.assertEqual(const, vectorized)
+
+    def test_shared_tables(self):
+        gates = [(constraint.and_gate, 3), (constraint.or_gate, 3), (constraint.xor_gate, 3),
+                 (constraint.halfadder_gate, 4), (constraint.fulladder_gate, 5)]
+
+        for gate, num_variables in gates:
+            binary = gate(range(num_variables), vartype=dwavebinarycsp.BINARY)
+            spin = gate('abcde'[:num_variables], vartype=dwavebinarycsp.SPIN)
+            self.assertIs(binary.table, spin.table)
+            self.assertIs(binary.func, spin.func)
+
+            # modifying one constraint does not affect the others
+            binary.flip_variable(0)
+            self.assertIsNot(binary.table, spin.table)
+            self.assertEqual(gate(range(num_variables)).table, spin.table)
+
 
 class TestSat(unittest.TestCase):
     def test_sat2in4(self):
@@ -98,8 +124,22 @@ class TestSat(unittest.TestCase):
             else:
                 self.assertFalse(const.func(*config))
 
+    def test_sat2in4_vectorized(self):
+        for vartype in (dwavebinarycsp.BINARY, dwavebinarycsp.SPIN):
+            const = constraint.sat2in4(['a', 'b', 'c', 'd'], vartype=vartype)
+            vectorized = dwavebinarycsp.Constraint.from_func(const.func, const.variables, vartype,
+                                                             vectorized=True)
+            self.assertEqual(const, vectorized)
+
     def test_sat2in4_with_negation(self):
         const = constraint.sat2in4(pos=('a', 'd'), neg=('c', 'b'))
         dcspt.assert_consistent_constraint(const)
 
         self.assertTrue(const.check({'a': 1, 'b': 1, 'c': 1, 'd': 1}))
+
+    def test_sat2in4_shared_tables(self):
+        const = constraint.sat2in4(pos=('a', 'd'), neg=('c', 'b'))
+        other = constraint.sat2in4(pos=('w', 'x'), neg=('y', 'z'), vartype=dwavebinarycsp.SPIN)
+        self.assertIs(const.table, other.table)
+
+        self.assertIs(constraint.sat2in4('abcd').table, constraint.sat2in4((), neg='abcd').table)
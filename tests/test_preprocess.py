@@ -0,0 +1,154 @@
+# Copyright 2018 D-Wave Systems Inc.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License");
+#    you may not use this file except in compliance with the License.
+#    You may obtain a copy of the License at
+#
+#        http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS,
+#    WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#    See the License for the specific language governing permissions and
+#    limitations under the License.
+
+import unittest
+import itertools
+import operator
+import random
+
+import dwavebinarycsp
+
+
+def solutions(csp, variables):
+    return {config for config in itertools.product((0, 1), repeat=len(variables))
+            if csp.check(dict(zip(variables, config)))}
+
+
+class TestArcConsistency(unittest.TestCase):
+    def test_pairwise(self):
+        csp = dwavebinarycsp.CSP(dwavebinarycsp.BINARY)
+        csp.add_constraint(dwavebinarycsp.factories.xor_gate(['a', 'b', 'c']))
+        csp.add_constraint(operator.eq, ['a', 'b'])
+
+        report = dwavebinarycsp.arc_consistency(csp, fix=False)
+        self.assertEqual(report.rows_removed, 2)
+        self.assertEqual(report.fixed, {'c': 0})
+        self.assertEqual(report.constraints_removed, 0)
+        self.assertEqual(csp.constraints[0].configurations, frozenset([(0, 0, 0), (1, 1, 0)]))
+
+        report = dwavebinarycsp.arc_consistency(csp)
+        self.assertEqual(report.rows_removed, 0)
+        self.assertEqual(report.fixed, {'c': 0})
+        self.assertEqual(report.constraints_removed, 0)
+        self.assertEqual(set(csp.variables), {'a', 'b'})
+        self.assertEqual(csp.constraints[0].variables, ('a', 'b'))  # the XOR gate is now a = b
+
+    def test_unsat(self):
+        csp = dwavebinarycsp.CSP(dwavebinarycsp.SPIN)
+        csp.add_constraint(operator.eq, ['a', 'b'])
+        csp.add_constraint(operator.ne, ['a', 'b'])
+
+        with self.assertRaises(dwavebinarycsp.exceptions.UnsatError):
+            dwavebinarycsp.arc_consistency(csp)
+
+    def test_solutions_preserved(self):
+        rng = random.Random(5)
+        variables = 'abcdefg'
+
+        for _ in range(20):
+            csp = dwavebinarycsp.CSP(dwavebinarycsp.BINARY)
+            for _ in range(6):
+                scope = rng.sample(variables, 3)
+                configurations = rng.sample(list(itertools.product((0, 1), repeat=3)), 5)
+                csp.add_constraint(configurations, scope)
+            for v in variables:
+                csp.add_variable(v)
+
+            original = solutions(csp, variables)
+            try:
+                report = dwavebinarycsp.arc_consistency(csp, fix=False)
+            except dwavebinarycsp.exceptions.UnsatError:
+                self.assertFalse(original)
+                continue
+
+            self.assertEqual(solutions(csp, variables), original)
+            for v, value in report.fixed.items():
+                self.assertTrue(all(config[variables.index(v)] == value for config in original))
+
+
+class TestMergeConstraints(unittest.TestCase):
+    def test_identical_and_subsumed(self):
+        csp = dwavebinarycsp.CSP(dwavebinarycsp.BINARY)
+        csp.add_constraint(dwavebinarycsp.factories.and_gate(['a', 'b', 'c']))
+        csp.add_constraint(dwavebinarycsp.factories.and_gate(['a', 'b', 'c']))
+        csp.add_constraint(dwavebinarycsp.factories.or_gate(['b', 'a', 'c']))
+        csp.add_constraint(operator.eq, ['a', 'b'])
+        csp.add_constraint(operator.eq, ['b', 'd'])
+
+        report = dwavebinarycsp.merge_constraints(csp)
+        self.assertEqual(report, (1, 1, 1, 0))
+
+        self.assertEqual(len(csp), 2)
+        self.assertEqual(set(csp.variables), set('abcd'))
+        for v, constraints in csp.variables.items():
+            self.assertTrue(all(any(const is other for other in csp.constraints) for const in constraints))
+        self.assertEqual(solutions(csp, 'abcd'), {(0, 0, 0, 0), (1, 1, 1, 1)})
+
+    def test_unsat(self):
+        csp = dwavebinarycsp.CSP(dwavebinarycsp.SPIN)
+        csp.add_constraint(operator.eq, ['a', 'b'])
+        csp.add_constraint(operator.ne, ['b', 'a'])
+
+        with self.assertRaises(dwavebinarycsp.exceptions.UnsatError):
+            dwavebinarycsp.merge_constraints(csp)
+
+    def test_unsat_clustered(self):
+        # neither constraint's variables are all in the other, so only the clustering pass
+        # intersects them
+        csp = dwavebinarycsp.CSP(dwavebinarycsp.BINARY)
+        csp.add_constraint(lambda a, b, c, x: a ^ b ^ c ^ x and x, ['a', 'b', 'c', 'x'])
+        csp.add_constraint(dwavebinarycsp.Constraint.from_configurations([(0, 0), (0, 1)], ['x', 'y'],
+                                                                         dwavebinarycsp.BINARY))
+
+        with self.assertRaises(dwavebinarycsp.exceptions.UnsatError):
+            dwavebinarycsp.merge_constraints(csp, max_graph_size=8)
+
+    def test_clustered(self):
+        # a half adder as separate XOR and AND gates, the XOR needs auxiliary variables but the
+        # half adder needs fewer
+        csp = dwavebinarycsp.CSP(dwavebinarycsp.BINARY)
+        csp.add_constraint(dwavebinarycsp.factories.xor_gate(['a', 'b', 's']))
+        csp.add_constraint(dwavebinarycsp.factories.and_gate(['a', 'b', 'c']))
+        original = solutions(csp, 'abcs')
+
+        report = dwavebinarycsp.merge_constraints(csp)
+        self.assertEqual(report.clustered, 0)
+        self.assertEqual(len(csp), 2)
+
+        report = dwavebinarycsp.merge_constraints(csp, max_graph_size=8)
+        self.assertEqual(report.clustered, 1)
+        self.assertEqual(len(csp), 1)
+        self.assertEqual(solutions(csp, 'abcs'), original)
+
+    def test_solutions_preserved(self):
+        rng = random.Random(7)
+        variables = 'abcdef'
+
+        for _ in range(20):
+            csp = dwavebinarycsp.CSP(dwavebinarycsp.BINARY)
+            for _ in range(8):
+                scope = rng.sample(variables, rng.randint(1, 3))
+                configurations = rng.sample(list(itertools.product((0, 1), repeat=len(scope))), len(scope) + 1)
+                csp.add_constraint(configurations, scope)
+            for v in variables:
+                csp.add_variable(v)
+
+            original = solutions(csp, variables)
+            try:
+                dwavebinarycsp.merge_constraints(csp)
+            except dwavebinarycsp.exceptions.UnsatError:
+                self.assertFalse(original)
+                continue
+
+            self.assertEqual(solutions(csp, variables), original)
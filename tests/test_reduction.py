@@ -14,6 +14,8 @@
 
 import unittest
 
+import dimod
+
 import dwavebinarycsp
 
 
@@ -27,3 +29,46 @@ class TestDecomposition(unittest.TestCase):
         const = dwavebinarycsp.Constraint.from_configurations(frozenset([(0, 1), (0, 0)]), ('a', 'b'), dwavebinarycsp.BINARY)
 
         self.assertEqual(set(dwavebinarycsp.irreducible_components(const)), {('a',), ('b',)})
+
+
+class TestMerge(unittest.TestCase):
+    def test_merge_bqms(self):
+        csp = dwavebinarycsp.factories.random_2in4sat(12, 3)
+        components = csp.components()
+
+        bqm = dwavebinarycsp.merge_bqms(dwavebinarycsp.stitch(component) for component in components)
+        # variables with no constraints may have no bias
+        constrained = set(v for const in csp.constraints for v in const.variables)
+        self.assertTrue(constrained <= set(bqm.variables) <= set(csp.variables))
+
+        with self.assertRaises(ValueError):
+            dwavebinarycsp.merge_bqms([bqm, bqm])
+
+    def test_merge_bqms_aux(self):
+        csp = dwavebinarycsp.ConstraintSatisfactionProblem(dwavebinarycsp.BINARY)
+        csp.add_constraint(dwavebinarycsp.factories.xor_gate(['a', 'b', 'c']))
+        csp.add_constraint(dwavebinarycsp.factories.xor_gate(['d', 'e', 'f']))
+        components = csp.components()
+        self.assertEqual(len(components), 2)
+
+        # both components need an auxiliary variable
+        with self.assertRaises(ValueError):
+            dwavebinarycsp.merge_bqms(dwavebinarycsp.stitch(component) for component in components)
+
+        bqm = dwavebinarycsp.merge_bqms(dwavebinarycsp.stitch(component, aux_prefix='c{}_aux'.format(i))
+                                        for i, component in enumerate(components))
+        aux = set(bqm.variables) - set('abcdef')
+        self.assertTrue(aux)
+        self.assertTrue(all(v.startswith(('c0_aux', 'c1_aux')) for v in aux))
+
+        # the ground states are the solutions
+        sampleset = dimod.ExactSolver().sample(bqm).lowest()
+        for sample in sampleset.samples():
+            self.assertTrue(csp.check(sample))
+        self.assertEqual(len(sampleset), 16)
+
+    def test_merge_assignments(self):
+        self.assertEqual(dwavebinarycsp.merge_assignments([{'a': -1}, {'b': 1}, {'a': -1}]), {'a': -1, 'b': 1})
+
+        with self.assertRaises(ValueError):
+            dwavebinarycsp.merge_assignments([{'a': -1}, {'a': 1}])
@@ -0,0 +1,243 @@
+# Copyright 2018 D-Wave Systems Inc.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License");
+#    you may not use this file except in compliance with the License.
+#    You may obtain a copy of the License at
+#
+#        http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS,
+#    WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#    See the License for the specific language governing permissions and
+#    limitations under the License.
+
+import collections
+import itertools
+import operator
+import os.path as path
+import random
+import unittest
+
+import numpy as np
+
+import dwavebinarycsp
+from dwavebinarycsp.solvers import (backtrack, count_solutions, elimination_order, iter_solutions,
+                                    sample_solutions, WalkSATSampler)
+from dwavebinarycsp.solvers import walksat
+
+
+def brute_force(csp):
+    variables = list(csp.variables)
+    samples = np.array(list(itertools.product(sorted(csp.vartype.value), repeat=len(variables))))
+    feasible = csp.check_samples((samples, variables))
+    return [dict(zip(variables, sample)) for sample in samples[feasible].tolist()]
+
+
+def as_set(solutions):
+    return {frozenset(solution.items()) for solution in solutions}
+
+
+class TestBacktrack(unittest.TestCase):
+    def test_multiplication_circuit(self):
+        csp = dwavebinarycsp.factories.multiplication_circuit(3)
+
+        solutions = backtrack(csp, num_solutions=None)
+        self.assertEqual(len(solutions), 64)  # one for every pair of multiplicands
+        self.assertEqual(len(as_set(solutions)), 64)
+        for solution in solutions:
+            self.assertTrue(csp.check(solution))
+
+    def test_factoring(self):
+        csp = dwavebinarycsp.factories.multiplication_circuit(6)
+
+        product = 35 * 53
+        csp.fix_variables({'p%d' % i: (product >> i) & 1 for i in range(12)}, propagate=False)
+
+        solutions = backtrack(csp, num_solutions=None)
+        factors = {(sum(s['a%d' % i] << i for i in range(6)), sum(s['b%d' % i] << i for i in range(6)))
+                   for s in solutions}
+        self.assertEqual(factors, {(35, 53), (53, 35)})
+
+    def test_first_k(self):
+        csp = dwavebinarycsp.factories.multiplication_circuit(3)
+
+        solutions = backtrack(csp, num_solutions=5)
+        self.assertEqual(len(as_set(solutions)), 5)
+        self.assertEqual(len(backtrack(csp)), 1)
+
+    def test_cnf(self):
+        filepath = path.join(path.dirname(path.abspath(__file__)), 'data', 'test0.cnf')
+        with open(filepath, 'r') as fp:
+            csp = dwavebinarycsp.cnf.load_cnf(fp)
+
+        self.assertEqual(as_set(backtrack(csp, num_solutions=None)), as_set(brute_force(csp)))
+
+    def test_spin(self):
+        csp = dwavebinarycsp.CSP(dwavebinarycsp.SPIN)
+        csp.add_constraint(operator.ne, ['a', 'b'])
+        csp.add_constraint(dwavebinarycsp.factories.or_gate(['a', 'b', 'c'], vartype=dwavebinarycsp.SPIN))
+        csp.add_variable('d')
+
+        self.assertEqual(as_set(backtrack(csp, num_solutions=None)), as_set(brute_force(csp)))
+
+    def test_unsat(self):
+        csp = dwavebinarycsp.CSP(dwavebinarycsp.BINARY)
+        csp.add_constraint(operator.eq, ['a', 'b'])
+        csp.add_constraint(operator.eq, ['b', 'c'])
+        csp.add_constraint(operator.ne, ['a', 'c'])
+
+        self.assertEqual(backtrack(csp, num_solutions=None), [])
+
+    def test_empty(self):
+        csp = dwavebinarycsp.CSP(dwavebinarycsp.BINARY)
+        self.assertEqual(backtrack(csp), [{}])
+
+
+class TestWalkSATSampler(unittest.TestCase):
+    def test_2in4sat(self):
+        csp = dwavebinarycsp.factories.random_2in4sat(20, 8)
+
+        sampleset = WalkSATSampler().sample(csp, num_reads=3, seed=1)
+        self.assertEqual(len(sampleset), 3)
+        self.assertEqual(set(sampleset.variables), set(csp.variables))
+        self.assertTrue(sampleset.record.is_feasible.all())
+        self.assertTrue(csp.check_samples(sampleset).all())
+
+    def test_energy_is_violations(self):
+        csp = dwavebinarycsp.CSP(dwavebinarycsp.SPIN)
+        csp.add_constraint(operator.eq, ['a', 'b'])
+        csp.add_constraint(operator.ne, ['a', 'b'])
+        csp.add_constraint(operator.eq, ['b', 'c'])
+
+        sampleset = WalkSATSampler().sample(csp, num_reads=5, max_flips=100, seed=3)
+        self.assertEqual(sampleset.vartype, dwavebinarycsp.SPIN)
+        np.testing.assert_array_equal(sampleset.record.energy, 1)
+        self.assertFalse(sampleset.record.is_feasible.any())
+
+        feasible, violations = csp.check_samples(sampleset, return_violations=True)
+        np.testing.assert_array_equal(violations.sum(axis=1), sampleset.record.energy)
+
+    def test_initial_states(self):
+        csp = dwavebinarycsp.factories.multiplication_circuit(2)
+        solution = backtrack(csp)[0]
+
+        # starting from a solution there is nothing to flip
+        sampleset = WalkSATSampler().sample(csp, initial_states=[solution], max_flips=0)
+        self.assertEqual(len(sampleset), 1)
+        self.assertEqual(sampleset.first.sample, solution)
+        self.assertEqual(sampleset.first.energy, 0)
+
+    def test_tabu(self):
+        csp = dwavebinarycsp.CSP(dwavebinarycsp.BINARY)
+        csp.add_constraint(lambda b: not b, ['b'])
+        csp.add_constraint(lambda b: not b, ['b'])
+        csp.add_constraint(operator.eq, ['a', 'b'])
+        csp.add_constraint(lambda a: a, ['a'])
+
+        # record the variables that each greedy flip is chosen from
+        class Random(random.Random):
+            def choice(self, seq):
+                choices.append(list(seq))
+                return super(Random, self).choice(seq)
+        choices = []
+
+        state = walksat._State(csp, list(csp.variables))
+        b, a = (state.index[v] for v in 'ba')
+        state.search([0, 0], 2, 0, Random(0))
+
+        # flipping a satisfies a == 1 and violates a == b, where flipping a straight back
+        # would be the best move were it not the last variable flipped
+        self.assertEqual(choices, [[a], [b]])
+
+    def test_tabu_only_variable(self):
+        csp = dwavebinarycsp.CSP(dwavebinarycsp.BINARY)
+        csp.add_constraint(lambda b: b, ['b'])
+        csp.add_constraint(lambda b: not b, ['b'])
+
+        class Random(random.Random):
+            def choice(self, seq):
+                choices.append(list(seq))
+                return super(Random, self).choice(seq)
+        choices = []
+
+        # one of the constraints is always violated, and the variable flipped last is the only
+        # one that can satisfy it
+        state = walksat._State(csp, ['b'])
+        state.search([0], 3, 0, Random(0))
+        self.assertEqual(choices, [[0], [0], [0]])
+
+
+class TestElimination(unittest.TestCase):
+    def test_count_multiplication_circuit(self):
+        csp = dwavebinarycsp.factories.multiplication_circuit(3)
+        self.assertEqual(count_solutions(csp), 64)
+        self.assertEqual(count_solutions(csp, order='min-degree'), 64)
+        self.assertEqual(csp.count_solutions(), 64)
+
+    def test_cnf(self):
+        filepath = path.join(path.dirname(path.abspath(__file__)), 'data', 'test0.cnf')
+        with open(filepath, 'r') as fp:
+            csp = dwavebinarycsp.cnf.load_cnf(fp)
+
+        solutions = as_set(brute_force(csp))
+        self.assertEqual(count_solutions(csp), len(solutions))
+        self.assertEqual(as_set(csp.iter_solutions()), solutions)
+
+    def test_iter_solutions(self):
+        csp = dwavebinarycsp.CSP(dwavebinarycsp.SPIN)
+        csp.add_constraint(operator.ne, ['a', 'b'])
+        csp.add_constraint(dwavebinarycsp.factories.or_gate(['a', 'b', 'c'], vartype=dwavebinarycsp.SPIN))
+        csp.add_constraint(operator.eq, ['c', 'c'])
+        csp.add_variable('d')
+
+        solutions = list(iter_solutions(csp, order=['d', 'c', 'b', 'a']))
+        self.assertEqual(len(solutions), 4)
+        self.assertEqual(as_set(solutions), as_set(brute_force(csp)))
+
+    def test_unsat(self):
+        csp = dwavebinarycsp.CSP(dwavebinarycsp.BINARY)
+        csp.add_constraint(operator.eq, ['a', 'b'])
+        csp.add_constraint(operator.ne, ['a', 'b'])
+        csp.add_variable('c')
+
+        self.assertEqual(count_solutions(csp), 0)
+        self.assertEqual(list(iter_solutions(csp)), [])
+        with self.assertRaises(dwavebinarycsp.exceptions.UnsatError):
+            sample_solutions(csp)
+
+    def test_large_counts(self):
+        csp = dwavebinarycsp.CSP(dwavebinarycsp.BINARY)
+        for v in range(70):
+            csp.add_variable(v)
+        csp.add_constraint(operator.ne, [0, 1])
+
+        self.assertEqual(count_solutions(csp), 2 ** 69)
+
+    def test_sample_solutions_uniform(self):
+        csp = dwavebinarycsp.CSP(dwavebinarycsp.BINARY)
+        csp.add_constraint(dwavebinarycsp.factories.or_gate(['a', 'b', 'c']))
+        csp.add_constraint(operator.ne, ['c', 'd'])
+
+        sampleset = sample_solutions(csp, num_reads=4000, seed=7)
+        self.assertTrue(csp.check_samples(sampleset).all())
+
+        counts = collections.Counter(map(tuple, sampleset.record.sample.tolist()))
+        self.assertEqual(len(counts), 4)
+        for count in counts.values():
+            self.assertAlmostEqual(count / 4000, .25, delta=.03)
+
+    def test_elimination_order(self):
+        csp = dwavebinarycsp.CSP(dwavebinarycsp.BINARY)
+        for u, v in [('a', 'b'), ('b', 'c'), ('c', 'd')]:  # a path has width 1
+            csp.add_constraint(operator.eq, [u, v])
+
+        for heuristic in ('min-fill', 'min-degree'):
+            order, width = elimination_order(csp, heuristic)
+            self.assertEqual(sorted(order), ['a', 'b', 'c', 'd'])
+            self.assertEqual(width, 1)
+
+        with self.assertRaises(ValueError):
+            elimination_order(csp, 'max-fill')
+        with self.assertRaises(ValueError):
+            count_solutions(csp, order=['a', 'b'])
@@ -12,6 +12,7 @@
 #    See the License for the specific language governing permissions and
 #    limitations under the License.
 
+import concurrent.futures
 import unittest
 import operator
 import itertools
@@ -146,6 +147,49 @@ class TestStitch(unittest.TestCase):
         for bias in bqm.quadratic.values():
             self.assertAlmostEqual(bias, -1)
 
+    def test_stitch_sum_of_penalty_models(self):
+        # the bqm is the sum of the penalty models of the constraints, with the same aux labels
+        for vartype in (dimod.BINARY, dimod.SPIN):
+            csp = dwavebinarycsp.ConstraintSatisfactionProblem(vartype)
+            csp.add_constraint(dwavebinarycsp.factories.and_gate(['a', 'b', 'c'], vartype))
+            csp.add_constraint(dwavebinarycsp.factories.or_gate(['c', 'd', 'e'], vartype))
+            csp.add_constraint(dwavebinarycsp.factories.and_gate(['e', 'a', 'f'], vartype))
+            csp.add_constraint(dwavebinarycsp.factories.halfadder_gate(['a', 'd', 'g', 'h'], vartype))
+            csp.add_constraint(operator.ne, ['f', 'h'])
+            csp.add_constraint(lambda g: g == max(vartype.value), ['g'])
+            csp.add_constraint(dwavebinarycsp.Constraint.from_configurations([()], [], vartype))
+
+            for cache in (dwavebinarycsp.PenaltyModelCache(), dwavebinarycsp.PenaltyModelCache(maxsize=0)):
+                bqm = dwavebinarycsp.stitch(csp, cache=cache)
+                self.assertIs(bqm.vartype, vartype)
+
+                aux = ('aux{}'.format(i) for i in itertools.count())
+                expected = dimod.BinaryQuadraticModel.empty(vartype)
+                for const in csp.constraints:
+                    expected.update(stitcher._penalty_model(const, vartype, 2.0, 8, aux, cache))
+
+                self.assertEqual(set(bqm.variables), set(expected.variables))
+                for v, bias in expected.linear.items():
+                    self.assertAlmostEqual(bqm.linear[v], bias)
+                for (u, v), bias in expected.quadratic.items():
+                    self.assertAlmostEqual(bqm.quadratic[u, v], bias)
+                self.assertEqual(len(bqm.quadratic), len(expected.quadratic))
+                self.assertAlmostEqual(bqm.offset, expected.offset)
+
+    def test_stitch_chunks(self):
+        # the quadratic terms are added a few at a time, the bqm does not depend on how many
+        csp = dwavebinarycsp.factories.multiplication_circuit(3)
+        expected = dwavebinarycsp.stitch(csp)
+
+        chunk_size = stitcher._STITCH_CHUNK_SIZE
+        try:
+            for size in (1, 5, 6):
+                stitcher._STITCH_CHUNK_SIZE = size
+                self.assertEqual(dwavebinarycsp.stitch(csp), expected)
+                self.assertEqual(list(dwavebinarycsp.stitch(csp).variables), list(expected.variables))
+        finally:
+            stitcher._STITCH_CHUNK_SIZE = chunk_size
+
     def test_stitch_max_graph_size_is_1(self):
         csp = dwavebinarycsp.ConstraintSatisfactionProblem(dwavebinarycsp.BINARY)
 
@@ -214,6 +258,155 @@ class TestStitch(unittest.TestCase):
         self.assertGreaterEqual(gap, min_classical_gap)
 
 
+class TestPenaltyModelCache(unittest.TestCase):
+    def test_multiplication_circuit(self):
+        csp = dwavebinarycsp.factories.multiplication_circuit(3)
+
+        cache = dwavebinarycsp.PenaltyModelCache()
+        bqm = dwavebinarycsp.stitch(csp, cache=cache)
+
+        # only AND gates, half adders and full adders
+        info = cache.cache_info()
+        self.assertEqual(info.misses, 3)
+        self.assertEqual(info.hits, len(csp) - 3)
+        self.assertEqual(info.currsize, 3)
+
+        # the same aux labels as without the cache
+        uncached = dwavebinarycsp.stitch(csp, cache=dwavebinarycsp.PenaltyModelCache(maxsize=0))
+        self.assertEqual(set(bqm.variables), set(uncached.variables))
+
+        dwavebinarycsp.stitch(csp, cache=cache)
+        self.assertEqual(cache.cache_info().hits, 2 * len(csp) - 3)
+
+        cache.clear()
+        self.assertEqual(cache.cache_info(), (0, 0, 1024, 0))
+
+    def test_relabeled_and_flipped(self):
+        # an AND gate and an OR gate share a canonical form, with every variable flipped
+        for vartype in (dimod.BINARY, dimod.SPIN):
+            csp = dwavebinarycsp.ConstraintSatisfactionProblem(vartype)
+            csp.add_constraint(dwavebinarycsp.factories.and_gate(['a', 'b', 'c'], vartype))
+            csp.add_constraint(dwavebinarycsp.factories.or_gate(['d', 'e', 'f'], vartype))
+            csp.add_constraint(dwavebinarycsp.factories.xor_gate(['a', 'd', 'aux0'], vartype))
+            csp.add_constraint(dwavebinarycsp.factories.xor_gate(['b', 'e', 'g'], vartype))
+
+            cache = dwavebinarycsp.PenaltyModelCache()
+            bqm = dwavebinarycsp.stitch(csp, cache=cache)
+            self.assertEqual(cache.cache_info()[:2], (2, 2))
+
+            # ground states of the bqm, minimized over the aux variables, are the solutions
+            variables = sorted(set(csp.variables))
+            energies = {}
+            for sample, energy in dimod.ExactSolver().sample(bqm).data(['sample', 'energy']):
+                config = tuple(sample[v] for v in variables)
+                energies[config] = min(energy, energies.get(config, energy))
+            ground = min(energies.values())
+            for config, energy in energies.items():
+                if csp.check(dict(zip(variables, config))):
+                    self.assertAlmostEqual(energy, ground)
+                else:
+                    self.assertGreaterEqual(energy, ground + 2 - 1e-6)
+
+    def test_lru(self):
+        cache = dwavebinarycsp.PenaltyModelCache(maxsize=1)
+
+        csp = dwavebinarycsp.ConstraintSatisfactionProblem(dwavebinarycsp.BINARY)
+        csp.add_constraint(dwavebinarycsp.factories.and_gate(['a', 'b', 'c']))
+        csp.add_constraint(dwavebinarycsp.factories.xor_gate(['a', 'b', 'd']))
+        csp.add_constraint(dwavebinarycsp.factories.and_gate(['c', 'd', 'e']))
+
+        dwavebinarycsp.stitch(csp, cache=cache)
+        self.assertEqual(cache.cache_info(), (0, 3, 1, 1))
+
+    def test_impossible(self):
+        csp = dwavebinarycsp.ConstraintSatisfactionProblem(dwavebinarycsp.SPIN)
+        csp.add_constraint(operator.eq, ['a', 'b'])
+
+        cache = dwavebinarycsp.PenaltyModelCache()
+        for _ in range(2):
+            with self.assertRaises(dwavebinarycsp.exceptions.ImpossibleBQM):
+                dwavebinarycsp.stitch(csp, min_classical_gap=3, max_graph_size=2, cache=cache)
+        self.assertEqual(cache.cache_info()[:2], (1, 1))
+
+
+class TestParallelStitch(unittest.TestCase):
+    def test_workers(self):
+        csp = dwavebinarycsp.factories.multiplication_circuit(3)
+
+        serial = dwavebinarycsp.stitch(csp, cache=dwavebinarycsp.PenaltyModelCache())
+
+        cache = dwavebinarycsp.PenaltyModelCache()
+        bqm = dwavebinarycsp.stitch(csp, cache=cache, workers=2)
+        self.assertEqual(bqm, serial)
+        self.assertEqual(list(bqm.variables), list(serial.variables))
+        self.assertEqual(cache.cache_info().misses, 3)
+
+    def test_executor(self):
+        csp = dwavebinarycsp.factories.multiplication_circuit(3)
+
+        serial = dwavebinarycsp.stitch(csp, cache=dwavebinarycsp.PenaltyModelCache())
+
+        cache = dwavebinarycsp.PenaltyModelCache()
+        with concurrent.futures.ThreadPoolExecutor(2) as executor:
+            self.assertEqual(dwavebinarycsp.warm_cache(csp, cache=cache, executor=executor), 3)
+            bqm = dwavebinarycsp.stitch(csp, cache=cache, executor=executor)
+        self.assertEqual(bqm, serial)
+        self.assertEqual(cache.cache_info()[:2], (3 + len(csp), 3))
+
+    def test_workers_and_executor(self):
+        csp = dwavebinarycsp.factories.multiplication_circuit(2)
+        with concurrent.futures.ThreadPoolExecutor(2) as executor:
+            with self.assertRaises(ValueError):
+                dwavebinarycsp.stitch(csp, workers=2, executor=executor)
+
+
+class TestIterStitch(unittest.TestCase):
+    def test_multiplication_circuit(self):
+        csp = dwavebinarycsp.factories.multiplication_circuit(3)
+
+        bqm = dimod.BinaryQuadraticModel.empty(csp.vartype)
+        aux_variables = []
+        for const, pmodel, classical_gap, aux in dwavebinarycsp.iter_stitch(csp, min_classical_gap=2.0):
+            self.assertIs(pmodel.vartype, csp.vartype)
+            self.assertEqual(set(pmodel.variables), set(const.variables) | set(aux))
+            self.assertGreaterEqual(classical_gap, 2.0)
+            bqm.update(pmodel)
+            aux_variables.extend(aux)
+
+        # the same bqm and aux labels as stitch
+        stitched = dwavebinarycsp.stitch(csp)
+        self.assertEqual(set(bqm.variables), set(stitched.variables))
+        for v, bias in stitched.linear.items():
+            self.assertAlmostEqual(bqm.linear[v], bias)
+        for (u, v), bias in stitched.quadratic.items():
+            self.assertAlmostEqual(bqm.quadratic[u, v], bias)
+
+        self.assertEqual(len(aux_variables), len(set(aux_variables)))
+        self.assertEqual(set(aux_variables), set(stitched.variables) - set(csp.variables))
+
+    def test_classical_gap(self):
+        csp = dwavebinarycsp.ConstraintSatisfactionProblem(dwavebinarycsp.SPIN)
+        csp.add_constraint(operator.eq, ['a', 'b'])
+        csp.add_constraint(lambda c, d: True, ['c', 'd'])
+
+        (_, _, gap, aux), (_, _, free_gap, _) = dwavebinarycsp.iter_stitch(csp, min_classical_gap=3,
+                                                                          max_graph_size=3)
+        self.assertGreaterEqual(gap, 3)
+        self.assertEqual(len(aux), 1)
+        self.assertEqual(free_gap, float('inf'))
+
+    def test_lazy(self):
+        csp = dwavebinarycsp.ConstraintSatisfactionProblem(dwavebinarycsp.BINARY)
+        csp.add_constraint(operator.eq, ['a', 'b'])
+        csp.add_constraint(lambda *args: all(args), list('abcdefghijk'))  # 11 variables
+
+        stitched = dwavebinarycsp.iter_stitch(csp)
+        const, _, _, _ = next(stitched)
+        self.assertIs(const, csp.constraints[0])
+        with self.assertRaises(dwavebinarycsp.exceptions.ImpossibleBQM):
+            next(stitched)
+
+
 def powerset(iterable):
     "powerset([1,2,3]) --> () (1,) (2,) (3,) (1,2) (1,3) (2,3) (1,2,3)"
     s = list(iterable)
@@ -0,0 +1,132 @@
+# Copyright 2018 D-Wave Systems Inc.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License");
+#    you may not use this file except in compliance with the License.
+#    You may obtain a copy of the License at
+#
+#        http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS,
+#    WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#    See the License for the specific language governing permissions and
+#    limitations under the License.
+
+import concurrent.futures
+import os
+import pickle
+import shutil
+import tempfile
+import unittest
+
+import dimod
+
+import dwavebinarycsp
+from dwavebinarycsp.core.table import ConfigurationTable
+
+
+def key(num_variables, rows):
+    return ConfigurationTable(list(rows), num_variables), 2.0, 8
+
+
+def put_range(path, start, stop):
+    store = dwavebinarycsp.PenaltyModelStore(path)
+    for row in range(start, stop):
+        store.put(key(8, [row]), dimod.BinaryQuadraticModel({0: row}, {}, 0, dimod.SPIN))
+
+
+class TestPenaltyModelStore(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.path = os.path.join(self.tmpdir, 'penaltymodels.db')
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir)
+
+    def test_get_put(self):
+        store = dwavebinarycsp.PenaltyModelStore(self.path)
+
+        model = dimod.BinaryQuadraticModel({0: .5, 1: -1, 2: 0}, {(0, 2): 1, (1, 2): -.5}, 1.5, dimod.SPIN)
+        store.put(key(2, [0, 3]), model)
+        store.put(key(2, [1, 2]), None)
+
+        self.assertEqual(store.get(key(2, [0, 3])), model)
+        self.assertIsNone(store.get(key(2, [1, 2]), 'missing'))
+        self.assertEqual(store.get(key(2, [0, 1]), 'missing'), 'missing')
+        self.assertEqual(store.get((key(2, [0, 3])[0], 3.0, 8), 'missing'), 'missing')
+        self.assertEqual(len(store), 2)
+
+        # another connection, as from another process
+        self.assertEqual(dwavebinarycsp.PenaltyModelStore(self.path).get(key(2, [0, 3])), model)
+        self.assertEqual(pickle.loads(pickle.dumps(store)).get(key(2, [0, 3])), model)
+
+        store.clear()
+        self.assertEqual(len(store), 0)
+
+    def test_eviction(self):
+        store = dwavebinarycsp.PenaltyModelStore(self.path, max_entries=2)
+        model = dimod.BinaryQuadraticModel({0: 1}, {}, 0, dimod.SPIN)
+
+        store.put(key(1, [0]), model)
+        store.put(key(1, [1]), model)
+        store.get(key(1, [0]))  # the row [1] is now the least recently used
+        store.put(key(1, [0, 1]), model)
+
+        self.assertEqual(len(store), 2)
+        self.assertIsNotNone(store.get(key(1, [0])))
+        self.assertEqual(store.get(key(1, [1]), 'missing'), 'missing')
+
+    def test_eviction_order(self):
+        # writes in quick succession are still ordered
+        store = dwavebinarycsp.PenaltyModelStore(self.path, max_entries=3)
+        for row in range(6):
+            store.put(key(3, [row]), None)
+
+        self.assertEqual(len(store), 3)
+        self.assertEqual([row for row in range(6) if store.get(key(3, [row]), 'missing') is None], [3, 4, 5])
+
+    def test_recent_get_does_not_write(self):
+        store = dwavebinarycsp.PenaltyModelStore(self.path, max_entries=4)
+        for row in range(4):
+            store.put(key(2, [row]), None)
+        connection = store._connect()
+
+        changes = connection.total_changes
+        store.get(key(2, [3]))  # among the most recently used
+        self.assertEqual(connection.total_changes, changes)
+
+        store.get(key(2, [0]))  # the least recently used
+        self.assertEqual(connection.total_changes, changes + 1)
+
+        # so it is kept
+        store.put(key(2, [0, 1]), None)
+        self.assertIsNone(store.get(key(2, [0]), 'missing'))
+        self.assertEqual(store.get(key(2, [1]), 'missing'), 'missing')
+
+    def test_concurrent_writers(self):
+        with concurrent.futures.ProcessPoolExecutor(4) as executor:
+            futures = [executor.submit(put_range, self.path, start, start + 25) for start in range(0, 100, 25)]
+            for future in futures:
+                future.result()
+
+        store = dwavebinarycsp.PenaltyModelStore(self.path)
+        self.assertEqual(len(store), 100)
+        self.assertEqual(store.get(key(8, [42])).linear[0], 42)
+
+    def test_stitch(self):
+        csp = dwavebinarycsp.factories.multiplication_circuit(3)
+
+        cache = dwavebinarycsp.PenaltyModelCache(store=dwavebinarycsp.PenaltyModelStore(self.path))
+        self.assertEqual(dwavebinarycsp.warm_cache(csp, cache=cache), 3)
+        self.assertEqual(cache.misses, 3)
+        self.assertEqual(dwavebinarycsp.warm_cache(csp, cache=cache), 3)
+        self.assertEqual(cache.misses, 3)
+
+        # a fresh cache, as in another process, builds no penalty models
+        cache = dwavebinarycsp.PenaltyModelCache(store=dwavebinarycsp.PenaltyModelStore(self.path))
+        bqm = dwavebinarycsp.stitch(csp, cache=cache)
+        self.assertEqual(cache.misses, 0)
+        self.assertEqual(cache.hits, len(csp))
+
+        uncached = dwavebinarycsp.stitch(csp, cache=dwavebinarycsp.PenaltyModelCache(maxsize=0))
+        self.assertEqual(bqm, uncached)
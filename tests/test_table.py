@@ -0,0 +1,142 @@
+# Copyright 2018 D-Wave Systems Inc.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License");
+#    you may not use this file except in compliance with the License.
+#    You may obtain a copy of the License at
+#
+#        http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS,
+#    WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#    See the License for the specific language governing permissions and
+#    limitations under the License.
+
+import unittest
+import itertools
+import random
+
+import numpy as np
+
+import dwavebinarycsp
+import dwavebinarycsp.core.table as table_module
+from dwavebinarycsp.core.table import ConfigurationTable
+
+
+class TestConfigurationTable(unittest.TestCase):
+    def test_dense(self):
+        table = ConfigurationTable.from_configurations([(0, 0, 0), (0, 1, 0), (1, 0, 0), (1, 1, 1)], 3)
+
+        self.assertIsNotNone(table._mask)
+        self.assertEqual(len(table), 4)
+        self.assertEqual(list(table), [0b000, 0b010, 0b100, 0b111])
+        self.assertIn(0b111, table)
+        self.assertNotIn(0b001, table)
+        np.testing.assert_array_equal(table.contains([0, 1, 7]), [True, False, True])
+
+    def test_sparse(self):
+        configurations = [(0,) * 30, (1,) * 30, (0, 1) * 15]
+        table = ConfigurationTable.from_configurations(configurations, 30)
+
+        self.assertIsNone(table._mask)
+        self.assertEqual(len(table), 3)
+        self.assertEqual(table.to_configurations(dwavebinarycsp.BINARY), frozenset(configurations))
+        np.testing.assert_array_equal(table.contains([0, 1, (1 << 30) - 1]), [True, False, True])
+
+    def test_wide(self):
+        configurations = [(-1,) * 70, (+1,) * 70]
+        table = ConfigurationTable.from_configurations(configurations, 70)
+
+        self.assertEqual(table.to_configurations(dwavebinarycsp.SPIN), frozenset(configurations))
+        self.assertIn((1 << 70) - 1, table)
+        self.assertEqual(table.fix(3, 1).to_configurations(dwavebinarycsp.SPIN), frozenset([(+1,) * 69]))
+
+    def test_constant_columns(self):
+        table = ConfigurationTable.from_configurations([(0, 1, 0, 1), (0, 1, 1, 0)], 4)
+        self.assertEqual(table.constant_columns(), {0: 0, 1: 1})
+
+        table = ConfigurationTable.from_configurations([(1,) * 70, (1,) * 69 + (0,)], 70)
+        self.assertEqual(table.constant_columns(), {col: 1 for col in range(69)})
+
+        self.assertEqual(ConfigurationTable([], 3).constant_columns(), {})
+
+    def test_from_mask(self):
+        mask = [False, True, True, False]
+        table = ConfigurationTable.from_mask(mask)
+
+        self.assertEqual(table.num_variables, 2)
+        self.assertEqual(list(table), [1, 2])
+
+        with self.assertRaises(ValueError):
+            ConfigurationTable.from_mask([True, False, True])
+
+    def test_eq_hash(self):
+        a = ConfigurationTable([3, 1, 1], 2)
+        b = ConfigurationTable.from_configurations([(-1, 1), (1, 1)], 2)
+
+        self.assertEqual(a, b)
+        self.assertEqual(hash(a), hash(b))
+        self.assertNotEqual(a, ConfigurationTable([3, 1], 3))
+
+    def test_transformations(self):
+        table = ConfigurationTable.from_configurations([(0, 0, 1), (0, 1, 1), (1, 1, 0)], 3)
+
+        self.assertEqual(table.take([2, 0]).to_configurations(dwavebinarycsp.BINARY),
+                         frozenset([(1, 0), (0, 1)]))
+        self.assertEqual(table.fix(0, 0).to_configurations(dwavebinarycsp.BINARY),
+                         frozenset([(0, 1), (1, 1)]))
+        self.assertEqual(table.flip([1]).to_configurations(dwavebinarycsp.BINARY),
+                         frozenset([(0, 1, 1), (0, 0, 1), (1, 0, 0)]))
+
+    def test_all_storage_roundtrip(self):
+        for num_variables in range(5):
+            for configurations in itertools.combinations(itertools.product((0, 1), repeat=num_variables), 2):
+                table = ConfigurationTable.from_configurations(configurations, num_variables)
+                self.assertEqual(table.to_configurations(dwavebinarycsp.BINARY), frozenset(configurations))
+
+    def test_canonical(self):
+        rng = random.Random(5)
+        for _ in range(200):
+            num_variables = rng.randint(1, 5)
+            table = ConfigurationTable(rng.sample(range(1 << num_variables),
+                                                  rng.randint(1, 1 << num_variables)), num_variables)
+            key, columns, flips = table.canonical()
+
+            # the mapping takes the table to its canonical form
+            self.assertEqual(table.take(columns).flip([idx for idx, f in enumerate(flips) if f]), key)
+
+            # reordered and flipped tables have the same canonical form
+            order = list(range(num_variables))
+            rng.shuffle(order)
+            flipped = [col for col in range(num_variables) if rng.random() < .5]
+            self.assertEqual(table.take(order).flip(flipped).canonical()[0], key)
+
+    def test_canonical_symmetric(self):
+        # fully symmetric tables do not need to try every ordering
+        table = ConfigurationTable(range(1, 1 << 12), 12)  # OR of 12 variables
+        key, _, _ = table.canonical()
+        self.assertEqual(len(key), len(table))
+        self.assertIs(table.canonical()[0], key)  # cached
+
+    def test_canonical_bounded(self):
+        # every column of a parity table is balanced, so every flipping is a candidate
+        num_variables = 14
+        table = ConfigurationTable.from_configurations(
+            [config for config in itertools.product((0, 1), repeat=num_variables) if sum(config) % 2 == 0],
+            num_variables)
+
+        comparisons = []
+        less = table_module._less
+
+        def counting_less(a, b):
+            comparisons.append(None)
+            return less(a, b)
+
+        table_module._less = counting_less
+        try:
+            key, columns, flips = table.canonical()
+        finally:
+            table_module._less = less
+
+        self.assertLess(len(comparisons), table_module._MAX_CANONICAL_CANDIDATES)
+        self.assertEqual(table.take(columns).flip([idx for idx, f in enumerate(flips) if f]), key)